@@ -1,26 +1,37 @@
 # agents/critic.py
-from typing import List, Dict, Any
-from core.state import StepState
+from typing import List, Dict, Any, Optional
+from core import config
+from core.evidence import EvidenceStore
+from core.state import Step, StepState
 
-def evaluate(plan: List[Dict[str, Any]]) -> Dict[str, Any]:
+def evaluate(plan: List[Step], evidence: Optional[EvidenceStore] = None) -> Dict[str, Any]:
+    """
+    Check every step's acceptance criterion in one pass over the plan.
+    Summaries are verified against the evidence store (built from the plan's steps
+    unless given), so the cost is linear in plan and output size. Which rule an
+    acceptance text maps to comes from the config's `acceptance:` section.
+    """
+    if evidence is None:
+        evidence = EvidenceStore.from_plan(plan)
+    rules = config.settings().acceptance
     all_pass = True
     for s in plan:
-        acc = s.get("acceptance")
-        if acc == "Has concrete criteria":
-            all_pass &= bool(s.get("criteria"))
-        elif acc == "Inputs present":
-            all_pass &= bool(s.get("inputs"))
-        elif acc == "Summary references result":
-            res = s.get("result") or {}
+        rule = rules.get(s.acceptance)
+        if rule == "criteria":
+            all_pass &= bool(s.criteria)
+        elif rule == "inputs":
+            all_pass &= bool(s.inputs)
+        elif rule == "summary_references_result":
+            res = s.result or {}
             summary = res.get("summary", "")
             tool_out = res.get("tool_output")
-            all_pass &= bool(summary) and (tool_out is not None) and (str(tool_out) in summary)
+            all_pass &= bool(summary) and (tool_out is not None) and evidence.supports(s.id, tool_out, summary)
         # must be DONE
-        all_pass &= (s.get("state") == StepState.DONE)
-        all_pass &= (s.get("done") is True)
+        all_pass &= (s.state == StepState.DONE)
+        all_pass &= (s.done is True)
     return {"complete": all_pass, "score": 1.0 if all_pass else 0.0}
 
-def summarize_trace(plan: List[Dict[str, Any]]) -> str:
-    done_count = sum(1 for s in plan if s.get("state") == StepState.DONE)
+def summarize_trace(plan: List[Step]) -> str:
+    done_count = sum(1 for s in plan if s.state == StepState.DONE)
     status = "complete" if done_count == len(plan) else "review"
     return f"steps={len(plan)} done={done_count} status={status}"
\ No newline at end of file
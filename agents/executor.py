@@ -1,38 +1,61 @@
 # agents/executor.py
-import os
 import re
-from typing import Any, Dict, List
-from core.state import StepState
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Mapping, Optional, Union
+from core import config, llm, retry, tracing
+from core.evidence import quote
+from core.budget import BudgetExceeded
+from core.state import Step, StepState
+from tools import expression
 
-# Detect if we can call OpenAI (kept compatible with your original file)
-USE_OPENAI = bool(os.getenv("OPENAI_API_KEY"))
+# None: call OpenAI when the config snapshot says so (OPENAI_API_KEY set, llm.enabled);
+# True/False force it (tests)
+USE_OPENAI: Optional[bool] = None
+
+
+def llm_enabled() -> bool:
+    return config.settings().llm_enabled if USE_OPENAI is None else USE_OPENAI
 
 # -----------------------------
 # Optional LLM-assisted reasoning
 # -----------------------------
-def reason(step) -> Any:
-    """
-    Lightweight helper to produce a short thought/answer using OpenAI if available.
-    Accepts either a dict-like step or an object with .description/.inputs.
-    """
+def _reason_messages(step):
     # Support dict or object style access
     desc = step.get("description") if isinstance(step, dict) else getattr(step, "description", "")
     inputs = step.get("inputs") if isinstance(step, dict) else getattr(step, "inputs", {})
 
     text = f"Reasoning about: {desc}. Inputs: {inputs}"
-    if not USE_OPENAI:
+    sys = "You are a concise problem-solver. Provide one short paragraph."
+    return text, [{"role": "system", "content": sys}, {"role": "user", "content": text}]
+
+
+def reason(step) -> Any:
+    """
+    Lightweight helper to produce a short thought/answer using OpenAI if available.
+    Accepts either a dict-like step or an object with .description/.inputs.
+    """
+    text, messages = _reason_messages(step)
+    if not llm_enabled():
         # Offline deterministic response
         return {"thought": text, "answer": "Drafted without LLM (fallback)."}
 
-    from openai import OpenAI
-    client = OpenAI()
-    sys = "You are a concise problem-solver. Provide one short paragraph."
-    user = text
-    resp = client.chat.completions.create(
-        model=os.getenv("MODEL_EXECUTOR", "gpt-4o-mini"),
-        messages=[{"role": "system", "content": sys}, {"role": "user", "content": user}],
-        temperature=0.2,
-    )
+    try:
+        resp = llm.complete(config.settings().models.executor, messages, temperature=0.2)
+    except BudgetExceeded:
+        return {"thought": text, "answer": "Drafted without LLM (budget exhausted)."}
+    return {"thought": text, "answer": resp.choices[0].message.content}
+
+
+async def areason(step) -> Any:
+    """Async reason(): same output, awaited on the shared async client."""
+    text, messages = _reason_messages(step)
+    if not llm_enabled():
+        return {"thought": text, "answer": "Drafted without LLM (fallback)."}
+
+    try:
+        resp = await llm.acomplete(config.settings().models.executor, messages, temperature=0.2)
+    except BudgetExceeded:
+        return {"thought": text, "answer": "Drafted without LLM (budget exhausted)."}
     return {"thought": text, "answer": resp.choices[0].message.content}
 
 
@@ -42,6 +65,67 @@ def reason(step) -> Any:
 
 NUM_RE = re.compile(r"[-+]?\d*\.?\d+")
 
+# Single scanner for the whole prompt:
+#   - an unsigned number, optionally followed by "<op> y" (a symbol expression, which
+#     has the highest priority and is returned as soon as it is seen); a sign directly
+#     before the number is picked up by looking one char back
+#   - the first letter of an op keyword, with the rest checked by lookahead so that
+#     overlapping/embedded keywords are all seen
+_EXPR_TAIL = rf"\s*(?P<sym>[+\-*/x÷×])\s*(?P<b>{NUM_RE.pattern})"
+_SCAN_RE = re.compile(
+    r"(?=[\d.asptmdo])"  # leading character class lets the engine skip other text
+    rf"(?:(?P<num>\d+(?:\.\d+)?|\.\d+)(?:{_EXPR_TAIL})?"
+    r"|(?P<kw>a(?=dd)|s(?=um|ubtract)|p(?=lus)|t(?=ogether|otal|imes)|m(?=inus|ultiply)|d(?=ivide)|o(?=ver)))"
+)
+_EXPR_RE = re.compile(rf"(?P<a>{NUM_RE.pattern}){_EXPR_TAIL}")
+_SYMBOL_OPS = {"+": "add", "-": "sub", "*": "mul", "x": "mul", "×": "mul", "/": "div", "÷": "div"}
+_KEYWORD_OPS = {
+    "add": "add", "sum": "add", "plus": "add", "together": "add", "total": "add",
+    "subtract": "sub", "minus": "sub",
+    "multiply": "mul", "times": "mul",
+    "divide": "div", "over": "div",
+}
+# The first three letters identify each keyword
+_KEYWORD_BY_PREFIX = {w[:3]: w for w in _KEYWORD_OPS}
+# Gaps between a keyword/number and the following number
+_WS_GAP = re.compile(r"\s+")
+_BY_GAP = re.compile(r"\s+(?:by\s+)?")
+_FROM_GAP = re.compile(r"\s+from\s+")
+_MINUS_GAP = re.compile(r"\s+minus\s+")
+_OVER_GAP = re.compile(r"\s+over\s+")
+# Full infix patterns, only needed when numbers re-lex differently mid-token ("1.2.3")
+_MINUS_RE = re.compile(rf"({NUM_RE.pattern}){_MINUS_GAP.pattern}({NUM_RE.pattern})")
+_OVER_RE = re.compile(rf"({NUM_RE.pattern}){_OVER_GAP.pattern}({NUM_RE.pattern})")
+
+
+def _symbol_result(m):
+    return (_SYMBOL_OPS[m.group("sym")], float(m.group("a")), float(m.group("b")))
+
+
+def _keyword_pair(text, keywords, starts, nums, words, gap):
+    """First `<word>\\s+X<gap>Y` in text -> (X, Y), using the scanned keyword/number spans."""
+    for kw_end, word in keywords:
+        if word not in words:
+            continue
+        i = bisect_left(starts, kw_end)
+        if i + 1 < len(nums) and _WS_GAP.fullmatch(text, kw_end, starts[i]):
+            (_, x_end, x), (y_start, _, y) = nums[i], nums[i + 1]
+            if gap.fullmatch(text, x_end, y_start):
+                return x, y
+    return None
+
+
+def _infix_pair(text, nums, gap, full_re, dotted):
+    """First `X<gap>Y` between consecutive numbers -> (X, Y)."""
+    if dotted:
+        m = full_re.search(text)
+        return (float(m.group(1)), float(m.group(2))) if m else None
+    for (_, x_end, x), (y_start, _, y) in zip(nums, nums[1:]):
+        if gap.fullmatch(text, x_end, y_start):
+            return x, y
+    return None
+
+
 def _parse_math_from_prompt(prompt: str):
     """
     Return (op, a, b) where op in {add, sub, mul, div}, or None if not confident.
@@ -50,172 +134,388 @@ def _parse_math_from_prompt(prompt: str):
       - subtract/minus / "subtract X from Y" (Y - X)
       - multiply/times
       - divide/over / "divide X by Y" and symbol-based: x+y, x-y, x*y, x/y
+    The prompt is scanned once; the keyword/number patterns below are resolved
+    from the collected spans instead of re-searching the text.
     """
     text = prompt.lower()
 
-    # Symbol-based first (exactly two numbers with an operator between them)
-    m = re.search(r"([-+]?\d*\.?\d+)\s*([+\-*/x÷×])\s*([-+]?\d*\.?\d+)", text)
-    if m:
-        a, sym, b = float(m.group(1)), m.group(2), float(m.group(3))
-        if sym in ["+",]:
-            return ("add", a, b)
-        if sym in ["-",]:
-            return ("sub", a, b)
-        if sym in ["*", "x", "×"]:
-            return ("mul", a, b)
-        if sym in ["/", "÷"]:
-            return ("div", a, b)
-
-    nums = [float(n) for n in NUM_RE.findall(text)]
+    nums = []      # (start, end, value)
+    keywords = []  # (end, word)
+    dotted = False
+    for m in _SCAN_RE.finditer(text):
+        start, end = m.span()
+        if m.group("kw"):
+            word = _KEYWORD_BY_PREFIX[text[start:start + 3]]
+            keywords.append((start + len(word), word))
+            continue
+        signed = start > 0 and text[start - 1] in "+-"
+        if signed:
+            start -= 1
+        if m.group("sym"):
+            # Symbol-based first (exactly two numbers with an operator between them)
+            return (_SYMBOL_OPS[m.group("sym")], float(text[start:m.end("num")]), float(m.group("b")))
+        if text.startswith(".", end):
+            # "1.2.3+4": an expression may start inside this token ("2.3+4")
+            for pos in range(start + 1, end):
+                e = _EXPR_RE.match(text, pos)
+                if e:
+                    return _symbol_result(e)
+            dotted = True
+        nums.append((start, end, float(text[start:end])))
+
+    if len(nums) < 2:
+        return None
+    ops = {_KEYWORD_OPS[w] for _, w in keywords}
+    starts = [n[0] for n in nums]
 
     # ADD
-    if any(w in text for w in ["add", "sum", "plus", "together", "total"]) and len(nums) >= 2:
-        return ("add", nums[0], nums[1])
-
-    m = re.search(r"add\s+([-+]?\d*\.?\d+)\s+(and|&|\+)\s+([-+]?\d*\.?\d+)", text)
-    if m:
-        return ("add", float(m.group(1)), float(m.group(3)))
+    if "add" in ops:
+        return ("add", nums[0][2], nums[1][2])
 
     # SUBTRACT (note: "subtract X from Y" means Y - X)
-    if ("subtract" in text or "minus" in text) and len(nums) >= 2:
-        # prefer "subtract X from Y"
-        m = re.search(r"subtract\s+([-+]?\d*\.?\d+)\s+from\s+([-+]?\d*\.?\d+)", text)
-        if m:
-            x, y = float(m.group(1)), float(m.group(2))
+    if "sub" in ops:
+        pair = _keyword_pair(text, keywords, starts, nums, ("subtract",), _FROM_GAP)
+        if pair:
+            x, y = pair
             return ("sub", y, x)
         # or "Y minus X"
-        m = re.search(r"([-+]?\d*\.?\d+)\s+minus\s+([-+]?\d*\.?\d+)", text)
-        if m:
-            return ("sub", float(m.group(1)), float(m.group(2)))
+        pair = _infix_pair(text, nums, _MINUS_GAP, _MINUS_RE, dotted)
+        if pair:
+            return ("sub",) + pair
         # fallback: first two numbers: a - b
-        return ("sub", nums[0], nums[1])
+        return ("sub", nums[0][2], nums[1][2])
 
     # MULTIPLY
-    if any(w in text for w in ["multiply", "times"]) and len(nums) >= 2:
-        m = re.search(r"(multiply|times)\s+([-+]?\d*\.?\d+)\s+(by\s+)?([-+]?\d*\.?\d+)", text)
-        if m:
-            a = float(m.group(2)); b = float(m.group(4))
-            return ("mul", a, b)
-        return ("mul", nums[0], nums[1])
+    if "mul" in ops:
+        pair = _keyword_pair(text, keywords, starts, nums, ("multiply", "times"), _BY_GAP)
+        return ("mul",) + (pair or (nums[0][2], nums[1][2]))
 
     # DIVIDE
-    if any(w in text for w in ["divide", "over"]) and len(nums) >= 2:
-        m = re.search(r"(divide|over)\s+([-+]?\d*\.?\d+)\s+(by\s+)?([-+]?\d*\.?\d+)", text)
-        if m:
-            a = float(m.group(2)); b = float(m.group(4))
-            return ("div", a, b)
-        # "a over b"
-        m = re.search(r"([-+]?\d*\.?\d+)\s+over\s+([-+]?\d*\.?\d+)", text)
-        if m:
-            return ("div", float(m.group(1)), float(m.group(2)))
-        return ("div", nums[0], nums[1])
+    if "div" in ops:
+        pair = (_keyword_pair(text, keywords, starts, nums, ("divide", "over"), _BY_GAP)
+                # "a over b"
+                or _infix_pair(text, nums, _OVER_GAP, _OVER_RE, dotted))
+        return ("div",) + (pair or (nums[0][2], nums[1][2]))
 
     return None
 
 
+# Multi-operand arithmetic, evaluated whole by the math.expr tool:
+#   - a symbol expression with three or more numbers or with parentheses ("(2+3)*4/7");
+#     x is an operator only when a number or "(" follows it, and a span starts on "."
+#     only when a digit follows (not on the full stop of "Compute. 3+4+5")
+#   - a list after add/sum/total or multiply/product ("add 3, 4, 5 and 6")
+_EXPR_SPAN_RE = re.compile(r"(?:[-+(\d]|\.(?=\d))(?:[-+*/×÷().\d\s]+|x(?=\s*[\d.(]))*")
+_SPAN_CHARS = frozenset("+-*/x×÷().0123456789 \t\n")
+_OPERATORS = "+-*/x×÷"
+_OPERAND_END = frozenset(".)0123456789")
+_OPERAND_START = frozenset(".(+-0123456789")
+_OPERAND_RE = re.compile(r"[\d.]+")
+_LIST_KEYWORDS = ("add", "sum", "total", "multiply", "product")
+_LIST_RE = re.compile(
+    r"\b(?P<kw>add|sum|total|multiply|product)(?:\s+(?:up|of))?\s+"
+    rf"(?P<nums>{NUM_RE.pattern}(?:(?:\s*,\s*(?:and\s+)?|\s+and\s+){NUM_RE.pattern}){{2,}})"
+)
+_LIST_JOIN = {"add": " + ", "sum": " + ", "total": " + ", "multiply": " * ", "product": " * "}
+
+
+def _beside(text: str, i: int, step: int) -> str:
+    """The first non-space character before (step=-1) or after (step=1) position i."""
+    i += step
+    while 0 <= i < len(text) and text[i].isspace():
+        i += step
+    return text[i] if 0 <= i < len(text) else ""
+
+
+def _operator_sites(text: str) -> List[int]:
+    """Positions of operators written between two operands, in order (str.find, no regex scan)."""
+    sites = []
+    for c in _OPERATORS:
+        i = text.find(c)
+        while i >= 0:
+            after = text[i + 1:i + 2]
+            if after.isspace():
+                after = _beside(text, i, 1)
+            if after in _OPERAND_START and _beside(text, i, -1) in _OPERAND_END:
+                sites.append(i)
+            i = text.find(c, i + 1)
+    sites.sort()
+    return sites
+
+
+def _parse_expression_from_prompt(prompt: str) -> Optional[str]:
+    """
+    Return the normalized multi-operand expression in the prompt, or None.
+    Two-number arithmetic is left to _parse_math_from_prompt.
+
+    Only the text around operators that sit between operands is matched against
+    _EXPR_SPAN_RE, and _LIST_RE only where a list keyword occurs, so prose without
+    arithmetic costs a few str.find() passes.
+    """
+    text = prompt.lower()
+    if not any(d in text for d in "0123456789"):
+        return None
+    pos = 0
+    for i in _operator_sites(text):
+        if i < pos:
+            continue  # inside a span already tried
+        start = i
+        while start > pos and text[start - 1] in _SPAN_CHARS:
+            start -= 1
+        m = next((m for m in _EXPR_SPAN_RE.finditer(text, start) if m.end() > i), None)
+        if m is None:
+            continue
+        pos = m.end()
+        span = m.group().rstrip(". \t\n")
+        numbers = len(_OPERAND_RE.findall(span))
+        if numbers < 3 and not (numbers == 2 and "(" in span):
+            continue
+        try:
+            expression.compile(span)  # well-formed; also warms the tool's cache
+        except expression.ExpressionError:
+            continue
+        return expression.normalize(span)
+    best = None
+    for kw in _LIST_KEYWORDS:
+        i = text.find(kw)
+        while i >= 0 and (best is None or i < best.start()):
+            m = _LIST_RE.match(text, i)
+            if m:
+                best = m
+                break
+            i = text.find(kw, i + 1)
+    if best:
+        return _LIST_JOIN[best.group("kw")].join(NUM_RE.findall(best.group("nums")))
+    return None
+
+
 # -----------------------------
 # Main step executor
 # -----------------------------
-def run_step(step: Dict[str, Any], plan: List[Dict[str, Any]], user_prompt: str, tools) -> None:
+def _math_result(step: Step, inputs: Dict[str, Any], out: Any) -> Dict[str, Any]:
+    op = inputs["op"]
+    if op == "expr":
+        prefix = f"Computed {inputs['expr']} = "
+    else:
+        a, b = inputs["a"], inputs["b"]
+        prefix = f"Computed {a} + {b} = " if op == "add" else f"Computed math({op}) -> "
+    summary, step.evidence = quote(step.id, "math", out, prefix, f". Summary: The result is {out}.")
+    return {"tool_output": out, "summary": summary}
+
+
+def _echo_result(step: Step, out: Any) -> Dict[str, Any]:
+    # The output is referenced by the evidence, not copied (beyond the summary itself)
+    summary, step.evidence = quote(step.id, "echo", out, "Echoed text. Summary: ")
+    return {"tool_output": out, "summary": summary}
+
+
+def _find_step(plan: Union[List[Step], Mapping[str, Step]], sid: str) -> Optional[Step]:
+    if isinstance(plan, Mapping):
+        return plan.get(sid)
+    return next((s for s in plan if s.id == sid), None)
+
+
+def _chosen_tool(step: Step, plan: Union[List[Step], Mapping[str, Step]]) -> Optional[tuple]:
+    # plan-3: plan-2's (tool, inputs), with the step marked RUNNING; FAILED and None without one
+    plan2 = _find_step(plan, "plan-2")
+    if not plan2 or not plan2.tool or not plan2.inputs:
+        step.state = StepState.FAILED
+        step.result = {"error": "No tool/inputs chosen in plan-2"}
+        step.done = False
+        return None
+    step.state = StepState.RUNNING
+    return plan2.tool, plan2.inputs
+
+
+def _tool_fn(tools, tool: str) -> Callable[..., Any]:
+    if tool not in ("math", "echo"):
+        raise ValueError(f"Unknown tool: {tool}")
+    return getattr(tools, tool)
+
+
+def _tool_done(step: Step, tool: str, inputs: Dict[str, Any], out: Any) -> None:
+    step.result = _math_result(step, inputs, out) if tool == "math" else _echo_result(step, out)
+    step.attempts += 1
+    step.state = StepState.DONE
+    step.done = True
+
+
+def _tool_failed(step: Step, error: Exception) -> None:
+    step.state = StepState.FAILED
+    step.result = {"error": str(error)}
+    step.done = False
+
+
+def run_step(step: Step, plan: Union[List[Step], Mapping[str, Step]], user_prompt: str, tools,
+             reasoner: Optional[Callable[[Any], Any]] = None) -> None:
     """
     Execute a single plan step in-place.
 
     Args:
-        step: current step dict (mutated)
-        plan: full plan list (used by plan-3 to read plan-2 outputs)
+        step: current step (mutated)
+        plan: full plan list, or a {step id: step} index (used by plan-3 to read plan-2 outputs)
         user_prompt: the original user instruction
         tools: registry exposing .math(**kw) and .echo(**kw)
+        reasoner: replaces reason() for plan-1 (e.g. to hand in an already-awaited result)
     """
 
     # ---- Max attempts guard (placed at the very top) ----
-    if step["attempts"] >= step.get("max_attempts", 2):
-        step["state"] = StepState.FAILED
-        step["result"] = (step.get("result") or {}) | {"error": "max_attempts reached"}
-        step["done"] = False
+    if step.attempts >= step.max_attempts:
+        step.state = StepState.FAILED
+        step.result = (step.result or {}) | {"error": "max_attempts reached"}
+        step.done = False
         return
 
-    sid = step.get("id")
+    sid = step.id
 
     # ---------- PLAN-1: set criteria and mark done ----------
     if sid == "plan-1":
-        step["state"] = StepState.RUNNING
+        step.state = StepState.RUNNING
         # Optional: consult the reasoner (never block on failure)
         try:
-            step["reason"] = reason(step)
+            step.reason = (reasoner or reason)(step)
         except Exception:
-            step["reason"] = {"thought": "reasoning-skip", "answer": "n/a"}
+            step.reason = {"thought": "reasoning-skip", "answer": "n/a"}
 
-        step["criteria"] = {
+        step.criteria = {
             "must_summarize": True,
             "must_reference_result": True,
             "result_type": "numeric",
         }
-        step["result"] = {"noted_goal": user_prompt.strip()}
-        step["attempts"] += 1
-        step["state"] = StepState.DONE
-        step["done"] = True
+        step.result = {"noted_goal": user_prompt.strip()}
+        step.attempts += 1
+        step.state = StepState.DONE
+        step.done = True
         return
 
     # ---------- PLAN-2: choose tool + inputs ----------
     if sid == "plan-2":
-        step["state"] = StepState.RUNNING
-        choice = _parse_math_from_prompt(user_prompt)
-        if choice:
+        step.state = StepState.RUNNING
+        expr = _parse_expression_from_prompt(user_prompt)
+        choice = None if expr else _parse_math_from_prompt(user_prompt)
+        if expr:
+            step.tool = "math"
+            step.inputs = {"op": "expr", "expr": expr}
+            step.result = {"proposal": f"Use math(expr={expr!r})"}
+        elif choice:
             op, a, b = choice
-            step["tool"] = "math"
-            step["inputs"] = {"op": op, "a": a, "b": b}
-            step["result"] = {"proposal": f"Use math(op={op}, a={a}, b={b})"}
+            step.tool = "math"
+            step.inputs = {"op": op, "a": a, "b": b}
+            step.result = {"proposal": f"Use math(op={op}, a={a}, b={b})"}
         else:
-            step["tool"] = "echo"
-            step["inputs"] = {"text": user_prompt}
-            step["result"] = {"proposal": "Use echo(text=<prompt>)"}
-        step["attempts"] += 1
-        step["state"] = StepState.DONE
-        step["done"] = True
+            step.tool = "echo"
+            step.inputs = {"text": user_prompt}
+            step.result = {"proposal": "Use echo(text=<prompt>)"}
+        step.attempts += 1
+        step.state = StepState.DONE
+        step.done = True
         return
 
     # ---------- PLAN-3: execute chosen tool + summarize ----------
     if sid == "plan-3":
-        plan2 = next((s for s in plan if s.get("id") == "plan-2"), None)
-        if not plan2 or not plan2.get("tool") or not plan2.get("inputs"):
-            step["state"] = StepState.FAILED
-            step["result"] = {"error": "No tool/inputs chosen in plan-2"}
-            step["done"] = False
+        chosen = _chosen_tool(step, plan)
+        if chosen is None:
             return
+        tool, inputs = chosen
+        try:
+            with tracing.span("tool", tool=tool):
+                out = retry.call(tool, _tool_fn(tools, tool), **inputs)  # math: op, a, b (or op="expr", expr)
+        except Exception as e:
+            _tool_failed(step, e)
+        else:
+            _tool_done(step, tool, inputs, out)
+        return
 
-        tool = plan2["tool"]
-        inputs = plan2["inputs"]
+    # ---------- Unknown step id: mark failed (defensive) ----------
+    step.state = StepState.FAILED
+    step.result = {"error": f"Unknown step id: {sid}"}
+    step.done = False
 
-        step["state"] = StepState.RUNNING
-        try:
-            if tool == "math":
-                out = tools.math(**inputs)  # expects: op, a, b
-                op, a, b = inputs["op"], inputs["a"], inputs["b"]
-                if op == "add":
-                    summary = f"Computed {a} + {b} = {out}. Summary: The result is {out}."
-                else:
-                    summary = f"Computed math({op}) -> {out}. Summary: The result is {out}."
-                step["result"] = {"tool_output": out, "summary": summary}
-
-            elif tool == "echo":
-                out = tools.echo(**inputs)
-                summary = f"Echoed text. Summary: {out}"
-                step["result"] = {"tool_output": out, "summary": summary}
-
-            else:
-                raise ValueError(f"Unknown tool: {tool}")
-
-            step["attempts"] += 1
-            step["state"] = StepState.DONE
-            step["done"] = True
 
+async def _acall_tool(fn: Callable[..., Any], inputs: Dict[str, Any], offload: bool) -> Any:
+    if not offload:
+        return fn(**inputs)
+    # A tool on the process pool blocks until its worker replies: wait in a thread
+    import asyncio
+    import contextvars
+    import functools
+    call = functools.partial(contextvars.copy_context().run, fn, **inputs)
+    return await asyncio.get_running_loop().run_in_executor(None, call)
+
+
+async def arun_step(step: Step, plan: Union[List[Step], Mapping[str, Step]], user_prompt: str, tools) -> None:
+    """
+    Async run_step(): awaits the plan-1 LLM call instead of blocking on it, and
+    retries plan-3's tool with retry.acall, so backoff never sleeps on the event loop.
+    A tool the registry reports as isolated (tools.isolated(name)) runs in the loop's
+    default executor while it waits for its worker process.
+    """
+    if step.id == "plan-3" and step.attempts < step.max_attempts:
+        chosen = _chosen_tool(step, plan)
+        if chosen is None:
+            return
+        tool, inputs = chosen
+        try:
+            fn = _tool_fn(tools, tool)
+            offload = getattr(tools, "isolated", lambda _t: False)(tool)
+            with tracing.span("tool", tool=tool):
+                out = await retry.acall(tool, lambda: _acall_tool(fn, inputs, offload))
         except Exception as e:
-            step["state"] = StepState.FAILED
-            step["result"] = {"error": str(e)}
-            step["done"] = False
+            _tool_failed(step, e)
+        else:
+            _tool_done(step, tool, inputs, out)
+        return
+    if step.id != "plan-1" or step.attempts >= step.max_attempts:
+        run_step(step, plan, user_prompt, tools)
         return
+    try:
+        thought = await areason(step)
+    except Exception:
+        thought = {"thought": "reasoning-skip", "answer": "n/a"}
+    run_step(step, plan, user_prompt, tools, reasoner=lambda _s: thought)
 
-    # ---------- Unknown step id: mark failed (defensive) ----------
-    step["state"] = StepState.FAILED
-    step["result"] = {"error": f"Unknown step id: {sid}"}
-    step["done"] = False
\ No newline at end of file
+
+# -----------------------------
+# Batched plan-3 for math
+# -----------------------------
+def batch_math_inputs(step: Step, plan: Union[List[Step], Mapping[str, Step]]) -> Optional[Dict[str, Any]]:
+    """
+    Return plan-2's math inputs if `step` is a plan-3 step that run_math_batch can
+    execute (i.e. run_step would call tools.math with a binary op), else None.
+    """
+    if step.id != "plan-3" or step.attempts >= step.max_attempts:
+        return None
+    plan2 = _find_step(plan, "plan-2")
+    if plan2 and plan2.tool == "math" and plan2.inputs and plan2.inputs.get("op") != "expr":
+        return plan2.inputs
+    return None
+
+
+def run_math_batch(jobs: List[Any], tools) -> None:
+    """
+    Execute many plan-3 math steps with one tools.math_batch call.
+
+    Args:
+        jobs: (step, inputs) pairs, inputs as returned by batch_math_inputs
+        tools: registry exposing .math_batch(ops=..., a=..., b=...)
+    Each step ends up exactly as run_step would leave it, including FAILED with
+    the tool's error for divide-by-zero elements.
+    """
+    if not jobs:
+        return
+    with tracing.span("tool", tool="math.batch", size=len(jobs)):
+        outs = tools.math_batch(
+            ops=[inputs["op"] for _, inputs in jobs],
+            a=[inputs["a"] for _, inputs in jobs],
+            b=[inputs["b"] for _, inputs in jobs],
+        )
+    for (step, inputs), out in zip(jobs, outs):
+        if isinstance(out, Exception):
+            step.state = StepState.FAILED
+            step.result = {"error": str(out)}
+            step.done = False
+            continue
+        step.result = _math_result(step, inputs, out)
+        step.attempts += 1
+        step.state = StepState.DONE
+        step.done = True
@@ -1,63 +1,150 @@
 # agents/planner.py
-from typing import List, Dict, Any
-from core.state import new_step  # dict factory with a 'state' field
-import json, os
-from pydantic import BaseModel
-from core.state import PlanStep
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+from core.state import Step, new_step  # slotted step factory with a 'state' field
+import json
+from core import config, llm
+from core import memory as run_memory
+from core.budget import BudgetExceeded
 
-USE_OPENAI = bool(os.getenv("OPENAI_API_KEY"))
+if TYPE_CHECKING:  # pydantic is imported on first use, not with this module
+    from core.models import PlanStep
 
-class PlanRequest(BaseModel):
-    goal: str
-    constraints: Dict[str, Any]
+# None: follow the config snapshot (see agents.executor.USE_OPENAI)
+USE_OPENAI: Optional[bool] = None
 
-def _fallback_plan(goal: str, constraints: Dict[str, Any]) -> List[PlanStep]:
+
+def llm_enabled() -> bool:
+    return config.settings().llm_enabled if USE_OPENAI is None else USE_OPENAI
+
+def __getattr__(name: str) -> Any:
+    # pydantic models are only needed by make_plan(); import them on first use
+    if name in ("PlanStep", "PlanRequest"):
+        from core import models
+        return getattr(models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _fallback_plan(goal: str, constraints: Dict[str, Any]) -> List["PlanStep"]:
+    from core.models import PlanStep
     # Simple, deterministic 3-step plan for offline use
     steps = [
-        PlanStep(id="plan-1", description="Clarify the goal and define success criteria", acceptance="Has concrete criteria"),
-        PlanStep(id="plan-2", description="Choose one tool to progress (echo or math) and propose inputs", acceptance="Inputs present"),
-        PlanStep(id="plan-3", description="Execute chosen tool and summarize result", acceptance="Summary references result"),
+        PlanStep(id="plan-1", description="Clarify the goal and define success criteria", acceptance="Has concrete criteria", depends_on=[]),
+        PlanStep(id="plan-2", description="Choose one tool to progress (echo or math) and propose inputs", acceptance="Inputs present", depends_on=[]),
+        PlanStep(id="plan-3", description="Execute chosen tool and summarize result", acceptance="Summary references result", depends_on=["plan-2"]),
     ]
     return steps
 
-def make_plan(goal: str, constraints: Dict[str, Any], mem_ctx: Any = None) -> List[PlanStep]:
-    if not USE_OPENAI:
-        return _fallback_plan(goal, constraints)
+def _memory_lines(mem_ctx: Any) -> List[str]:
+    lines = []
+    for item in mem_ctx or ():
+        if isinstance(item, run_memory.Recall):
+            outcome = {True: "complete", False: "incomplete"}.get(item.complete, "unknown")
+            lines.append(f"- {item.prompt!r} (similarity {item.score:.2f}): tool={item.tool} "
+                         f"inputs={json.dumps(item.inputs)} outcome={outcome}")
+        else:
+            lines.append(f"- {item}")
+    return lines
 
-    from openai import OpenAI
-    client = OpenAI()
+def _plan_messages(goal: str, constraints: Dict[str, Any], mem_ctx: Any = None) -> List[Dict[str, str]]:
     sys = (
         "You are a Planner. Produce a small plan (3–6 steps). "
-        "Each step: id, description, optional tool (echo.say or math.add), inputs, acceptance."
+        "Each step: id, description, optional tool (echo.say or math.add), inputs, acceptance, "
+        "depends_on (ids of the steps it needs; [] if none)."
         "Output JSON list of steps."
     )
     user = f"Goal: {goal}\nConstraints: {json.dumps(constraints)}"
-    resp = client.chat.completions.create(
-        model=os.getenv("MODEL_PLANNER","gpt-4o-mini"),
-        messages=[{"role":"system","content":sys},{"role":"user","content":user}],
-        temperature=0.2
-    )
+    lines = _memory_lines(mem_ctx)
+    if lines:
+        user += "\nSimilar past runs:\n" + "\n".join(lines)
+    return [{"role":"system","content":sys},{"role":"user","content":user}]
+
+def _recall(goal: str, mem_ctx: Any) -> Any:
+    # mem_ctx=None: the top-k similar runs from the process's run memory (RUN_MEMORY), if any
+    if mem_ctx is not None:
+        return mem_ctx
+    memory = run_memory.get_default()
+    return memory.similar(goal) if memory is not None else []
+
+def _reused_plan(goal: str, mem_ctx: Any) -> Optional[List["PlanStep"]]:
+    # A remembered LLM plan for the same goal stands in for a planning call. Similarity
+    # folds numbers together, so the prompts must also match word for word, numbers
+    # included: a plan for "add 5 and 7" carries those inputs and is no plan for "add 50 and 70"
+    from core.models import PlanStep
+    threshold = config.settings().memory.reuse_similarity
+    key = run_memory.normalize(goal)
+    for item in mem_ctx or ():
+        if isinstance(item, run_memory.Recall) and item.plan and item.score >= threshold \
+                and item.complete is not False and run_memory.normalize(item.prompt) == key:
+            return [PlanStep(**s) for s in item.plan]
+    return None
+
+def _remember_plan(goal: str, data: List[Dict[str, Any]]) -> None:
+    memory = run_memory.get_default()
+    if memory is not None:
+        memory.record(goal, plan=data)
+
+def make_plan(goal: str, constraints: Dict[str, Any], mem_ctx: Any = None) -> List["PlanStep"]:
+    """
+    Plan with the LLM, given the similar past runs in `mem_ctx` (looked up in the run
+    memory when None). A remembered plan for the same goal (the same words and numbers,
+    and at least memory.reuse_similarity alike) is returned as is, without an LLM call. Offline or out of budget: the fallback plan.
+    """
+    if not llm_enabled():
+        return _fallback_plan(goal, constraints)
+    from core.models import PlanStep
+    mem_ctx = _recall(goal, mem_ctx)
+    reused = _reused_plan(goal, mem_ctx)
+    if reused is not None:
+        return reused
+
+    try:
+        resp = llm.complete(config.settings().models.planner, _plan_messages(goal, constraints, mem_ctx), temperature=0.2)
+    except BudgetExceeded:
+        return _fallback_plan(goal, constraints)
     txt = resp.choices[0].message.content
     data = json.loads(txt)
-    return [PlanStep(**s) for s in data]
+    plan = [PlanStep(**s) for s in data]
+    _remember_plan(goal, data)
+    return plan
 
+async def amake_plan(goal: str, constraints: Dict[str, Any], mem_ctx: Any = None) -> List["PlanStep"]:
+    if not llm_enabled():
+        return _fallback_plan(goal, constraints)
+    from core.models import PlanStep
+    mem_ctx = _recall(goal, mem_ctx)
+    reused = _reused_plan(goal, mem_ctx)
+    if reused is not None:
+        return reused
+
+    try:
+        resp = await llm.acomplete(config.settings().models.planner, _plan_messages(goal, constraints, mem_ctx), temperature=0.2)
+    except BudgetExceeded:
+        return _fallback_plan(goal, constraints)
+    data = json.loads(resp.choices[0].message.content)
+    plan = [PlanStep(**s) for s in data]
+    _remember_plan(goal, data)
+    return plan
 
 
-def create_initial_plan(user_prompt: str) -> List[Dict[str, Any]]:
+def create_initial_plan(user_prompt: str) -> List[Step]:
+    # plan-1 (criteria, optional LLM call) and plan-2 (tool choice) are independent;
+    # plan-3 executes the tool plan-2 picked
     return [
         new_step(
             id="plan-1",
             description="Clarify the goal and define success criteria",
             acceptance="Has concrete criteria",
+            depends_on=[],
         ),
         new_step(
             id="plan-2",
             description="Choose one tool to progress (echo or math) and propose inputs",
             acceptance="Inputs present",
+            depends_on=[],
         ),
         new_step(
             id="plan-3",
             description="Execute chosen tool and summarize result",
             acceptance="Summary references result",
+            depends_on=["plan-2"],
         ),
     ]
\ No newline at end of file
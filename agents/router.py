@@ -1,15 +1,179 @@
 # agents/router.py
-from typing import Dict, Any
+"""
+Step routing: which component handles a step (route) and which tool suits it (pick_tool).
+
+pick_tool() matches a step's description against every registered tool's triggers:
+the registry name itself plus the words/phrases under the config's `routing:` section.
+All triggers are compiled into one word-level Aho-Corasick automaton, so a single pass
+over the description's words finds every trigger (phrases and overlapping ones
+included) whatever the number of tools. Triggers match whole words ("sum" does not
+fire on "summarize"); punctuation separates words. The index is built on first use and rebuilt only when the
+registry (set_tools) or the config snapshot changes.
+
+pick_tool() is a standalone API for callers that choose among registered tools (and
+for benchmarks/bench_router.py); the run pipeline does not call it. route() returns
+"executor" for every step, and plan-2 picks math or echo from the prompt with the
+executor's own parsers, since the executor only drives those two adapters. Only
+pick_tool() callers get the index's speed-up; runs neither pay for it nor gain from it.
+"""
+import string
+from collections import deque
+from dataclasses import dataclass
+from itertools import compress
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from core import config
+
+# ASCII punctuation separates words ("math.add" is the phrase "math add"); a byte-level
+# translate + split tokenizes several times faster than a \w+ regex
+_PUNCTUATION = string.punctuation.replace("_", "").encode("ascii")
+_SEPARATORS = bytes.maketrans(_PUNCTUATION, b" " * len(_PUNCTUATION))
+
+
+def tokenize(text: str) -> List[str]:
+    return text.lower().encode("utf-8", "surrogatepass").translate(_SEPARATORS).decode("utf-8", "surrogatepass").split()
+
+
+@dataclass(slots=True, frozen=True)
+class Candidate:
+    tool: str
+    score: int                 # matched words, summed over the distinct triggers found
+    first: int                 # word position of the earliest match
+    triggers: Tuple[str, ...]  # the triggers found, in order of appearance
+
+
+class TriggerIndex:
+    """Aho-Corasick automaton whose alphabet is words; each pattern (phrase) maps to its tools."""
+
+    __slots__ = ("tools", "_rank", "_goto", "_fail", "_out", "_phrases", "_vocab")
+
+    def __init__(self, triggers: Mapping[str, Iterable[str]]):
+        self.tools = tuple(triggers)
+        self._rank = {tool: i for i, tool in enumerate(self.tools)}  # registry order breaks ties
+        owners: Dict[Tuple[str, ...], List[str]] = {}
+        for tool, phrases in triggers.items():
+            for phrase in phrases:
+                words = tuple(tokenize(phrase))
+                if words and tool not in owners.setdefault(words, []):
+                    owners[words].append(tool)
+        self._phrases = [(" ".join(words), len(words), tuple(tools)) for words, tools in owners.items()]
+
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for pid, words in enumerate(owners):
+            state = 0
+            for word in words:
+                nxt = goto[state].get(word)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][word] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(pid)
+
+        # Failure links, breadth first; each state also reports its suffixes' patterns
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and word not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(word, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+        self._vocab = frozenset(w for words in owners for w in words)
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def __contains__(self, tool: Any) -> bool:
+        return tool in self._rank
+
+    def _hits(self, text: str) -> List[Tuple[int, int]]:
+        # (start word position, pattern id) for every occurrence, in order of appearance
+        goto, fail, out, vocab, phrases = self._goto, self._fail, self._out, self._vocab, self._phrases
+        hits: List[Tuple[int, int]] = []
+        words = tokenize(text)
+        if vocab.isdisjoint(words):
+            return hits
+        # Only words that occur in some trigger can move the automaton; any other word
+        # sends it back to the root, so skip them (at C speed) and reset on the gaps
+        state = 0
+        last = -2
+        for pos in compress(range(len(words)), map(vocab.__contains__, words)):
+            if pos != last + 1:
+                state = 0
+            last = pos
+            word = words[pos]
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for pid in out[state]:
+                hits.append((pos - phrases[pid][1] + 1, pid))
+        hits.sort()
+        return hits
+
+    def scan(self, text: str) -> List[Tuple[int, str]]:
+        """Every trigger occurrence in `text` as (word position, phrase), in order of appearance."""
+        return [(pos, self._phrases[pid][0]) for pos, pid in self._hits(text)]
+
+    def match(self, text: str) -> List[Candidate]:
+        """Tools whose triggers occur in `text`, best first (most words matched, then earliest)."""
+        found: Dict[str, List[Any]] = {}  # tool -> [score, first, triggers]
+        for pos, pid in self._hits(text):
+            phrase, n, tools = self._phrases[pid]
+            for tool in tools:
+                acc = found.get(tool)
+                if acc is None:
+                    found[tool] = [n, pos, [phrase]]
+                elif phrase not in acc[2]:
+                    acc[0] += n
+                    acc[2].append(phrase)
+        ranked = sorted(found.items(), key=lambda kv: (-kv[1][0], kv[1][1], self._rank[kv[0]]))
+        return [Candidate(tool, score, first, tuple(trig)) for tool, (score, first, trig) in ranked]
+
+
+def build_index(names: Iterable[str], routing: Mapping[str, Iterable[str]]) -> TriggerIndex:
+    """Index `names` (registry tools) with their name and `routing` triggers; other routing entries are ignored."""
+    return TriggerIndex({name: (name, *routing.get(name, ())) for name in names})
+
+
+_tool_names: Tuple[str, ...] = tuple(config.DEFAULT_TOOLS)
+_cached: Optional[Tuple[int, TriggerIndex]] = None  # (settings version, index)
+
+
+def set_tools(names: Iterable[str]) -> None:
+    """Route over these registry names from now on (the orchestrator calls this on registry changes)."""
+    global _tool_names, _cached
+    _tool_names = tuple(names)
+    _cached = None
+
+
+def index() -> TriggerIndex:
+    """The index for the current registry and config snapshot."""
+    global _cached
+    settings = config.settings()
+    cached = _cached
+    if cached is None or cached[0] != settings.version:
+        cached = _cached = (settings.version, build_index(_tool_names, settings.routing))
+    return cached[1]
+
 
 def pick_tool(step, constraints: Dict[str, Any]) -> Dict[str, Any]:
-    desc = (step.description or "").lower()
-    # Very simple routing logic for demo
-    if "sum" in desc or "add" in desc or step.tool == "math.add":
-        return {"tool": "math.add", "reason": "Math keywords or pre-selected."}
-    if "echo" in desc or step.tool == "echo.say":
-        return {"tool": "echo.say", "reason": "Echo requested or safe default."}
+    idx = index()
+    if step.tool in idx:
+        return {"tool": step.tool, "reason": "Pre-selected.", "candidates": [step.tool]}
+    ranked = idx.match(step.description or "")
+    if ranked:
+        best = ranked[0]
+        return {"tool": best.tool, "reason": f"Matched {', '.join(best.triggers)}.",
+                "candidates": [c.tool for c in ranked]}
     # Default: no tool (pure reasoning)
-    return {"tool": "NO_TOOL", "reason": "No clear tool needed."}
+    return {"tool": "NO_TOOL", "reason": "No clear tool needed.", "candidates": []}
 
 
 def route(step: Dict[str, Any]) -> str:
@@ -17,4 +181,4 @@ def route(step: Dict[str, Any]) -> str:
     Decide which component should handle the step.
     For now, always return 'executor' so core/orchestrator can proceed.
     """
-    return "executor"
\ No newline at end of file
+    return "executor"
@@ -1,16 +1,87 @@
 #!/usr/bin/env python3
 # app.py
+import argparse
+import os
 import sys
 import json
-from core.orchestrator import run  # orchestrates planner → executor → critic
+# core.orchestrator (planner → executor → critic) is imported only by the modes that
+# run prompts locally; --connect clients never load it
+
+
+def _read_prompts(fh):
+    """Yield prompts from a JSONL stream: {"prompt": "..."} objects or bare JSON strings."""
+    for line in fh:
+        line = line.strip()
+        if not line:
+            continue
+        item = json.loads(line)
+        yield item["prompt"] if isinstance(item, dict) else str(item)
+
+
+def _batch(args) -> None:
+    from core.orchestrator import run_batch, BatchStats
+    fh = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+    stats = BatchStats()
+    try:
+        for result in run_batch(
+            _read_prompts(fh),
+            workers=args.workers,
+            processes=args.processes,
+            chunk_size=args.chunk_size,
+            stats=stats,
+        ):
+            sys.stdout.write(json.dumps(result) + "\n")
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+    print(
+        f"batch: prompts={stats.prompts} chunks={stats.chunks} "
+        f"elapsed={stats.elapsed_s:.3f}s throughput={stats.throughput:.1f}/s "
+        f"tokens={stats.prompt_tokens + stats.completion_tokens} cost=${stats.cost_usd:.4f}",
+        file=sys.stderr,
+    )
+
 
 def main():
-    user_prompt = " ".join(sys.argv[1:]).strip()
+    parser = argparse.ArgumentParser(description="Planner → executor → critic agent")
+    parser.add_argument("prompt", nargs="*", help="instruction, e.g. Please add 5 and 7")
+    parser.add_argument("--batch", metavar="FILE", help="JSONL file of prompts ('-' for stdin); writes JSONL results")
+    parser.add_argument("--workers", type=int, default=4, help="pool size for --batch")
+    parser.add_argument("--processes", action="store_true", help="use a process pool for --batch")
+    parser.add_argument("--chunk-size", type=int, default=32, help="prompts per pool task for --batch")
+    parser.add_argument("--stream", action="store_true", help="print NDJSON events as steps run (always in-process)")
+    parser.add_argument("--serve", metavar="ADDR", help="run a long-lived server on host:port or unix:/path (uses --workers/--processes)")
+    parser.add_argument("--connect", metavar="ADDR", default=os.getenv("AGENT_SERVER"),
+                        help="send the prompt to a running --serve server (default: $AGENT_SERVER)")
+    args = parser.parse_args()
+
+    if args.serve:
+        from core.server import serve
+        serve(args.serve, workers=args.workers, processes=args.processes)
+        return
+    if args.batch:
+        _batch(args)
+        return
+
+    user_prompt = " ".join(args.prompt).strip()
     if not user_prompt:
         print('Usage: python app.py "Please add 5 and 7"')
         raise SystemExit(2)
 
-    result = run(user_prompt)
+    if args.stream:
+        from core.orchestrator import run_stream
+        for event in run_stream(user_prompt):
+            sys.stdout.write(json.dumps(event) + "\n")
+            sys.stdout.flush()
+        return
+
+    if args.connect:
+        from core.client import Client
+        with Client(args.connect) as client:
+            result = client.run(user_prompt)
+    else:
+        from core.orchestrator import run
+        result = run(user_prompt)
 
     # result has: {"plan": [...], "outcome": {...}, "trace": "..."}
     print("Plan:", json.dumps(result["plan"], indent=2))
@@ -18,4 +89,4 @@ def main():
     print("Trace summary:", result["trace"])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
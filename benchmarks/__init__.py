@@ -0,0 +1,8 @@
+# benchmarks/__init__.py
+import argparse
+
+
+def arg_parser(doc: str) -> argparse.ArgumentParser:
+    """Command-line parser for a benchmark, described by the first paragraph of its docstring."""
+    summary = " ".join(doc.strip().split("\n\n")[0].split())
+    return argparse.ArgumentParser(description=summary)
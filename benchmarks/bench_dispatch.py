@@ -0,0 +1,46 @@
+# benchmarks/bench_dispatch.py
+"""
+Per-call tool dispatch overhead: uncached registry resolution vs the resolved-callable cache.
+
+    python -m benchmarks.bench_dispatch [--number N]
+"""
+import timeit
+
+from benchmarks import arg_parser
+from core import orchestrator
+from core.orchestrator import ToolRegistry, _resolve, get_tool
+
+
+def _uncached_math(op, a, b):
+    # What ToolRegistry.math cost before the cache: resolve on every call
+    if op == "add":
+        return _resolve("math.add")(a=a, b=b)
+    from tools import math_tool
+    if hasattr(math_tool, "math"):
+        return math_tool.math(op=op, a=a, b=b)
+
+
+CASES = {
+    "echo   uncached": lambda: _resolve("echo.say")(text="hi"),
+    "echo   cached":   lambda: get_tool("echo.say")(text="hi"),
+    "echo   registry": lambda: ToolRegistry.echo(text="hi"),
+    "add    uncached": lambda: _uncached_math("add", 5.0, 7.0),
+    "add    registry": lambda: ToolRegistry.math(op="add", a=5.0, b=7.0),
+    "mul    uncached": lambda: _uncached_math("mul", 5.0, 7.0),
+    "mul    registry": lambda: ToolRegistry.math(op="mul", a=5.0, b=7.0),
+}
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    orchestrator.warm()
+    for label, fn in CASES.items():
+        t = min(timeit.repeat(fn, number=args.number, repeat=3))
+        print(f"{label}  {t / args.number * 1e9:>8.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_evidence.py
+"""
+Critic cost with MB-scale echo outputs: evaluate() against the evidence store vs the
+old `str(tool_out) in summary` check, on plain and on self-similar (periodic) text.
+
+    python -m benchmarks.bench_evidence [--sizes 1,4,16] [--number N]
+"""
+import timeit
+
+import agents.planner as planner
+from agents.critic import evaluate
+from agents.executor import run_step
+from benchmarks import arg_parser
+from core.orchestrator import ToolRegistry
+from core.state import StepState
+
+
+def _legacy_evaluate(plan):
+    # agents.critic.evaluate before the evidence store
+    all_pass = True
+    for s in plan:
+        acc = s.acceptance
+        if acc == "Has concrete criteria":
+            all_pass &= bool(s.criteria)
+        elif acc == "Inputs present":
+            all_pass &= bool(s.inputs)
+        elif acc == "Summary references result":
+            res = s.result or {}
+            summary = res.get("summary", "")
+            tool_out = res.get("tool_output")
+            all_pass &= bool(summary) and (tool_out is not None) and (str(tool_out) in summary)
+        all_pass &= (s.state == StepState.DONE)
+        all_pass &= (s.done is True)
+    return {"complete": all_pass, "score": 1.0 if all_pass else 0.0}
+
+
+def _echo_plan(text):
+    prompt = "Please just repeat this: " + text
+    plan = planner.create_initial_plan(prompt)
+    for step in plan:
+        run_step(step, plan, prompt, tools=ToolRegistry)
+    assert plan[1].tool == "echo"
+    return plan
+
+
+def _texts(mb):
+    n = mb * 1024 * 1024
+    words = "the quick brown fox jumps over the lazy dog while the build ships "
+    yield "plain", (words * (n // len(words) + 1))[:n]
+    # Many near-matches: the needle's prefix recurs throughout the summary
+    yield "periodic", ("ab" * (n // 2))[:n - 1] + "c"
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--sizes", default="1,4,16", help="echo output sizes in MiB")
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'output':<16} {'substring check':>16} {'evidence':>12}")
+    for mb in (int(s) for s in args.sizes.split(",")):
+        for kind, text in _texts(mb):
+            plan = _echo_plan(text)
+            assert evaluate(plan) == _legacy_evaluate(plan) == {"complete": True, "score": 1.0}
+            old = min(timeit.repeat(lambda: _legacy_evaluate(plan), number=args.number, repeat=3)) / args.number
+            new = min(timeit.repeat(lambda: evaluate(plan), number=args.number, repeat=3)) / args.number
+            print(f"{kind + f' {mb} MiB':<16} {old * 1e3:>13.3f} ms {new * 1e3:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_expression.py
+"""
+Long arithmetic expressions: chaining binary math() calls (one tool call per operator)
+vs the math.expr tool's compiled expressions, cold (parse + fold) and cached.
+
+    python -m benchmarks.bench_expression [--terms 10,100,1000,10000] [--number N]
+
+Also reports the cost of finding the expression in a prompt (plan-2).
+"""
+import random
+import timeit
+
+from agents.executor import _parse_expression_from_prompt
+from benchmarks import arg_parser
+from core.orchestrator import ToolRegistry
+from tools import expression
+
+_OPS = [("+", "add"), ("-", "sub"), ("*", "mul"), ("/", "div")]
+
+
+def synthetic_expression(terms, seed=0):
+    """`terms` numbers joined by random operators; returns (text, [(op, number), ...])."""
+    rng = random.Random(seed)
+    first = rng.randint(1, 99)
+    rest = [(rng.choice(_OPS), rng.randint(1, 99)) for _ in range(terms - 1)]
+    text = f"{first} " + " ".join(f"{sym} {n}" for (sym, _), n in rest)
+    return text, first, [(op, float(n)) for (_, op), n in rest]
+
+
+def chained(first, rest):
+    # Left to right, one registry call per operator (ignores precedence, as a chain of runs would)
+    acc = float(first)
+    for op, n in rest:
+        acc = ToolRegistry.math(op=op, a=acc, b=n)
+    return acc
+
+
+def per_call_us(fn, number):
+    return timeit.timeit(fn, number=number) / number * 1e6
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--terms", default="10,100,1000,10000", help="comma-separated term counts")
+    parser.add_argument("--number", type=int, default=200, help="iterations for the smallest size")
+    args = parser.parse_args()
+
+    print(f"{'terms':>7} {'chained':>12} {'compile':>12} {'cached':>12} {'prompt':>12}   (µs per expression)")
+    for terms in map(int, args.terms.split(",")):
+        text, first, rest = synthetic_expression(terms)
+        prompt = f"Please work out {text}, thanks."
+        number = max(3, args.number * 10 // terms)
+
+        def cold():
+            expression.clear_cache()
+            return expression.evaluate(expression.compile(text))
+
+        def cached():
+            return expression.evaluate(expression.compile(text))
+
+        cached()
+        print(f"{terms:>7} {per_call_us(lambda: chained(first, rest), number):>12.1f} "
+              f"{per_call_us(cold, number):>12.1f} {per_call_us(cached, number):>12.1f} "
+              f"{per_call_us(lambda: _parse_expression_from_prompt(prompt), number):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_history.py
+"""
+Run history cost: run() with and without recording, record() vs a synchronous JSONL
+append, and an indexed query vs scanning the same runs as JSONL.
+
+    python -m benchmarks.bench_history [--number N] [--runs R]
+"""
+import json
+import os
+import tempfile
+import time
+import timeit
+
+from benchmarks import arg_parser
+from core import orchestrator
+from core.history import RunHistory, run_tool
+from core.orchestrator import run
+
+PROMPTS = ["Please add 5 and 7", "Divide 10 by 0", "Multiply 6 by 7", "Divide 9 by 3", "Please repeat this"]
+
+
+def _jsonl_append(path, prompt, result):
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps({"ts": time.time(), "prompt": prompt, "result": result}) + "\n")
+
+
+def _jsonl_scan(path, since):
+    out = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            rec = json.loads(line)
+            if rec["ts"] >= since and not rec["result"]["outcome"]["complete"] and run_tool(rec["result"]) == "math.div":
+                out.append(rec)
+    return out
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--number", type=int, default=5_000, help="runs timed per row")
+    parser.add_argument("--runs", type=int, default=50_000, help="runs in the store for the query rows")
+    args = parser.parse_args()
+    results = {p: run(p) for p in PROMPTS}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = RunHistory(os.path.join(tmp, "history"))
+        jsonl = os.path.join(tmp, "runs.jsonl")
+
+        t = min(timeit.repeat(lambda: run(PROMPTS[0]), number=args.number, repeat=3))
+        print(f"run()  no history     {t / args.number * 1e6:>9.2f} us/run")
+        orchestrator.set_history(history)
+        t = min(timeit.repeat(lambda: run(PROMPTS[0]), number=args.number, repeat=3))
+        orchestrator.set_history(None)
+        history.flush()
+        print(f"run()  with history   {t / args.number * 1e6:>9.2f} us/run")
+
+        result = results[PROMPTS[1]]
+        t = min(timeit.repeat(lambda: history.record(PROMPTS[1], result), number=args.number, repeat=3))
+        history.flush()
+        print(f"record()              {t / args.number * 1e6:>9.2f} us/run")
+        t = min(timeit.repeat(lambda: _jsonl_append(jsonl, PROMPTS[1], result), number=args.number, repeat=3))
+        print(f"JSONL append          {t / args.number * 1e6:>9.2f} us/run")
+
+        # Query: failed divide runs in the newest 10% of a store of --runs runs
+        os.unlink(jsonl)
+        history.close()
+        history = RunHistory(os.path.join(tmp, "query"))
+        cut = args.runs - args.runs // 10
+        since = 0.0
+        for i in range(args.runs):
+            if i == cut:
+                history.flush()
+                time.sleep(0.01)
+                since = time.time()
+            p = PROMPTS[i % len(PROMPTS)]
+            history.record(p, results[p])
+            _jsonl_append(jsonl, p, results[p])
+        history.flush()
+        expected = len(_jsonl_scan(jsonl, since))
+        assert len(history.query(tool="math.div", complete=False, since=since)) == expected
+        t = min(timeit.repeat(lambda: history.query(tool="math.div", complete=False, since=since), number=5, repeat=3))
+        print(f"query (indexed)       {t / 5 * 1e3:>9.2f} ms  ({expected} of {args.runs} runs)")
+        t = min(timeit.repeat(lambda: _jsonl_scan(jsonl, since), number=1, repeat=3))
+        print(f"query (JSONL scan)    {t * 1e3:>9.2f} ms")
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_memory.py
+"""
+Bytes per run with many runs alive at once (tracemalloc).
+
+    python -m benchmarks.bench_memory [--runs N]
+
+"in-flight" holds N executed plans (what a worker keeps while runs are pending);
+"result" holds N serialized run() results.
+"""
+import gc
+import tracemalloc
+
+import agents.planner as planner
+from agents.executor import run_step
+from benchmarks import arg_parser
+from core.orchestrator import ToolRegistry, run
+
+PROMPTS = ["Please add {i} and 7", "Divide {i} by 4", "Please just repeat sentence {i} back"]
+
+
+def _measure(build, n: int) -> float:
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build(n)
+    after = tracemalloc.get_traced_memory()[0]
+    del held
+    return (after - before) / n
+
+
+def _in_flight(n: int):
+    plans = []
+    for i in range(n):
+        prompt = PROMPTS[i % len(PROMPTS)].format(i=i)
+        plan = planner.create_initial_plan(prompt)
+        for step in plan:
+            run_step(step, plan, prompt, tools=ToolRegistry)
+        plans.append(plan)
+    return plans
+
+
+def _results(n: int):
+    return [run(PROMPTS[i % len(PROMPTS)].format(i=i)) for i in range(n)]
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--runs", type=int, default=10_000)
+    args = parser.parse_args()
+
+    _in_flight(10)  # warm caches/imports outside the measurement
+    tracemalloc.start()
+    print(f"in-flight  {_measure(_in_flight, args.runs):>8.0f} bytes/run")
+    print(f"result     {_measure(_results, args.runs):>8.0f} bytes/run")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
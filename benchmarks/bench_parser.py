@@ -0,0 +1,56 @@
+# benchmarks/bench_parser.py
+"""
+Microbenchmark for plan-2's prompt parsers: agents.executor._parse_expression_from_prompt
+(run first on every prompt) and _parse_math_from_prompt.
+
+    python -m benchmarks.bench_parser [--number N]
+
+Reports ns per prompt for short prompts and for multi-KB pasted prompts.
+"""
+import timeit
+
+from agents.executor import _parse_expression_from_prompt, _parse_math_from_prompt
+from benchmarks import arg_parser
+
+SHORT = [
+    "Please add 5 and 7",
+    "Divide 10 by 0",
+    "3*4",
+    "Subtract 3 from 10",
+    "Please just repeat this sentence back",
+]
+
+_FILLER = "Here is some context pasted from a ticket, with a few details like build 2024 and related notes. "
+
+
+def long_prompts(kb: int):
+    pad = _FILLER * (kb * 1024 // len(_FILLER))
+    return [
+        pad + "Please multiply 6 by 7",       # keyword near the end
+        "Subtract 3 from 10. " + pad,         # keyword near the start
+        pad + "Please just repeat this back",  # echo fallback, no match
+        pad + "What is (2+3)*4/7?",            # expression near the end
+    ]
+
+
+def ns_per_prompt(parse, prompts, number: int) -> float:
+    total = timeit.timeit(lambda: [parse(p) for p in prompts], number=number)
+    return total / (number * len(prompts)) * 1e9
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--number", type=int, default=2000, help="iterations for short prompts")
+    args = parser.parse_args()
+
+    print(f"{'':<12} {'expression':>12} {'math':>12}  (ns/prompt)")
+    rows = [("short", SHORT, args.number)]
+    rows += [(f"long {kb:>3} KB", long_prompts(kb), max(1, args.number // (kb * 10))) for kb in (1, 4, 16)]
+    for label, prompts, n in rows:
+        expr_ns = ns_per_prompt(_parse_expression_from_prompt, prompts, n)
+        math_ns = ns_per_prompt(_parse_math_from_prompt, prompts, n)
+        print(f"{label:<12} {expr_ns:>12.0f} {math_ns:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_recall.py
+"""
+Run-memory retrieval at scale: top-k query latency over N stored runs, exhaustive
+(one matrix-vector product + argpartition) vs the SimHash prefilter, and how many
+of the exhaustive top-k scores the prefilter recovers.
+
+    python -m benchmarks.bench_recall [--rows 1000000] [--distinct 100000] [--queries 200] [--path DIR]
+"""
+import random
+import string
+import time
+
+from benchmarks import arg_parser
+from core.memory import RunMemory
+
+_VERBS = ["add", "sum", "multiply", "divide", "subtract", "repeat", "summarize", "translate", "check", "list"]
+
+
+def _prompts(n, seed=0):
+    rng = random.Random(seed)
+    # Letters only: digits are folded together by the embedding
+    vocab = sorted({"".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))) for _ in range(5_000)})
+    for _ in range(n):
+        words = rng.sample(vocab, rng.randint(5, 10))
+        yield f"Please {rng.choice(_VERBS)} " + " ".join(words) + f" {rng.randint(0, 999)}"
+
+
+def _similar_query(prompt, rng):
+    # One word replaced: what a rephrased follow-up looks like
+    words = prompt.split()
+    words[rng.randrange(2, len(words) - 1)] = "changed"
+    return " ".join(words)
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=100_000, help="distinct prompts (rows repeat them)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--path", default=None, help="memory-map the store in this directory")
+    args = parser.parse_args()
+
+    pool = list(_prompts(args.distinct))
+    memory = RunMemory(args.path, capacity=args.rows)
+    t0 = time.perf_counter()
+    batch = 50_000
+    for start in range(0, args.rows, batch):
+        memory.extend((pool[i % len(pool)], {"tool": "math", "complete": True})
+                      for i in range(start, min(start + batch, args.rows)))
+    print(f"stored {len(memory):,} runs in {time.perf_counter() - t0:.1f}s")
+
+    rng = random.Random(1)
+    queries = [_similar_query(rng.choice(pool), rng) for _ in range(args.queries)]
+    results = {}
+    for exact in (True, False):
+        times = []
+        results[exact] = []
+        for q in queries:
+            t = time.perf_counter()
+            results[exact].append(memory.similar(q, args.k, exact=exact))
+            times.append(time.perf_counter() - t)
+        times.sort()
+        p50, p99 = times[len(times) // 2], times[int(len(times) * 0.99)]
+        print(f"{'exhaustive' if exact else 'prefilter':<11} p50 {p50 * 1e3:7.2f} ms   p99 {p99 * 1e3:7.2f} ms")
+    found = sum(sum(r.score >= ex[-1].score - 1e-6 for r in pre)
+                for ex, pre in zip(results[True], results[False]) if ex)
+    print(f"prefilter recall@{args.k}: {found / (args.k * len(queries)):.3f}")
+    memory.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_router.py
+"""
+Tool routing cost as the registry grows: one `trigger in description` scan per trigger
+(how pick_tool used to route) vs the router's Aho-Corasick trigger index.
+
+    python -m benchmarks.bench_router [--tools 4,50,100,500] [--number N]
+"""
+import random
+import timeit
+
+from agents.router import build_index
+from benchmarks import arg_parser
+
+_WORDS = ["alpha", "bravo", "delta", "kilo", "lima", "oscar", "sierra", "tango", "victor", "zulu"]
+_FILLER = "Here is some context pasted from a ticket, with a few details and related notes. "
+
+
+def synthetic_routing(n, seed=0):
+    """n tools, each with two single-word triggers and one two-word phrase."""
+    rng = random.Random(seed)
+    routing = {}
+    for i in range(n):
+        a, b = rng.sample(_WORDS, 2)
+        routing[f"tool{i}.run"] = [f"{a}{i:04d}", f"{b}{i:04d}", f"{a}{i:04d} {b}{i:04d}"]
+    return routing
+
+
+def descriptions(routing):
+    phrases = [triggers[2] for triggers in routing.values()]
+    return {
+        "plan step": "Choose one tool to progress (echo or math) and propose inputs",
+        "tool mention": f"Use {phrases[-1]} to fetch the report",
+        "4 KiB prompt": _FILLER * (4096 // len(_FILLER)) + f"then call {phrases[len(phrases) // 2]}",
+    }
+
+
+def substring_route(routing, desc):
+    # Generalisation of the old pick_tool: a substring scan per trigger, first hit wins
+    desc = desc.lower()
+    for tool, triggers in routing.items():
+        if any(t in desc for t in triggers):
+            return tool
+    return "NO_TOOL"
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--tools", default="4,50,100,500")
+    parser.add_argument("--number", type=int, default=2_000)
+    args = parser.parse_args()
+
+    print(f"{'tools':>6} {'description':<14} {'substring scan':>15} {'index':>10} {'build':>10}")
+    for n in (int(s) for s in args.tools.split(",")):
+        routing = synthetic_routing(n)
+        build = min(timeit.repeat(lambda: build_index(routing, routing), number=5, repeat=3)) / 5
+        index = build_index(routing, routing)
+        for kind, desc in descriptions(routing).items():
+            old = min(timeit.repeat(lambda: substring_route(routing, desc), number=args.number, repeat=3))
+            new = min(timeit.repeat(lambda: index.match(desc), number=args.number, repeat=3))
+            print(f"{n:>6} {kind:<14} {old / args.number * 1e6:>12.2f} us "
+                  f"{new / args.number * 1e6:>7.2f} us {build * 1e3:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
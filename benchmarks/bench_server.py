@@ -0,0 +1,95 @@
+# benchmarks/bench_server.py
+"""
+Load test: requests/sec through a warm `app.py --serve` server vs one CLI process per prompt.
+
+    python -m benchmarks.bench_server [--requests N] [--clients C] [--workers W] [--processes]
+
+Starts the server as a subprocess on a temporary Unix socket, then measures
+  - cli:          `python app.py PROMPT` per request (interpreter + imports every time)
+  - cli-connect:  `python app.py --connect ADDR PROMPT` per request (thin client process)
+  - server:       C persistent client connections sending N requests in total
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import arg_parser
+from core.client import Client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPTS = ["Please add 5 and 7", "Divide 10 by 4", "Please just repeat this sentence back"]
+
+
+def _cli_rps(n: int, extra) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        subprocess.run([sys.executable, "app.py", *extra, PROMPTS[i % len(PROMPTS)]],
+                       cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    return n / (time.perf_counter() - start)
+
+
+def _server_rps(address: str, n: int, clients: int) -> float:
+    per_client = n // clients
+
+    def worker():
+        with Client(address) as c:
+            for i in range(per_client):
+                c.run(PROMPTS[i % len(PROMPTS)])
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return per_client * clients / (time.perf_counter() - start)
+
+
+def _wait_ready(address: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with Client(address) as c:
+                if c.ping():
+                    return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--requests", type=int, default=5_000, help="requests sent to the server")
+    parser.add_argument("--cli-requests", type=int, default=30, help="CLI processes to spawn")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--processes", action="store_true", help="server uses a process pool")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        address = f"unix:{os.path.join(tmp, 'agent.sock')}"
+        serve = [sys.executable, "app.py", "--serve", address, "--workers", str(args.workers)]
+        if args.processes:
+            serve.append("--processes")
+        proc = subprocess.Popen(serve, cwd=ROOT, stdout=subprocess.DEVNULL)
+        try:
+            _wait_ready(address)
+            cli = _cli_rps(args.cli_requests, [])
+            connect = _cli_rps(args.cli_requests, ["--connect", address])
+            server = _server_rps(address, args.requests, args.clients)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    print(f"cli          {cli:>10.1f} req/s")
+    print(f"cli-connect  {connect:>10.1f} req/s")
+    print(f"server       {server:>10.1f} req/s  ({args.clients} clients, {args.workers} "
+          f"{'process' if args.processes else 'thread'} workers, {server / cli:.0f}x cli)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# benchmarks/bench_toolpool.py
+"""
+Cost of process-isolated tools: in-process call vs ToolPool round trip, and large
+payloads through the pool's shared-memory channel vs a pickled multiprocessing pool.
+
+    python -m benchmarks.bench_toolpool [--number N]
+"""
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks import arg_parser
+from core.toolpool import ToolPool
+from tools import math_tool
+
+MATH = "tools.math_tool:math"
+ECHO = "tools.echo:run"
+
+
+def _echo(text):
+    return text
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--number", type=int, default=2_000)
+    args = parser.parse_args()
+    n = args.number
+    kw = {"op": "mul", "a": 6.0, "b": 7.0}
+
+    t = min(timeit.repeat(lambda: math_tool.math(**kw), number=n * 100, repeat=3))
+    print(f"in-process math        {t / (n * 100) * 1e6:>9.2f} us/call")
+    with ToolPool([MATH, ECHO], workers=1, shm_bytes=8 * 1024 * 1024) as pool, \
+            ProcessPoolExecutor(max_workers=1) as executor:
+        t = min(timeit.repeat(lambda: pool.call(MATH, kw), number=n, repeat=3))
+        print(f"ToolPool math          {t / n * 1e6:>9.2f} us/call")
+        t = min(timeit.repeat(lambda: executor.submit(math_tool.math, **kw).result(), number=n, repeat=3))
+        print(f"ProcessPoolExecutor    {t / n * 1e6:>9.2f} us/call")
+        for mb in (1, 4):
+            text = "x" * (mb * 1024 * 1024)
+            m = max(10, n // 20)
+            t = min(timeit.repeat(lambda: pool.call(ECHO, {"text": text}), number=m, repeat=3))
+            print(f"ToolPool echo {mb} MiB     {t / m * 1e3:>9.2f} ms/call")
+            t = min(timeit.repeat(lambda: executor.submit(_echo, text).result(), number=m, repeat=3))
+            print(f"ProcessPool echo {mb} MiB  {t / m * 1e3:>9.2f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
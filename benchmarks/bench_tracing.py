@@ -0,0 +1,36 @@
+# benchmarks/bench_tracing.py
+"""
+Cost of run tracing: run() with tracing off vs on, and the bare span() call when off.
+
+    python -m benchmarks.bench_tracing [--number N]
+"""
+import timeit
+
+from benchmarks import arg_parser
+from core import tracing
+from core.orchestrator import run
+
+PROMPT = "Please add 5 and 7"
+
+
+def _noop_span():
+    with tracing.span("step", step_id="plan-1"):
+        pass
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+
+    t = min(timeit.repeat(_noop_span, number=args.number * 10, repeat=3))
+    print(f"span() off      {t / (args.number * 10) * 1e9:>8.0f} ns/call")
+    for label, on in (("run()  off     ", False), ("run()  on      ", True)):
+        tracing.enable(on)
+        t = min(timeit.repeat(lambda: run(PROMPT), number=args.number, repeat=3))
+        print(f"{label} {t / args.number * 1e6:>8.2f} us/run")
+    tracing.enable(False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# benchmarks/suite.py
+"""
+End-to-end and per-stage benchmark suite with saved baselines.
+
+    python -m benchmarks.suite [--iterations N] [--repeat R] [--filter SUBSTR]
+    python -m benchmarks.suite --save benchmarks/baselines/local.json
+    python -m benchmarks.suite --compare benchmarks/baselines/local.json [--tolerance 0.25]
+
+Every stage (run, create_initial_plan, _parse_math_from_prompt, ToolRegistry.math/echo,
+evaluate, summarize_trace) is timed over each prompt category of CORPUS and reported as
+throughput, p50/p99 latency and peak bytes allocated per call. --compare exits 1
+when any case regressed by more than --tolerance against the saved baseline.
+"""
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import agents.planner as planner
+from agents.critic import evaluate, summarize_trace
+from agents.executor import _parse_math_from_prompt, run_step
+from benchmarks import arg_parser
+from core import orchestrator, tracing
+from core.orchestrator import ToolRegistry, run
+
+_FILLER = "Here is some context pasted from a ticket, with a few details like build 2024 and related notes. "
+_PAD = _FILLER * (4096 // len(_FILLER))
+
+CORPUS: Dict[str, List[str]] = {
+    "short": ["Please add 5 and 7", "Subtract 3 from 10", "Multiply 6 by 7", "Sum 1.5 and 2.25"],
+    "long": [_PAD + "Please multiply 6 by 7", "Subtract 3 from 10. " + _PAD, _PAD + "Please just repeat this back"],
+    "symbol": ["3*4", "12 / 4", "7 - 2", "6 x 7"],
+    "echo": ["Please just repeat this sentence back", "Say hello to the team"],
+    "failure": ["Divide 10 by 0", "10 / 0"],
+}
+
+# Allocation figures are taken over at most this many calls per case (tracemalloc is slow)
+ALLOC_CALLS = 200
+
+
+def _executed_plan(prompt: str):
+    plan = planner.create_initial_plan(prompt)
+    for step in plan:
+        run_step(step, plan, prompt, tools=ToolRegistry)
+    return plan
+
+
+def _math(op: str, a: float, b: float) -> Any:
+    try:
+        return ToolRegistry.math(op=op, a=a, b=b)
+    except ZeroDivisionError as e:  # the failure path, as run_step reports it
+        return e
+
+
+def _tool_call(prompt: str) -> Callable[[], Any]:
+    parsed = _parse_math_from_prompt(prompt)
+    if parsed:
+        return lambda: _math(*parsed)
+    return lambda: ToolRegistry.echo(text=prompt)
+
+
+def _stage_calls(prompt: str) -> Dict[str, Callable[[], Any]]:
+    plan = _executed_plan(prompt)
+    return {
+        "run": lambda: run(prompt),
+        "plan": lambda: planner.create_initial_plan(prompt),
+        "parse": lambda: _parse_math_from_prompt(prompt),
+        "tool": _tool_call(prompt),
+        "evaluate": lambda: evaluate(plan),
+        "summarize": lambda: summarize_trace(plan),
+    }
+
+
+def build_cases(corpus: Dict[str, List[str]] = CORPUS) -> Dict[str, List[Callable[[], Any]]]:
+    """Map "stage/category" to the zero-argument calls to time, one per prompt."""
+    cases: Dict[str, List[Callable[[], Any]]] = {}
+    for category, prompts in corpus.items():
+        for prompt in prompts:
+            for stage, fn in _stage_calls(prompt).items():
+                cases.setdefault(f"{stage}/{category}", []).append(fn)
+    return dict(sorted(cases.items()))
+
+
+def _percentile(sorted_ns: List[int], q: float) -> float:
+    return sorted_ns[min(len(sorted_ns) - 1, int(q * len(sorted_ns)))] / 1e3
+
+
+def measure(calls: List[Callable[[], Any]], iterations: int) -> Dict[str, float]:
+    """Time `iterations` calls (cycling through `calls`); returns ops/s, p50/p99 in us, bytes/call."""
+    for fn in calls:  # warm-up
+        fn()
+    gc.collect()
+    clock = time.perf_counter_ns
+    lat = [0] * iterations
+    n = len(calls)
+    for i in range(iterations):
+        fn = calls[i % n]
+        t0 = clock()
+        fn()
+        lat[i] = clock() - t0
+    lat.sort()
+
+    alloc_calls = min(iterations, ALLOC_CALLS)
+    peak_total = 0
+    tracemalloc.start()
+    for i in range(alloc_calls):
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        calls[i % n]()
+        peak_total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return {
+        "ops_per_s": iterations / (sum(lat) / 1e9),
+        "p50_us": _percentile(lat, 0.50),
+        "p99_us": _percentile(lat, 0.99),
+        "alloc_bytes": peak_total / alloc_calls,
+    }
+
+
+def run_suite(iterations: int, only: str = "", repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """Measure each case `repeat` times and keep the round with the lowest p50 (least disturbed)."""
+    # Measure the pipeline itself: no run cache, no span recording
+    orchestrator.set_run_cache(None)
+    tracing.enable(False)
+    return {
+        name: min((measure(calls, iterations) for _ in range(repeat)), key=lambda r: r["p50_us"])
+        for name, calls in build_cases().items()
+        if only in name
+    }
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """Describe every case slower (p50, throughput) or hungrier (bytes) than baseline by more than `tolerance`."""
+    regressions = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if cur["p50_us"] > base["p50_us"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {base['p50_us']:.2f}us -> {cur['p50_us']:.2f}us")
+        if cur["ops_per_s"] * (1 + tolerance) < base["ops_per_s"]:
+            regressions.append(f"{name}: throughput {base['ops_per_s']:.0f}/s -> {cur['ops_per_s']:.0f}/s")
+        # Small absolute slack: a few dozen bytes is interpreter noise, not a regression
+        if cur["alloc_bytes"] > base["alloc_bytes"] * (1 + tolerance) + 256:
+            regressions.append(f"{name}: alloc {base['alloc_bytes']:.0f}B -> {cur['alloc_bytes']:.0f}B")
+    return regressions
+
+
+def _print(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'case':<20} {'ops/s':>10} {'p50 us':>9} {'p99 us':>9} {'bytes':>8}" + ("  p50 vs base" if baseline else ""))
+    for name, r in results.items():
+        line = f"{name:<20} {r['ops_per_s']:>10.0f} {r['p50_us']:>9.2f} {r['p99_us']:>9.2f} {r['alloc_bytes']:>8.0f}"
+        base = baseline.get(name)
+        if base:
+            line += f"  {(r['p50_us'] / base['p50_us'] - 1) * 100:+6.1f}%"
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = arg_parser(__doc__)
+    parser.add_argument("--iterations", type=int, default=2_000, help="timed calls per case")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds per case; the best round is reported")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--save", metavar="FILE", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a saved baseline; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown for --compare")
+    args = parser.parse_args(argv)
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+
+    results = run_suite(args.iterations, args.filter, args.repeat)
+    _print(results, baseline)
+
+    if args.save:
+        doc = {
+            "meta": {
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "iterations": args.iterations,
+                "repeat": args.repeat,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": results,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(doc, fh, indent=2, sort_keys=True)
+        print(f"saved baseline: {args.save}")
+
+    if args.compare:
+        regressions = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
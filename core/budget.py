@@ -0,0 +1,161 @@
+# core/budget.py
+"""
+Token and cost accounting for LLM calls.
+
+The orchestrator gives every run its own Budget (limits from the `budgets:` section
+of the config) and makes it current for the run's steps; core.llm checks it before
+each upstream request and charges it with the response's usage afterwards. A Budget
+can have a parent (e.g. one per batch) that is charged and checked as well.
+
+Once a budget is exhausted, further LLM calls raise BudgetExceeded; the planner and
+executor catch it and fall back to their offline behaviour, so the run completes
+without spending more; such degraded runs are kept out of the run cache. Every
+request sent upstream is charged, retries and hedged duplicates included. Memo hits
+and coalesced calls cost nothing and are not charged.
+"""
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from core import config
+
+# USD per 1M (prompt, completion) tokens; `budgets.prices` in the config overrides/extends
+PRICES_PER_MTOK: Dict[str, tuple] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+# Unknown models are charged at the most expensive known rate
+_FALLBACK_PRICE = (2.50, 10.00)
+
+_CONFIG = object()  # sentinel: take the limit from the config snapshot on first use
+_current: "ContextVar[Optional[Budget]]" = ContextVar("budget", default=None)
+
+
+class BudgetExceeded(RuntimeError):
+    pass
+
+
+def price(model: str) -> tuple:
+    """USD per 1M (prompt, completion) tokens for `model`."""
+    return (config.settings().budgets.prices.get(model)
+            or PRICES_PER_MTOK.get(model, _FALLBACK_PRICE))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token) for responses that carry no usage."""
+    return max(1, len(text) // 4)
+
+
+class Budget:
+    """
+    Running totals for one run (or batch). Limits default to the config's
+    budgets.max_tokens / budgets.max_cost_usd; pass None for no limit.
+    """
+
+    def __init__(self, max_tokens: Any = _CONFIG, max_cost_usd: Any = _CONFIG,
+                 parent: Optional["Budget"] = None):
+        self._max_tokens = max_tokens
+        self._max_cost_usd = max_cost_usd
+        self.parent = parent
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.calls = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_tokens(self) -> Optional[int]:
+        if self._max_tokens is _CONFIG:
+            self._max_tokens = config.settings().budgets.max_tokens
+        return self._max_tokens
+
+    @property
+    def max_cost_usd(self) -> Optional[float]:
+        if self._max_cost_usd is _CONFIG:
+            self._max_cost_usd = config.settings().budgets.max_cost_usd
+        return self._max_cost_usd
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def exhausted(self) -> bool:
+        if self.max_tokens is not None and self.total_tokens >= self.max_tokens:
+            return True
+        if self.max_cost_usd is not None and self.cost_usd >= self.max_cost_usd:
+            return True
+        return self.parent is not None and self.parent.exhausted
+
+    def check(self) -> None:
+        """Raise BudgetExceeded (and count the refusal) if no more LLM calls are allowed."""
+        if self.exhausted:
+            with self._lock:
+                self.denied += 1
+            raise BudgetExceeded(
+                f"LLM budget exhausted: {self.total_tokens} tokens, ${self.cost_usd:.4f} "
+                f"(limits: {self.max_tokens} tokens, ${self.max_cost_usd})"
+            )
+
+    def charge(self, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        price_in, price_out = price(model)
+        cost = (prompt_tokens * price_in + completion_tokens * price_out) / 1e6
+        self._add(prompt_tokens, completion_tokens, cost, 1)
+
+    def _add(self, prompt_tokens: int, completion_tokens: int, cost: float, calls: int) -> None:
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost_usd += cost
+            self.calls += calls
+        if self.parent is not None:
+            self.parent._add(prompt_tokens, completion_tokens, cost, calls)
+
+    def charge_response(self, model: str, messages: List[Dict[str, str]], resp: Any) -> None:
+        """Charge a chat completion by its reported usage, estimating when the response has none."""
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            self.charge(model, getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0)
+            return
+        prompt = sum(estimate_tokens(m.get("content") or "") for m in messages)
+        try:
+            completion = estimate_tokens(resp.choices[0].message.content or "")
+        except (AttributeError, IndexError):
+            completion = 0
+        self.charge(model, prompt, completion)
+
+    def add_usage(self, usage: Dict[str, Any]) -> None:
+        """Fold in a usage() dict reported elsewhere (e.g. by a run in a worker process)."""
+        self._add(usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+                  usage.get("cost_usd", 0.0), usage.get("llm_calls", 0))
+
+    def usage(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens,
+                "cost_usd": round(self.cost_usd, 6),
+                "llm_calls": self.calls,
+                "denied_calls": self.denied,
+            }
+
+
+class use:
+    """Context manager making `budget` the one LLM calls in this context are charged to."""
+    __slots__ = ("budget", "_token")
+
+    def __init__(self, budget: Optional[Budget]):
+        self.budget = budget
+
+    def __enter__(self) -> Optional[Budget]:
+        self._token = _current.set(self.budget)
+        return self.budget
+
+    def __exit__(self, *exc: Any) -> None:
+        _current.reset(self._token)
+
+
+def current() -> Optional[Budget]:
+    return _current.get()
@@ -0,0 +1,230 @@
+# core/cache.py
+"""
+Result caches for whole orchestrator runs (see core.orchestrator.set_run_cache).
+
+Entries are stored as JSON text: that is what the memory cap counts, it lets the
+sqlite backend share entries between worker processes, and every hit hands back a
+fresh object the caller is free to mutate.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    import sqlite3
+
+
+def cache_key(prompt: str, config: Dict[str, Any]) -> str:
+    """
+    Content address for a run: sha256 over the prompt and the config that shapes its result.
+
+    The prompt is used verbatim; echo output and plan-1's noted goal repeat it, so
+    folding case or whitespace would change results.
+    """
+    import hashlib
+    blob = json.dumps({"prompt": prompt, "config": config}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class _StatsMixin:
+    def _reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self),
+        }
+
+
+class RunCache(_StatsMixin):
+    """In-process LRU cache with optional TTL, bounded by entry count and payload bytes."""
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_s: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (payload, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            payload, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return json.loads(payload)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        payload = json.dumps(result)
+        if len(payload) > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_s if self.ttl_s is not None else None
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (payload, expires_at)
+            self._bytes += len(payload)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _drop(self, key: str) -> None:
+        payload, _ = self._data.pop(key)
+        self._bytes -= len(payload)
+
+
+class SqliteRunCache(_StatsMixin):
+    """
+    On-disk cache in a sqlite file, shared by every process that opens the same path
+    and kept across restarts. Same LRU/TTL/size semantics as RunCache; limits are
+    enforced every `prune_every` writes rather than on each one.
+    Hit/miss counters are per process.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, max_bytes: int = 512 * 1024 * 1024,
+                 ttl_s: Optional[float] = None, prune_every: int = 64):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = 0
+        self._reset_stats()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        with self._conn() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " key TEXT PRIMARY KEY, payload TEXT NOT NULL, size INTEGER NOT NULL,"
+                " expires_at REAL, last_used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS runs_last_used ON runs(last_used)")
+
+    def _conn(self) -> "sqlite3.Connection":
+        # sqlite connections are per thread; WAL lets readers and one writer overlap
+        db = getattr(self._local, "db", None)
+        if db is None:
+            import sqlite3
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        db = self._conn()
+        row = db.execute("SELECT payload, expires_at FROM runs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        payload, expires_at = row
+        with db:
+            if expires_at is not None and expires_at <= now:
+                db.execute("DELETE FROM runs WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            db.execute("UPDATE runs SET last_used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(payload)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        payload = json.dumps(result)
+        if len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        expires_at = now + self.ttl_s if self.ttl_s is not None else None
+        db = self._conn()
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO runs (key, payload, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), expires_at, now),
+            )
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self) -> None:
+        """Drop expired entries, then least recently used ones until both limits hold."""
+        db = self._conn()
+        with db:
+            cur = db.execute("DELETE FROM runs WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+            self.expirations += cur.rowcount
+            count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM runs").fetchone()
+            if count <= self.max_entries and total <= self.max_bytes:
+                return
+            drop = 0
+            for (size,) in db.execute("SELECT size FROM runs ORDER BY last_used"):
+                if count - drop <= self.max_entries and total <= self.max_bytes:
+                    break
+                drop += 1
+                total -= size
+            db.execute(
+                "DELETE FROM runs WHERE key IN (SELECT key FROM runs ORDER BY last_used LIMIT ?)", (drop,)
+            )
+            self.evictions += drop
+
+    def clear(self) -> None:
+        with self._conn() as db:
+            db.execute("DELETE FROM runs")
+
+
+def from_env() -> Any:
+    """
+    Build the cache selected by RUN_CACHE ("memory" or "sqlite:<path>"), or None when
+    unset. RUN_CACHE_TTL_S, RUN_CACHE_MAX_ENTRIES and RUN_CACHE_MAX_MB tune limits.
+    """
+    spec = os.getenv("RUN_CACHE", "").strip()
+    if not spec:
+        return None
+    kw: Dict[str, Any] = {}
+    if os.getenv("RUN_CACHE_TTL_S"):
+        kw["ttl_s"] = float(os.environ["RUN_CACHE_TTL_S"])
+    if os.getenv("RUN_CACHE_MAX_ENTRIES"):
+        kw["max_entries"] = int(os.environ["RUN_CACHE_MAX_ENTRIES"])
+    if os.getenv("RUN_CACHE_MAX_MB"):
+        kw["max_bytes"] = int(float(os.environ["RUN_CACHE_MAX_MB"]) * 1024 * 1024)
+    if spec == "memory":
+        return RunCache(**kw)
+    if spec.startswith("sqlite:"):
+        return SqliteRunCache(spec[len("sqlite:"):], **kw)
+    raise ValueError(f"Unknown RUN_CACHE backend: {spec}")
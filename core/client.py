@@ -0,0 +1,139 @@
+# core/client.py
+"""
+Thin client for core.server: newline-delimited JSON-RPC 2.0 over TCP or a Unix socket.
+
+    from core.client import Client
+    with Client("unix:/tmp/agent.sock") as c:
+        result = c.run("Please add 5 and 7")   # same dict as core.orchestrator.run()
+
+Only stdlib socket/json are imported, so short-lived scripts skip the agent's own
+startup cost entirely.
+"""
+import itertools
+import json
+import select
+import socket
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+# JSON-RPC error code the server uses when its request queue is full
+BUSY = -32000
+
+
+class RpcError(RuntimeError):
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{message} (code {code})")
+        self.code = code
+
+
+class ServerBusy(RpcError):
+    pass
+
+
+def parse_address(address: str) -> Tuple[int, Union[str, Tuple[str, int]]]:
+    """"unix:/path" (or any path with a slash) -> AF_UNIX; "host:port" -> AF_INET."""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    if "/" in address:
+        return socket.AF_UNIX, address
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+class Client:
+    """
+    One persistent connection; reconnects if the server dropped it while it was idle.
+    A request is only ever sent again if it provably never reached the server: once
+    it has been written, a lost connection raises ConnectionError (a run is not
+    idempotent; retrying it is the caller's call). Busy replies are retried `busy_retries` times with exponential backoff before
+    ServerBusy is raised. Not thread-safe: use one Client per thread.
+    """
+
+    def __init__(self, address: str, timeout: Optional[float] = None, busy_retries: int = 3):
+        self.address = address
+        self.timeout = timeout
+        self.busy_retries = busy_retries
+        self._sock: Optional[socket.socket] = None
+        self._rfile: Any = None
+        self._ids = itertools.count(1)
+
+    def _connect(self) -> None:
+        family, addr = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(addr)
+        except BaseException:
+            sock.close()
+            raise
+        if family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._rfile = sock.makefile("rb")
+
+    def _stale(self) -> bool:
+        # The server closed this connection while it sat idle: EOF (or an error) is queued
+        if not select.select([self._sock], [], [], 0)[0]:
+            return False
+        try:
+            return self._sock.recv(1, socket.MSG_PEEK) == b""
+        except OSError:
+            return True
+
+    def _roundtrip(self, payload: bytes) -> bytes:
+        if self._sock is not None and self._stale():
+            self.close()
+        for attempt in range(2):
+            if self._sock is None:
+                self._connect()
+            try:
+                self._sock.sendall(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                # Refused before the request was read (e.g. server restarted): safe to resend
+                self.close()
+                continue
+            try:
+                line = self._rfile.readline()
+            except ConnectionResetError:
+                line = b""
+            if line:
+                return line
+            self.close()
+            break  # the server may have run the request: do not send it again
+        raise ConnectionError(f"server at {self.address} closed the connection")
+
+    def call(self, method: str, **params: Any) -> Any:
+        req = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}
+        payload = json.dumps(req).encode("utf-8") + b"\n"
+        for attempt in range(self.busy_retries + 1):
+            reply = json.loads(self._roundtrip(payload))
+            error = reply.get("error")
+            if error is None:
+                return reply["result"]
+            if error["code"] != BUSY:
+                raise RpcError(error["code"], error["message"])
+            if attempt < self.busy_retries:
+                time.sleep(0.05 * 2 ** attempt)
+        raise ServerBusy(error["code"], error["message"])
+
+    def run(self, prompt: str) -> Dict[str, Any]:
+        return self.call("run", prompt=prompt)
+
+    def ping(self) -> bool:
+        return self.call("ping") == "pong"
+
+    def stats(self) -> Dict[str, Any]:
+        return self.call("stats")
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._rfile.close()
+            self._sock.close()
+            self._sock = None
+            self._rfile = None
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,359 @@
+# core/config.py
+"""
+Typed, hot-reloadable settings from config/default.yaml (or the file named by $AGENT_CONFIG).
+
+The file is parsed once and compiled into an immutable Settings snapshot (frozen
+dataclasses and read-only mappings: models, budgets, retry, memory, the tool
+registry and its routing triggers, and the critic's acceptance rules). settings() is a plain global read, so
+the hot path takes no lock and does no parsing. reload() builds a new snapshot and
+swaps it in with one assignment; watch() does that whenever the file changes, so
+long-running servers and workers pick up new settings without a restart. A file
+that fails to parse or validate leaves the current snapshot in place.
+
+The parsed file is cached as JSON in config/__pycache__ (keyed by the file's mtime
+and size, like a .pyc), so processes after the first never import yaml. Environment
+overrides (OPENAI_API_KEY, MODEL_PLANNER, MODEL_EXECUTOR) are applied per process.
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+CONFIG_PATH = os.getenv(
+    "AGENT_CONFIG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "default.yaml"),
+)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Rule kinds the critic implements; `acceptance:` maps acceptance text to one of them
+ACCEPTANCE_RULES = ("criteria", "inputs", "summary_references_result")
+
+# The built-in tools (core.orchestrator starts its registry from these; a `tools:`
+# section adds to or overrides them). Also used when the file has no `acceptance:`
+DEFAULT_TOOLS: Mapping[str, str] = MappingProxyType({
+    "echo.say": "tools.echo:run",               # run(text=...)
+    "math.add": "tools.math_tool:run",          # run(a=..., b=...)
+    "math.calc": "tools.math_tool:math",        # math(op=..., a=..., b=...)
+    "math.batch": "tools.math_tool:math_batch",  # math_batch(ops=[...], a=[...], b=[...])
+    "math.expr": "tools.math_tool:expr",        # expr(expr="(2+3)*4/7")
+})
+DEFAULT_ACCEPTANCE: Mapping[str, str] = MappingProxyType({
+    "Has concrete criteria": "criteria",
+    "Inputs present": "inputs",
+    "Summary references result": "summary_references_result",
+})
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+_CACHE_FORMAT = 1
+
+
+class ConfigError(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Models:
+    planner: str = DEFAULT_MODEL
+    executor: str = DEFAULT_MODEL
+    critic: str = DEFAULT_MODEL
+
+
+@dataclass(frozen=True, slots=True)
+class Budgets:
+    max_tokens: Optional[int] = None
+    max_cost_usd: Optional[float] = None
+    prices: Mapping[str, Tuple[float, float]] = _EMPTY  # USD per 1M (prompt, completion) tokens
+
+
+@dataclass(frozen=True, slots=True)
+class Memory:
+    topk: int = 5                   # similar past runs handed to the planner
+    reuse_similarity: float = 0.95  # reuse a remembered LLM plan for the same prompt this similar
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    version: int = 0            # bumped on every swap
+    source: Optional[str] = None
+    llm_enabled: bool = False   # OPENAI_API_KEY is set and llm.enabled is not false
+    models: Models = field(default_factory=Models)
+    budgets: Budgets = field(default_factory=Budgets)
+    retry: Mapping[str, Any] = _EMPTY  # raw `retry:` section; core.retry builds its policy from it
+    memory: Memory = field(default_factory=Memory)
+    tools: Mapping[str, str] = DEFAULT_TOOLS
+    routing: Mapping[str, Tuple[str, ...]] = _EMPTY  # tool -> trigger words/phrases (agents.router)
+    acceptance: Mapping[str, str] = DEFAULT_ACCEPTANCE
+    raw: Mapping[str, Any] = _EMPTY
+
+    def section(self, name: str) -> Mapping[str, Any]:
+        return self.raw.get(name) or _EMPTY
+
+
+# -------------------------------------------------------------------
+# Compiling a parsed file into a snapshot
+# -------------------------------------------------------------------
+def _mapping(data: Mapping[str, Any], name: str) -> Mapping[str, Any]:
+    value = data.get(name)
+    if value is None:
+        return {}
+    if not isinstance(value, Mapping):
+        raise ConfigError(f"{name}: expected a mapping, got {type(value).__name__}")
+    return value
+
+
+def _number(section: Mapping[str, Any], key: str, where: str, kind: type = float) -> Any:
+    value = section.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ConfigError(f"{where}.{key}: expected a non-negative number, got {value!r}")
+    return kind(value)
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _llm_enabled(section: Mapping[str, Any], env: Mapping[str, str]) -> bool:
+    enabled = section.get("enabled", "auto")
+    if enabled not in ("auto", True, False):
+        raise ConfigError(f"llm.enabled: expected auto, true or false, got {enabled!r}")
+    return bool(env.get("OPENAI_API_KEY")) and enabled is not False
+
+
+def _models(section: Mapping[str, Any], env: Mapping[str, str]) -> Models:
+    for key, value in section.items():
+        if not isinstance(value, str) or not value:
+            raise ConfigError(f"models.{key}: expected a model name, got {value!r}")
+    return Models(
+        planner=env.get("MODEL_PLANNER") or section.get("planner", DEFAULT_MODEL),
+        executor=env.get("MODEL_EXECUTOR") or section.get("executor_reasoning", DEFAULT_MODEL),
+        critic=section.get("critic", DEFAULT_MODEL),
+    )
+
+
+def _budgets(section: Mapping[str, Any]) -> Budgets:
+    prices = {}
+    for model, price in (_mapping(section, "prices")).items():
+        if (not isinstance(price, (list, tuple)) or len(price) != 2
+                or not all(isinstance(p, (int, float)) and not isinstance(p, bool) for p in price)):
+            raise ConfigError(f"budgets.prices.{model}: expected [prompt, completion] USD per 1M tokens")
+        prices[model] = (float(price[0]), float(price[1]))
+    tokens = _number(section, "max_tokens", "budgets", int)
+    return Budgets(
+        max_tokens=tokens,
+        max_cost_usd=_number(section, "max_cost_usd", "budgets"),
+        prices=MappingProxyType(prices),
+    )
+
+
+def _memory(section: Mapping[str, Any]) -> Memory:
+    topk = section.get("topk", 5)
+    if isinstance(topk, bool) or not isinstance(topk, int) or topk < 1:
+        raise ConfigError(f"memory.topk: expected a positive integer, got {topk!r}")
+    reuse = section.get("reuse_similarity", 0.95)
+    if isinstance(reuse, bool) or not isinstance(reuse, (int, float)) or not 0 < reuse <= 1:
+        raise ConfigError(f"memory.reuse_similarity: expected a number in (0, 1], got {reuse!r}")
+    return Memory(topk=topk, reuse_similarity=float(reuse))
+
+
+def _tools(section: Mapping[str, Any]) -> Mapping[str, str]:
+    if not section:
+        return DEFAULT_TOOLS
+    for name, spec in section.items():
+        module, _, func = spec.partition(":") if isinstance(spec, str) else ("", "", "")
+        if not (module and func):
+            raise ConfigError(f"tools.{name}: expected \"module:function\", got {spec!r}")
+    return MappingProxyType({**DEFAULT_TOOLS, **section})
+
+
+def _routing(section: Mapping[str, Any]) -> Mapping[str, Tuple[str, ...]]:
+    routing = {}
+    for name, triggers in section.items():
+        if isinstance(triggers, str):
+            triggers = [triggers]
+        if not isinstance(triggers, (list, tuple)) or not all(isinstance(t, str) and t.strip() for t in triggers):
+            raise ConfigError(f"routing.{name}: expected a list of trigger words/phrases, got {triggers!r}")
+        routing[name] = tuple(triggers)
+    return MappingProxyType(routing)
+
+
+def _acceptance(section: Mapping[str, Any]) -> Mapping[str, str]:
+    if not section:
+        return DEFAULT_ACCEPTANCE
+    for text, rule in section.items():
+        if rule not in ACCEPTANCE_RULES:
+            raise ConfigError(f"acceptance.{text!r}: unknown rule {rule!r} (one of {', '.join(ACCEPTANCE_RULES)})")
+    return MappingProxyType(dict(section))
+
+
+def compile_settings(data: Optional[Mapping[str, Any]], *, source: Optional[str] = None,
+                     version: int = 0, env: Optional[Mapping[str, str]] = None) -> Settings:
+    """Validate a parsed config file and build its snapshot; raises ConfigError."""
+    data = data or {}
+    if not isinstance(data, Mapping):
+        raise ConfigError(f"expected a mapping at the top level, got {type(data).__name__}")
+    env = os.environ if env is None else env
+    return Settings(
+        version=version,
+        source=source,
+        llm_enabled=_llm_enabled(_mapping(data, "llm"), env),
+        models=_models(_mapping(data, "models"), env),
+        budgets=_budgets(_mapping(data, "budgets")),
+        retry=_freeze(_mapping(data, "retry")),
+        memory=_memory(_mapping(data, "memory")),
+        tools=_tools(_mapping(data, "tools")),
+        routing=_routing(_mapping(data, "routing")),
+        acceptance=_acceptance(_mapping(data, "acceptance")),
+        raw=_freeze(data),
+    )
+
+
+# -------------------------------------------------------------------
+# Reading the file (through the compiled cache)
+# -------------------------------------------------------------------
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _cache_path(path: str) -> str:
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, "__pycache__", name + ".json")
+
+
+def _parse(path: str) -> Dict[str, Any]:
+    import yaml
+    with open(path, encoding="utf-8") as fh:
+        try:
+            return yaml.safe_load(fh) or {}
+        except yaml.YAMLError as e:
+            raise ConfigError(f"{path}: {e}") from None
+
+
+def _read(path: str, stamp: Tuple[int, int]) -> Dict[str, Any]:
+    cache = _cache_path(path)
+    try:
+        with open(cache, encoding="utf-8") as fh:
+            cached = json.load(fh)
+        if cached["format"] == _CACHE_FORMAT and tuple(cached["stamp"]) == stamp:
+            return cached["data"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    data = _parse(path)
+    compile_settings(data, env={})  # only cache files that validate
+    try:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        tmp = f"{cache}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"format": _CACHE_FORMAT, "stamp": list(stamp), "data": data}, fh)
+        os.replace(tmp, cache)
+    except (OSError, TypeError, ValueError):
+        pass  # read-only checkout or values JSON can't hold: parse again next time
+    return data
+
+
+def load_section(name: str, path: Optional[str] = None) -> Dict[str, Any]:
+    """Return the top-level `name:` mapping of a config file ({} if the file or section is missing)."""
+    path = path or CONFIG_PATH
+    stamp = _stamp(path)
+    if stamp is None:
+        return {}
+    return _read(path, stamp).get(name) or {}
+
+
+# -------------------------------------------------------------------
+# The current snapshot
+# -------------------------------------------------------------------
+_current: Optional[Settings] = None
+_stamp_loaded: Optional[Tuple[int, int]] = None
+_lock = threading.Lock()
+_listeners: List[Callable[[Settings], None]] = []
+_watcher: Optional[threading.Thread] = None
+_stop = threading.Event()
+last_error: Optional[BaseException] = None  # why the latest reload kept the old snapshot
+
+
+def settings() -> Settings:
+    """The current snapshot; loaded on first use, then a lock-free read."""
+    current = _current
+    if current is None:
+        return reload(force=True)
+    return current
+
+
+def reload(path: Optional[str] = None, *, force: bool = False) -> Settings:
+    """
+    Re-read the config (or switch to `path`) if it changed since the last load and swap
+    in the new snapshot. Raises ConfigError (keeping the current snapshot) if invalid.
+    """
+    global CONFIG_PATH, _current, _stamp_loaded, last_error
+    with _lock:
+        if path is not None and path != CONFIG_PATH:
+            CONFIG_PATH, force = path, True
+        stamp = _stamp(CONFIG_PATH)
+        if _current is not None and not force and stamp == _stamp_loaded:
+            return _current
+        version = 1 if _current is None else _current.version + 1
+        try:
+            data = _read(CONFIG_PATH, stamp) if stamp is not None else {}
+            new = compile_settings(data, source=CONFIG_PATH if stamp else None, version=version)
+        except (ConfigError, OSError) as e:
+            last_error = e
+            if _current is None:
+                raise
+            raise ConfigError(f"{CONFIG_PATH}: {e} (keeping settings v{_current.version})") from e
+        _current, _stamp_loaded, last_error = new, stamp, None
+        listeners = list(_listeners)
+    for fn in listeners:
+        try:
+            fn(new)
+        except Exception as e:  # a listener must not stop the others (or the watcher)
+            last_error = e
+    return new
+
+
+def on_change(fn: Callable[[Settings], None]) -> Callable[[Settings], None]:
+    """Call fn(snapshot) after every swap (on the reloading thread)."""
+    _listeners.append(fn)
+    return fn
+
+
+def watch(interval_s: float = 1.0) -> threading.Thread:
+    """Poll the config file every interval_s and reload() on change (idempotent)."""
+    global _watcher
+    with _lock:
+        if _watcher is not None and _watcher.is_alive():
+            return _watcher
+        _stop.clear()
+        _watcher = threading.Thread(target=_watch, args=(interval_s,), name="config-watch", daemon=True)
+        _watcher.start()
+        return _watcher
+
+
+def stop_watching() -> None:
+    global _watcher
+    _stop.set()
+    watcher, _watcher = _watcher, None
+    if watcher is not None:
+        watcher.join()
+
+
+def _watch(interval_s: float) -> None:
+    settings()
+    while not _stop.wait(interval_s):
+        if _stamp(CONFIG_PATH) != _stamp_loaded:
+            try:
+                reload()
+            except ConfigError:
+                pass  # kept the old snapshot; last_error says why
@@ -0,0 +1,103 @@
+# core/evidence.py
+"""
+Evidence for the critic: what each tool returned and where the step's summary quotes it.
+
+The executor attaches an Evidence record to a step when it writes the step's
+summary (it knows the offset it put the output at), and EvidenceStore indexes a
+run's records by step id and by value. Checking "summary references result" is
+then one startswith() at a known offset per step (linear in the output size)
+rather than a substring search over the whole summary. Outputs are referenced,
+never copied: a string output is its own `text`.
+
+Evidence lives on the steps only; core.models.AgentState.evidence is not filled in.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+@dataclass(slots=True, frozen=True)
+class Evidence:
+    step_id: str
+    tool: str
+    value: Any
+    text: str      # value as quoted in the summary
+    offset: int    # where `text` starts in the summary
+
+    def supports(self, summary: str) -> bool:
+        return summary.startswith(self.text, self.offset)
+
+
+def quote(step_id: str, tool: str, value: Any, prefix: str, suffix: str = "") -> Tuple[str, Evidence]:
+    """Build `prefix + value + suffix` and the Evidence locating the value in it."""
+    text = value if isinstance(value, str) else str(value)
+    return prefix + text + suffix, Evidence(step_id, tool, value, text, len(prefix))
+
+
+def _value_key(value: Any) -> Any:
+    try:
+        hash(value)
+    except TypeError:
+        return ("id", id(value))
+    return value
+
+
+class EvidenceStore:
+    """A run's evidence, indexed by step id (eagerly) and by value (on first lookup)."""
+
+    __slots__ = ("_entries", "_by_step", "_by_value")
+
+    def __init__(self, entries: Iterable[Evidence] = ()):
+        self._entries: List[Evidence] = []
+        self._by_step: Dict[str, List[Evidence]] = {}
+        self._by_value: Optional[Dict[Any, List[Evidence]]] = None
+        for ev in entries:
+            self.add(ev)
+
+    @classmethod
+    def from_plan(cls, plan: Any) -> "EvidenceStore":
+        # Called on every evaluate(): one pass, no per-entry method calls
+        store = cls()
+        by_step = store._by_step
+        for step in plan:
+            ev = step.evidence
+            if ev is not None:
+                store._entries.append(ev)
+                hit = by_step.get(ev.step_id)
+                if hit is None:
+                    by_step[ev.step_id] = [ev]
+                else:
+                    hit.append(ev)
+        return store
+
+    def add(self, ev: Evidence) -> None:
+        self._entries.append(ev)
+        self._by_step.setdefault(ev.step_id, []).append(ev)
+        if self._by_value is not None:
+            self._by_value.setdefault(_value_key(ev.value), []).append(ev)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Evidence]:
+        return iter(self._entries)
+
+    def for_step(self, step_id: str) -> List[Evidence]:
+        return self._by_step.get(step_id, [])
+
+    def find(self, value: Any) -> List[Evidence]:
+        """Evidence whose tool output equals `value` (hashable values) or is `value` (others)."""
+        if self._by_value is None:
+            self._by_value = {}
+            for ev in self._entries:
+                self._by_value.setdefault(_value_key(ev.value), []).append(ev)
+        return self._by_value.get(_value_key(value), [])
+
+    def supports(self, step_id: str, value: Any, summary: str) -> bool:
+        """
+        Does `summary` quote `value` where the step's evidence says it does?
+        Steps without evidence (built outside the executor) fall back to a substring check.
+        """
+        entries = self._by_step.get(step_id)
+        if not entries:
+            return str(value) in summary
+        return any((ev.value is value or ev.value == value) and ev.supports(summary) for ev in entries)
@@ -0,0 +1,559 @@
+# core/history.py
+"""
+Append-only run history (see core.orchestrator.set_history / RUN_HISTORY=<dir>).
+
+record() serializes the run to JSON on the caller's thread (a snapshot: later
+changes to the result dict are not recorded) and queues it; a writer thread
+appends queued runs in batches to a memory-mapped segment file. Each writing
+process owns its own active segment, so server/batch worker processes can share
+one directory without locks.
+
+On disk, per segment:
+    <stem>.open / <stem>.seg   "RUNHIST1", then records: u32 length, u32 crc32, JSON
+    <stem>.idx                 fixed 32-byte entries: ts, prompt hash, tool hash,
+                               offset, length, complete flag
+Segments are preallocated to `segment_bytes`, written through mmap, and sealed
+(truncated, renamed to .seg) when full or when the history is closed. Entries
+are in timestamp order within a segment, so query() bisects each segment's
+index on time and filters on prompt/tool/outcome without reading records;
+only matches are decoded.
+
+Rotation drops the oldest sealed segments past `max_bytes`. Compaction merges
+undersized sealed segments (left behind by short-lived processes) into full
+ones, optionally dropping records older than `max_age_s`. Segments left open by
+a process that died are recovered up to their last intact record.
+
+Queries see a run once it has been written (at most `flush_interval_s` later; flush() forces it).
+A batch that fails to write (disk full, I/O error) is dropped and logged; the writer
+seals its segment, starts a new one with the next batch and keeps running.
+"""
+import atexit
+import bisect
+import heapq
+import json
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"RUNHIST1"
+_REC = struct.Struct("<II")            # payload length, crc32
+_ENTRY = struct.Struct("<dQIIIB3x")   # ts, prompt hash, tool hash, offset, length, complete
+
+# Queue items besides (ts, prompt, result) runs
+_STOP = object()
+
+
+def prompt_hash(prompt: str) -> int:
+    import hashlib
+    return int.from_bytes(hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def tool_hash(tool: str) -> int:
+    return zlib.crc32(tool.encode("utf-8"))
+
+
+def run_tool(result: Dict[str, Any]) -> str:
+    """The tool a run chose, e.g. "math.div" or "echo" ("" if none)."""
+    for step in result.get("plan") or ():
+        tool = step.get("tool")
+        if tool:
+            op = (step.get("inputs") or {}).get("op")
+            return f"{tool}.{op}" if op else tool
+    return ""
+
+
+def _outcome_complete(result: Dict[str, Any]) -> bool:
+    return bool((result.get("outcome") or {}).get("complete"))
+
+
+def _entry(ts: float, prompt: str, tool: str, complete: bool, offset: int, length: int) -> bytes:
+    return _ENTRY.pack(ts, prompt_hash(prompt), tool_hash(tool), offset, length, complete)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _Segment:
+    """The active, memory-mapped segment of this process's writer."""
+
+    def __init__(self, directory: str, stem: str, size: int):
+        self.stem = stem
+        self.path = os.path.join(directory, stem + ".open")
+        self.idx_path = os.path.join(directory, stem + ".idx")
+        self.size = size
+        self._fh = open(self.path, "w+b")
+        self._fh.truncate(size)
+        self.mm = mmap.mmap(self._fh.fileno(), size)
+        self.mm[:len(MAGIC)] = MAGIC
+        self.pos = len(MAGIC)
+        self.records = 0
+        self.idx = open(self.idx_path, "ab")
+
+    def append(self, payload: bytes) -> Tuple[int, int]:
+        offset, end = self.pos, self.pos + _REC.size + len(payload)
+        self.mm[offset:offset + _REC.size] = _REC.pack(len(payload), zlib.crc32(payload))
+        self.mm[offset + _REC.size:end] = payload
+        self.pos = end
+        self.records += 1
+        return offset, end - offset
+
+    def seal(self) -> Optional[str]:
+        """Truncate to the written size and rename to .seg; returns its path (None if it was empty)."""
+        self.mm.close()
+        self._fh.truncate(self.pos)
+        self._fh.close()
+        self.idx.close()
+        if not self.records:
+            os.unlink(self.path)
+            os.unlink(self.idx_path)
+            return None
+        sealed = self.path[:-len(".open")] + ".seg"
+        os.replace(self.path, sealed)
+        return sealed
+
+
+class _Reader:
+    """Index and read-only map of one segment, refreshed as its writer appends."""
+
+    def __init__(self, directory: str, stem: str, ext: str):
+        self.stem = stem
+        self.ext = ext
+        self.path = os.path.join(directory, stem + ext)
+        self.idx_path = os.path.join(directory, stem + ".idx")
+        self.entries: List[tuple] = []
+        self.ts: List[float] = []
+        self._idx_read = 0
+        self._mm: Optional[mmap.mmap] = None
+        self._mapped = 0
+
+    def refresh(self) -> None:
+        try:
+            with open(self.idx_path, "rb") as fh:
+                fh.seek(self._idx_read)
+                data = fh.read()
+        except FileNotFoundError:
+            return
+        data = data[:len(data) - len(data) % _ENTRY.size]  # ignore a torn trailing entry
+        if data:
+            new = list(_ENTRY.iter_unpack(data))
+            self.entries.extend(new)
+            self.ts.extend(e[0] for e in new)
+            self._idx_read += len(data)
+
+    def raw(self, offset: int, length: int) -> bytes:
+        """A whole record (header and payload) as written."""
+        end = offset + length
+        if self._mm is None or end > self._mapped:
+            self.close()
+            with open(self.path, "rb") as fh:
+                self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped = len(self._mm)
+        return self._mm[offset:end]
+
+    def read(self, offset: int, length: int) -> Dict[str, Any]:
+        return json.loads(self.raw(offset, length)[_REC.size:])
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+            self._mapped = 0
+
+
+def _scan(path: str) -> Iterator[Tuple[int, int, bytes]]:
+    """(offset, length, payload) of every intact record of a segment file."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if not data.startswith(MAGIC):
+        return
+    pos = len(MAGIC)
+    while pos + _REC.size <= len(data):
+        n, crc = _REC.unpack_from(data, pos)
+        end = pos + _REC.size + n
+        if n == 0 or end > len(data) or zlib.crc32(data[pos + _REC.size:end]) != crc:
+            return
+        yield pos, end - pos, data[pos + _REC.size:end]
+        pos = end
+
+
+class RunHistory:
+    """Run history in directory `path`; rotation, retention and compaction are automatic."""
+
+    def __init__(self, path: str, segment_bytes: int = 8 * 1024 * 1024,
+                 max_bytes: int = 256 * 1024 * 1024, flush_interval_s: float = 0.2,
+                 batch_size: int = 256, compact_min_segments: int = 4):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self.compact_min_segments = compact_min_segments
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0  # batches lost to write errors
+        self.last_error: Optional[BaseException] = None
+        self._seq = 0
+        os.makedirs(path, exist_ok=True)
+        self._reset_writer()
+        atexit.register(self.close)
+
+    # -- writing ----------------------------------------------------------
+    def _reset_writer(self) -> None:
+        self._pid = os.getpid()
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._segment: Optional[_Segment] = None
+        self._last_ts = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._readers: Dict[str, _Reader] = {}
+        self._read_lock = threading.Lock()
+
+    def record(self, prompt: str, result: Dict[str, Any]) -> None:
+        """Snapshot one finished run and queue it for the writer thread."""
+        ts = time.time()
+        try:
+            body = json.dumps(result, separators=(",", ":"))
+        except (TypeError, ValueError, RuntimeError):
+            self.dropped += 1
+            return
+        if self._thread is None or self._pid != os.getpid():
+            self._start()
+        self._queue.put((ts, prompt, body, run_tool(result), _outcome_complete(result)))
+
+    def _start(self) -> None:
+        if self._pid != os.getpid():
+            # Forked child: the parent's writer thread and segment are not ours
+            self._reset_writer()
+            mp_util = sys.modules.get("multiprocessing.util")
+            if mp_util is not None:
+                # Pool workers leave via os._exit, which skips atexit
+                mp_util.Finalize(self, self.close, exitpriority=10)
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_loop, name="run-history", daemon=True)
+                self._thread.start()
+
+    def _write_loop(self) -> None:
+        self._maintain(startup=True)
+        q = self._queue
+        while True:
+            try:
+                items = [q.get(timeout=self.flush_interval_s)]
+            except queue.Empty:
+                continue
+            while len(items) < self.batch_size:
+                try:
+                    items.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            written = self.written
+            try:
+                self._write(items)
+            except Exception as e:
+                self._write_failed(e, sum(type(i) is tuple for i in items) - (self.written - written))
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if any(item is _STOP for item in items):
+                if self._segment is not None:
+                    self._segment.seal()
+                    self._segment = None
+                return
+
+    def _write_failed(self, error: Exception, lost: int) -> None:
+        import logging
+        self.errors += 1
+        self.dropped += lost
+        self.last_error = error
+        logging.getLogger(__name__).warning("run history: %d run(s) dropped after a write error: %s", lost, error)
+        seg, self._segment = self._segment, None
+        if seg is not None:
+            try:
+                seg.seal()  # keep what it holds; the next batch starts a new segment
+            except Exception:
+                pass
+
+    def _write(self, items: List[Any]) -> None:
+        entries = []
+        for item in items:
+            if type(item) is not tuple:  # _STOP or a flush() event
+                continue
+            ts, prompt, body, tool, complete = item
+            ts = max(ts, self._last_ts)  # keep each segment's index sorted by time
+            # Same bytes as json.dumps({"ts", "prompt", "result"}), around the snapshot
+            payload = ('{"ts":%s,"prompt":%s,"result":%s}' % (json.dumps(ts), json.dumps(prompt), body)).encode("utf-8")
+            self._last_ts = ts
+            seg = self._segment
+            if seg is None or seg.pos + _REC.size + len(payload) > seg.size:
+                if entries:
+                    seg.idx.write(b"".join(entries))
+                    entries = []
+                seg = self._rotate(_REC.size + len(payload))
+            offset, length = seg.append(payload)
+            entries.append(_entry(ts, prompt, tool, complete, offset, length))
+            self.written += 1
+        if entries:
+            # Index after data, so an entry never points at a record not yet written
+            self._segment.idx.write(b"".join(entries))
+            self._segment.idx.flush()
+
+    def _new_stem(self, ts: float) -> str:
+        self._seq += 1
+        return f"{int(ts * 1e9):020d}-{os.getpid()}-{self._seq}"
+
+    def _rotate(self, need: int) -> _Segment:
+        if self._segment is not None:
+            self._segment.seal()
+            self._segment = None
+            self._maintain()
+        size = max(self.segment_bytes, len(MAGIC) + need)
+        self._segment = _Segment(self.path, self._new_stem(time.time()), size)
+        return self._segment
+
+    def flush(self, timeout: Optional[float] = 30.0) -> bool:
+        """Wait until every run recorded so far is written (or dropped); False on timeout."""
+        if self._thread is None or self._pid != os.getpid():
+            return True
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Write what is queued and seal the active segment."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        with self._read_lock:
+            for r in self._readers.values():
+                r.close()
+            self._readers.clear()
+
+    # -- maintenance ------------------------------------------------------
+    def _files(self, ext: str) -> List[str]:
+        return sorted(n[:-len(ext)] for n in os.listdir(self.path) if n.endswith(ext))
+
+    def _size(self, stem: str) -> int:
+        return os.path.getsize(os.path.join(self.path, stem + ".seg"))
+
+    def _maintain(self, startup: bool = False) -> None:
+        # Runs on the writer thread; a failure here must not stop writes
+        try:
+            if startup:
+                self.recover()
+            else:
+                self._enforce_retention()
+            small = [s for s in self._files(".seg") if self._size(s) < self.segment_bytes // 2]
+            if len(small) >= self.compact_min_segments:
+                self.compact()
+        except OSError:
+            pass
+
+    def _exclusive(self) -> Any:
+        """Open and lock the directory's maintenance lock file; None if another process holds it."""
+        import fcntl
+        fh = open(os.path.join(self.path, ".maintenance.lock"), "w")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            fh.close()
+            return None
+        return fh
+
+    def recover(self) -> int:
+        """Seal segments left open by dead processes, up to their last intact record."""
+        lock = self._exclusive()
+        if lock is None:
+            return 0
+        recovered = 0
+        with lock:
+            for stem in self._files(".open"):
+                pid = int(stem.split("-")[1])
+                if pid == os.getpid() or _pid_alive(pid):
+                    continue
+                base = os.path.join(self.path, stem)
+                entries, end = [], len(MAGIC)
+                for offset, length, payload in _scan(base + ".open"):
+                    rec = json.loads(payload)
+                    entries.append(_entry(rec["ts"], rec["prompt"], run_tool(rec["result"]),
+                                          _outcome_complete(rec["result"]), offset, length))
+                    end = offset + length
+                with open(base + ".idx", "wb") as fh:
+                    fh.write(b"".join(entries))
+                if entries:
+                    os.truncate(base + ".open", end)
+                    os.replace(base + ".open", base + ".seg")
+                else:
+                    os.unlink(base + ".open")
+                    os.unlink(base + ".idx")
+                recovered += 1
+        return recovered
+
+    def _remove(self, stem: str) -> None:
+        base = os.path.join(self.path, stem)
+        for ext in (".seg", ".idx"):
+            try:
+                os.unlink(base + ext)
+            except FileNotFoundError:
+                pass
+
+    def _enforce_retention(self) -> None:
+        # Under the maintenance lock: a compaction elsewhere may be replacing these segments
+        lock = self._exclusive()
+        if lock is None:
+            return  # the process holding it enforces retention after its own rotation
+        with lock:
+            sealed = self._files(".seg")
+            sizes = {s: self._size(s) for s in sealed}
+            total = sum(sizes.values())
+            for stem in sealed:
+                if total <= self.max_bytes:
+                    break
+                self._remove(stem)
+                total -= sizes[stem]
+
+    def compact(self, max_age_s: Optional[float] = None) -> int:
+        """
+        Merge undersized sealed segments into as few full ones as possible (every sealed
+        segment when max_age_s is given, dropping records older than that).
+        Returns the number of segments replaced; 0 if another process is compacting.
+        """
+        lock = self._exclusive()
+        if lock is None:
+            return 0
+        with lock:
+            stems = [s for s in self._files(".seg")
+                     if max_age_s is not None or self._size(s) < self.segment_bytes // 2]
+            if len(stems) < 2 and max_age_s is None:
+                return 0
+            cutoff = time.time() - max_age_s if max_age_s is not None else None
+            readers = [_Reader(self.path, s, ".seg") for s in stems]
+            for r in readers:
+                r.refresh()
+            merged = heapq.merge(*([(e, r) for e in r.entries] for r in readers), key=lambda x: x[0][0])
+            stem, fh, idx, pos = None, None, [], 0
+            for (ts, ph, th, offset, length, complete), r in merged:
+                if cutoff is not None and ts < cutoff:
+                    continue
+                raw = r.raw(offset, length)
+                if fh is None or (pos + len(raw) > self.segment_bytes and idx):
+                    if fh is not None:
+                        self._publish(stem, fh, idx)
+                    stem = self._new_stem(ts)
+                    fh = open(os.path.join(self.path, stem + ".tmp"), "wb")
+                    fh.write(MAGIC)
+                    idx, pos = [], len(MAGIC)
+                fh.write(raw)
+                idx.append(_ENTRY.pack(ts, ph, th, pos, len(raw), complete))
+                pos += len(raw)
+            if fh is not None:
+                self._publish(stem, fh, idx)
+            for r in readers:
+                r.close()
+                self._remove(r.stem)
+            return len(stems)
+
+    def _publish(self, stem: str, fh: Any, idx: List[bytes]) -> None:
+        fh.close()
+        base = os.path.join(self.path, stem)
+        with open(base + ".idx", "wb") as ih:
+            ih.write(b"".join(idx))
+        # The index must exist before the segment becomes visible to readers
+        os.replace(base + ".tmp", base + ".seg")
+
+    # -- reading ----------------------------------------------------------
+    def _refresh_readers(self) -> List[_Reader]:
+        names = {}
+        for n in os.listdir(self.path):
+            stem, ext = os.path.splitext(n)
+            if ext in (".seg", ".open"):
+                names[stem] = ext
+        for stem in list(self._readers):
+            r = self._readers[stem]
+            if names.get(stem) != r.ext:  # compacted away, or sealed since last read
+                r.close()
+                del self._readers[stem]
+        for stem, ext in names.items():
+            if stem not in self._readers:
+                self._readers[stem] = _Reader(self.path, stem, ext)
+        readers = [self._readers[s] for s in sorted(self._readers)]
+        for r in readers:
+            r.refresh()
+        return readers
+
+    def query(self, *, prompt: Optional[str] = None, tool: Optional[str] = None,
+              complete: Optional[bool] = None, since: Optional[float] = None,
+              until: Optional[float] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Recorded runs matching every given filter, oldest first, as {"ts", "prompt", "result"}.
+        tool is run_tool()'s name (e.g. "math.div"); since/until are unix timestamps (inclusive).
+        """
+        ph = prompt_hash(prompt) if prompt is not None else None
+        th = tool_hash(tool) if tool is not None else None
+        with self._read_lock:
+            readers = self._refresh_readers()
+
+            def matches(r: _Reader) -> Iterator[tuple]:
+                lo = bisect.bisect_left(r.ts, since) if since is not None else 0
+                hi = bisect.bisect_right(r.ts, until) if until is not None else len(r.ts)
+                for e in r.entries[lo:hi]:
+                    if (ph is None or e[1] == ph) and (th is None or e[2] == th) \
+                            and (complete is None or bool(e[5]) == complete):
+                        yield e, r
+
+            out: List[Dict[str, Any]] = []
+            for e, r in heapq.merge(*(matches(r) for r in readers), key=lambda x: x[0][0]):
+                try:
+                    rec = r.read(e[3], e[4])
+                except FileNotFoundError:
+                    continue  # compacted away meanwhile; its records live on in the new segment
+                if prompt is not None and rec["prompt"] != prompt:
+                    continue  # hash collision
+                out.append(rec)
+                if limit is not None and len(out) >= limit:
+                    break
+            return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._read_lock:
+            readers = self._refresh_readers()
+            return {
+                "records": sum(len(r.entries) for r in readers),
+                "segments": len(readers),
+                "bytes": sum(os.path.getsize(r.path) for r in readers if r.ext == ".seg"),
+                "written": self.written,
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
+
+
+def from_env() -> Optional[RunHistory]:
+    """
+    Build the history selected by RUN_HISTORY (a directory), or None when unset.
+    RUN_HISTORY_SEGMENT_MB and RUN_HISTORY_MAX_MB tune rotation and retention.
+    """
+    path = os.getenv("RUN_HISTORY", "").strip()
+    if not path:
+        return None
+    kw: Dict[str, Any] = {}
+    if os.getenv("RUN_HISTORY_SEGMENT_MB"):
+        kw["segment_bytes"] = int(float(os.environ["RUN_HISTORY_SEGMENT_MB"]) * 1024 * 1024)
+    if os.getenv("RUN_HISTORY_MAX_MB"):
+        kw["max_bytes"] = int(float(os.environ["RUN_HISTORY_MAX_MB"]) * 1024 * 1024)
+    return RunHistory(path, **kw)
@@ -0,0 +1,264 @@
+# core/llm.py
+"""
+Shared OpenAI clients for the planner and executor.
+
+Clients are created once per process (sync) / per event loop (async) and reused, so
+connection pools are shared across calls. Tests and services can inject their own
+client (anything exposing .chat.completions.create) with set_client()/set_async_client().
+
+Completions are memoized on (model, messages, temperature) in a bounded LRU, and
+concurrent identical requests share one upstream call. LLM_MEMO_SIZE=0 turns both off.
+
+Upstream requests are checked against and charged to the current core.budget Budget;
+memo hits and coalesced callers are free.
+"""
+import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from core import budget, retry, tracing
+
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import Future
+
+# Per-call timeout (seconds) applied to every completion request
+DEFAULT_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "30"))
+# Connection pool size for the shared async client
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+
+# Max memoized completions (LRU); 0 disables memoization and request coalescing
+MEMO_SIZE = int(os.getenv("LLM_MEMO_SIZE", "1024"))
+
+_lock = threading.Lock()
+_client: Any = None
+_injected_async: Any = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+_memo: "OrderedDict[str, Any]" = OrderedDict()
+_memo_lock = threading.Lock()
+_inflight: Dict[str, "Future"] = {}
+_ainflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = weakref.WeakKeyDictionary()
+memo_stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+
+def _memo_key(model: str, messages: List[Dict[str, str]], temperature: float) -> str:
+    return json.dumps([model, temperature, messages], sort_keys=True, separators=(",", ":"))
+
+
+def _memo_get(key: str) -> Any:
+    with _memo_lock:
+        resp = _memo.get(key)
+        if resp is None:
+            memo_stats["misses"] += 1
+            return None
+        _memo.move_to_end(key)
+        memo_stats["hits"] += 1
+        return resp
+
+
+def _memo_put(key: str, resp: Any) -> None:
+    with _memo_lock:
+        _memo[key] = resp
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+
+
+def clear_memo() -> None:
+    with _memo_lock:
+        _memo.clear()
+        for k in memo_stats:
+            memo_stats[k] = 0
+
+
+def set_memo_size(size: int) -> None:
+    """Resize the completion memo (0 disables memoization and coalescing)."""
+    global MEMO_SIZE
+    MEMO_SIZE = size
+    with _memo_lock:
+        while len(_memo) > max(size, 0):
+            _memo.popitem(last=False)
+
+
+def set_client(client: Any) -> None:
+    """Install (or with None, reset) the shared sync client."""
+    global _client
+    _client = client
+    clear_memo()
+
+
+def set_async_client(client: Any) -> None:
+    """Install (or with None, reset) the shared async client for every event loop."""
+    global _injected_async
+    _injected_async = client
+    _async_clients.clear()
+    clear_memo()
+
+
+def get_client() -> Any:
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from openai import OpenAI
+                # core.retry is the only retry layer: no built-in client retries underneath it
+                _client = OpenAI(timeout=DEFAULT_TIMEOUT_S, max_retries=0)
+    return _client
+
+
+def get_async_client() -> Any:
+    if _injected_async is not None:
+        return _injected_async
+    import asyncio
+    # httpx async pools are bound to the loop they were created on
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(
+            timeout=DEFAULT_TIMEOUT_S,
+            max_retries=0,  # retried by core.retry
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+                timeout=DEFAULT_TIMEOUT_S,
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def _check_budget() -> None:
+    b = budget.current()
+    if b is not None:
+        b.check()
+
+
+def _charge(model: str, messages: List[Dict[str, str]], resp: Any) -> None:
+    b = budget.current()
+    if b is not None:
+        b.charge_response(model, messages, resp)
+
+
+def _create(model: str, messages: List[Dict[str, str]], temperature: float, timeout: float) -> Any:
+    create = get_client().chat.completions.create
+
+    def attempt(**kw: Any) -> Any:
+        # Each request sent upstream is charged: retries, and hedged duplicates whose
+        # answer is not used (they finish on a helper thread, in this call's context)
+        resp = create(**kw)
+        _charge(model, messages, resp)
+        return resp
+
+    with tracing.span("llm", model=model):
+        # Retried on transient errors and hedged when slow (core.retry)
+        return retry.call(
+            "llm",
+            attempt,
+            hedge=True,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            timeout=timeout,
+        )
+
+
+def complete(model: str, messages: List[Dict[str, str]], temperature: float = 0.2,
+             timeout: Optional[float] = None) -> Any:
+    """
+    Blocking chat completion on the shared client; returns the raw response.
+    Raises core.budget.BudgetExceeded instead of calling upstream once the budget is spent.
+    """
+    timeout = timeout or DEFAULT_TIMEOUT_S
+    if MEMO_SIZE <= 0:
+        _check_budget()
+        return _create(model, messages, temperature, timeout)
+
+    key = _memo_key(model, messages, temperature)
+    resp = _memo_get(key)
+    if resp is not None:
+        return resp
+    _check_budget()
+    with _memo_lock:
+        fut = _inflight.get(key)
+        leader = fut is None
+        if leader:
+            from concurrent.futures import Future
+            fut = _inflight[key] = Future()
+        else:
+            memo_stats["coalesced"] += 1
+    if not leader:
+        return fut.result()
+    try:
+        resp = _create(model, messages, temperature, timeout)
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    else:
+        _memo_put(key, resp)
+        fut.set_result(resp)
+        return resp
+    finally:
+        with _memo_lock:
+            _inflight.pop(key, None)
+
+
+async def _acreate(key: Optional[str], model: str, messages: List[Dict[str, str]],
+                   temperature: float, timeout: float) -> Any:
+    import asyncio
+    client = get_async_client()
+
+    async def attempt():
+        # Each request sent upstream is charged (see _create). A hedged duplicate that
+        # loses is cancelled mid-flight; it is charged its estimated prompt tokens
+        coro = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            timeout=timeout,
+        )
+        try:
+            resp = await asyncio.wait_for(coro, timeout)
+        except asyncio.CancelledError:
+            b = budget.current()
+            if b is not None:
+                b.charge(model, sum(budget.estimate_tokens(m.get("content") or "") for m in messages), 0)
+            raise
+        _charge(model, messages, resp)
+        return resp
+
+    with tracing.span("llm", model=model):
+        resp = await retry.acall("llm", attempt, hedge=True)
+    if key is not None:
+        _memo_put(key, resp)
+    return resp
+
+
+async def acomplete(model: str, messages: List[Dict[str, str]], temperature: float = 0.2,
+                    timeout: Optional[float] = None) -> Any:
+    """Async chat completion on the shared client; raises asyncio.TimeoutError past `timeout`."""
+    timeout = timeout or DEFAULT_TIMEOUT_S
+    if MEMO_SIZE <= 0:
+        _check_budget()
+        return await _acreate(None, model, messages, temperature, timeout)
+
+    key = _memo_key(model, messages, temperature)
+    resp = _memo_get(key)
+    if resp is not None:
+        return resp
+    _check_budget()
+    import asyncio
+    inflight = _ainflight.setdefault(asyncio.get_running_loop(), {})
+    task = inflight.get(key)
+    if task is None:
+        # The upstream call runs as its own task so one caller being cancelled
+        # does not cancel it for the others
+        task = inflight[key] = asyncio.ensure_future(_acreate(key, model, messages, temperature, timeout))
+        task.add_done_callback(lambda _t: inflight.pop(key, None))
+    else:
+        memo_stats["coalesced"] += 1
+    return await asyncio.shield(task)
@@ -0,0 +1,325 @@
+# core/memory.py
+"""
+Run memory: past runs (prompt, chosen tool and inputs, outcome, and the plan when one
+was made by the LLM planner) searchable by prompt similarity, for agents.planner.make_plan.
+
+Each prompt is embedded as a fixed-size float32 feature vector (signed feature hashing
+of its words and word pairs, numbers folded together, L2-normalised) and stored as a
+row of one contiguous array, so a query is a single matrix-vector product plus an
+argpartition for the top k. Rows also carry a 32-bit SimHash signature; above
+`exact_below` rows a query first keeps the ~1/64 of rows whose signatures are nearest
+the query's in Hamming distance (one XOR + popcount pass over 4 bytes per row) and
+scores only those, which keeps 1M-row queries at a few milliseconds on one core at
+the price of approximate recall (see benchmarks/bench_recall.py).
+
+With a `path` the arrays are memory-mapped .npy files in that directory (grown by
+doubling) and the records are appended to records.jsonl, read back only for hits;
+a single process should write to a given directory. NumPy is imported when a memory
+is created, never by the offline CLI (RUN_MEMORY unset).
+"""
+import json
+import os
+import re
+import threading
+import zlib
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from core import config
+
+DIM = 64
+EXACT_BELOW = 65_536     # rows; larger memories use the signature prefilter
+PREFILTER_SHARE = 64     # the prefilter scores about 1/64 of the rows
+_SIG_BITS = 32
+_WORD_RE = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+_encode = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+
+@dataclass(slots=True, frozen=True)
+class Recall:
+    score: float                      # cosine similarity of the prompts
+    prompt: str
+    tool: Optional[str] = None
+    inputs: Optional[Dict[str, Any]] = None
+    complete: Optional[bool] = None
+    plan: Optional[List[Dict[str, Any]]] = None
+
+
+def normalize(prompt: str) -> str:
+    """`prompt` reduced to its lowercase words and numbers, numbers kept as written."""
+    return " ".join(_WORD_RE.findall(prompt.lower()))
+
+
+def features(prompt: str) -> Set[str]:
+    """The distinct words and adjacent word pairs of `prompt`; every number becomes '#'."""
+    words = ["#" if w[0].isdigit() else w for w in _WORD_RE.findall(prompt.lower())]
+    return set(words).union(f"{a} {b}" for a, b in zip(words, words[1:]))
+
+
+class RunMemory:
+    def __init__(self, path: Optional[str] = None, dim: int = DIM, capacity: int = 1024,
+                 exact_below: int = EXACT_BELOW):
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError("core.memory.RunMemory needs numpy (pip install numpy)") from e
+        self._np = np
+        self.path = path
+        self.dim = dim
+        self.exact_below = exact_below
+        self._lock = threading.Lock()
+        # Same hyperplanes in every process, so stored signatures stay comparable
+        self._planes = np.random.default_rng(dim).standard_normal((dim, _SIG_BITS)).astype(np.float32)
+        self._lines: List[bytes] = []  # in-memory records
+        self._offsets = array("q", [0])  # on disk: start of each record in records.jsonl, plus the end
+        self._fh: Any = None
+        self._count = 0
+        if path is None:
+            self._vecs, self._sigs = self._allocate(capacity)
+        else:
+            self._open(path, capacity)
+
+    # -- storage ----------------------------------------------------------
+    def _open(self, path: str, capacity: int) -> None:
+        np = self._np
+        os.makedirs(path, exist_ok=True)
+        records = os.path.join(path, "records.jsonl")
+        vecs_path = os.path.join(path, "vectors.npy")
+        if os.path.exists(vecs_path):
+            self._vecs = np.load(vecs_path, mmap_mode="r+")
+            self._sigs = np.load(os.path.join(path, "signatures.npy"), mmap_mode="r+")
+            if self._vecs.shape[1] != self.dim:
+                raise ValueError(f"{path}: stored vectors have dim {self._vecs.shape[1]}, not {self.dim}")
+        else:
+            self._vecs, self._sigs = self._allocate(capacity)
+        # One vectorised pass over the records file finds every line; a torn last line
+        # (crash mid-append) and rows written without a record are ignored
+        size = os.path.getsize(records) if os.path.exists(records) else 0
+        if size:
+            with open(records, "rb") as fh:
+                ends = np.flatnonzero(np.fromfile(fh, dtype=np.uint8) == 10) + 1
+            self._offsets.extend(ends.tolist())
+            if self._offsets[-1] != size:
+                with open(records, "r+b") as fh:
+                    fh.truncate(self._offsets[-1])
+        self._count = min(len(self._offsets) - 1, len(self._vecs))
+        self._fh = open(records, "ab")
+
+    def _allocate(self, capacity: int, old: Tuple[Any, ...] = ()) -> Tuple[Any, Any]:
+        # New (vectors, signatures) arrays holding the first _count rows of `old`
+        np = self._np
+        arrays = []
+        specs = (("vectors", (capacity, self.dim), np.float32), ("signatures", (capacity,), np.uint32))
+        for i, (name, shape, dtype) in enumerate(specs):
+            if self.path is None:
+                arr = np.zeros(shape, dtype)
+            else:
+                final = os.path.join(self.path, f"{name}.npy")
+                arr = np.lib.format.open_memmap(final + ".tmp", mode="w+", dtype=dtype, shape=shape)
+            if old:
+                arr[:self._count] = old[i][:self._count]
+            if self.path is not None:
+                arr.flush()
+                os.replace(final + ".tmp", final)
+            arrays.append(arr)
+        return arrays[0], arrays[1]
+
+    def _reserve(self, n: int) -> None:
+        need = self._count + n
+        if need > len(self._vecs):
+            capacity = len(self._vecs)
+            while capacity < need:
+                capacity *= 2
+            # Queries already running keep the arrays they took
+            self._vecs, self._sigs = self._allocate(capacity, (self._vecs, self._sigs))
+
+    # -- embedding --------------------------------------------------------
+    def embed(self, prompt: str) -> Any:
+        """The prompt's unit feature vector (all zeros for a prompt without words)."""
+        vec = [0.0] * self.dim
+        dim = self.dim
+        for f in features(prompt):
+            h = zlib.crc32(f.encode("utf-8"))
+            vec[h % dim] += 1.0 if h & 0x80000000 else -1.0
+        v = self._np.array(vec, dtype=self._np.float32)
+        norm = float(self._np.linalg.norm(v))
+        return v / norm if norm else v
+
+    def _signatures(self, vecs: Any) -> Any:
+        np = self._np
+        bits = np.packbits((vecs @ self._planes) > 0, axis=-1, bitorder="little")
+        return bits.view("<u4").reshape(vecs.shape[:-1])
+
+    # -- writes -----------------------------------------------------------
+    def record(self, prompt: str, tool: Optional[str] = None, inputs: Optional[Dict[str, Any]] = None,
+               complete: Optional[bool] = None, plan: Optional[List[Dict[str, Any]]] = None) -> None:
+        self.extend([(prompt, {"tool": tool, "inputs": inputs, "complete": complete, "plan": plan})])
+
+    def extend(self, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Store many (prompt, fields) pairs at once; fields are any of tool, inputs,
+        complete and plan. Returns the number stored.
+        """
+        prompts, lines = [], []
+        for prompt, fields in entries:
+            prompts.append(prompt)
+            record = {"prompt": prompt, **{k: v for k, v in fields.items() if v is not None}}
+            lines.append(_encode(record).encode("utf-8") + b"\n")
+        if not prompts:
+            return 0
+        np = self._np
+        embedded: Dict[str, Any] = {}  # bulk imports repeat prompts; embed each once
+        vecs = np.stack([embedded.get(p) if p in embedded else embedded.setdefault(p, self.embed(p))
+                         for p in prompts])
+        sigs = self._signatures(vecs)
+        with self._lock:
+            self._reserve(len(prompts))
+            start = self._count
+            self._vecs[start:start + len(prompts)] = vecs
+            self._sigs[start:start + len(prompts)] = sigs
+            if self._fh is None:
+                self._lines.extend(lines)
+            else:
+                # Rows first, then their records: a row only counts once its record is written
+                self._fh.write(b"".join(lines))
+                end = self._offsets[-1]
+                for line in lines:
+                    end += len(line)
+                    self._offsets.append(end)
+            self._count = start + len(prompts)
+        return len(prompts)
+
+    def remember_run(self, prompt: str, result: Dict[str, Any]) -> None:
+        """Record an orchestrator run() result: plan-2's tool choice and the outcome."""
+        choice = next((s for s in result.get("plan") or () if s.get("id") == "plan-2"), None) or {}
+        self.record(prompt, tool=choice.get("tool"), inputs=choice.get("inputs"),
+                    complete=(result.get("outcome") or {}).get("complete"))
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._vecs.flush()
+                self._sigs.flush()
+                self._fh.flush()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+                self._lines = []
+
+    def __enter__(self) -> "RunMemory":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    # -- reads ------------------------------------------------------------
+    def _record_at(self, row: int) -> Dict[str, Any]:
+        if self.path is None:
+            return json.loads(self._lines[row])
+        with self._lock:
+            self._fh.flush()
+        start, end = self._offsets[row], self._offsets[row + 1]
+        with open(os.path.join(self.path, "records.jsonl"), "rb") as fh:
+            fh.seek(start)
+            return json.loads(fh.read(end - start))
+
+    def _candidates(self, q: Any, sigs: Any, n: int, k: int) -> Any:
+        # Rows whose signature is nearest the query's: the smallest Hamming radius
+        # that admits about 1/PREFILTER_SHARE of the rows (and at least 64 per result)
+        np = self._np
+        qsig = self._signatures(q[None, :])[0]
+        dist = _popcount(np, sigs[:n] ^ qsig)
+        # Radius from the distance histogram of a 1-in-16 sample of the rows
+        within = np.cumsum(np.bincount(dist[::16], minlength=_SIG_BITS + 1))
+        radius = int(np.searchsorted(within, max(64 * k, n // PREFILTER_SHARE) // 16))
+        return np.flatnonzero(dist <= radius)
+
+    def similar(self, prompt: str, k: Optional[int] = None, *, exact: Optional[bool] = None,
+                min_score: float = 0.0) -> List[Recall]:
+        """
+        The k stored runs whose prompts are most similar to `prompt`, best first
+        (k defaults to the config's memory.topk). exact=None searches exhaustively
+        below exact_below rows and through the signature prefilter above.
+        """
+        np = self._np
+        k = k or config.settings().memory.topk
+        with self._lock:
+            vecs, sigs, n = self._vecs, self._sigs, self._count
+        if n == 0:
+            return []
+        q = self.embed(prompt)
+        if not q.any():
+            return []
+        rows = None
+        if not (exact if exact is not None else n <= self.exact_below):
+            rows = self._candidates(q, sigs, n, k)
+        scores = vecs[:n] @ q if rows is None else vecs[rows] @ q
+        out = []
+        for i in _top_k(np, scores, k).tolist():
+            score = float(scores[i])
+            if score < min_score:
+                break
+            rec = self._record_at(i if rows is None else int(rows[i]))
+            out.append(Recall(score, rec["prompt"], rec.get("tool"), rec.get("inputs"),
+                              rec.get("complete"), rec.get("plan")))
+        return out
+
+
+def _top_k(np: Any, scores: Any, k: int) -> Any:
+    """Indices of the k largest scores, largest first."""
+    if len(scores) <= k:
+        top = np.arange(len(scores))
+    else:
+        # The top k of unit-vector cosines usually sit above a high cut; partitioning
+        # just those avoids argpartition over a million near-equal values
+        top = None
+        for cut in (0.8, 0.6, 0.4):
+            above = np.flatnonzero(scores >= cut)
+            if len(above) >= k:
+                top = above[np.argpartition(scores[above], len(above) - k)[len(above) - k:]]
+                break
+        if top is None:
+            top = np.argpartition(scores, len(scores) - k)[len(scores) - k:]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def _popcount(np: Any, x: Any) -> Any:
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(x)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return table[x.view(np.uint8)].reshape(-1, 4).sum(axis=1, dtype=np.uint8)
+
+
+# -------------------------------------------------------------------
+# Process-wide memory (off unless RUN_MEMORY is set or set_default is called)
+# -------------------------------------------------------------------
+_UNSET = object()
+_default: Any = _UNSET
+
+
+def from_env() -> Optional[RunMemory]:
+    """Build the memory selected by RUN_MEMORY ("memory" or a directory), or None when unset."""
+    spec = os.getenv("RUN_MEMORY", "").strip()
+    if not spec:
+        return None
+    return RunMemory(None if spec == "memory" else spec)
+
+
+def get_default() -> Optional[RunMemory]:
+    global _default
+    if _default is _UNSET:
+        _default = from_env()
+    return _default
+
+
+def set_default(memory: Optional[RunMemory]) -> None:
+    global _default
+    _default = memory
@@ -0,0 +1,38 @@
+# core/models.py
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from core.state import StepState
+
+# Optional: Pydantic models (you can keep these if you want them later)
+class PlanStep(BaseModel):
+    id: str
+    description: str
+    tool: Optional[str] = None
+    inputs: Dict[str, Any] = Field(default_factory=dict)
+    acceptance: Optional[str] = None
+    depends_on: Optional[List[str]] = None
+    attempts: int = 0
+    max_attempts: int = 2
+    done: bool = False
+    result: Optional[Any] = None
+    state: StepState = StepState.PLANNED
+    # optional fields the executor may set
+    reason: Optional[Dict[str, Any]] = None
+    criteria: Optional[Dict[str, Any]] = None
+
+class AgentState(BaseModel):
+    task_id: str
+    user_goal: str
+    constraints: Dict[str, Any] = Field(default_factory=dict)
+    plan: List[PlanStep] = Field(default_factory=list)
+    # Not filled in by the orchestrator: evidence is recorded per step (Step.evidence)
+    # and indexed per run by core.evidence.EvidenceStore
+    evidence: List[Dict[str, Any]] = Field(default_factory=list)
+    trace: List[Dict[str, Any]] = Field(default_factory=list)
+    status: str = "initial"
+    outcome: Optional[str] = None
+
+class PlanRequest(BaseModel):
+    goal: str
+    constraints: Dict[str, Any]
@@ -1,100 +1,789 @@
 # core/orchestrator.py
 import importlib
-from typing import Callable, Dict, Any, List
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
 
 #from agents.planner import create_initial_plan
 import agents.planner as planner
-from agents.executor import run_step
+from agents.executor import run_step, arun_step, batch_math_inputs, run_math_batch
 from agents.critic import evaluate, summarize_trace
 from agents import router
+import agents.executor as executor
+from core import budget as budget_mod
+from core import cache as run_cache
+from core import config
+from core import history as run_history
+from core import memory as run_memory
+from core import scheduler
+from core import tracing
+from core.state import Step, StepState
+
+if TYPE_CHECKING:  # imported lazily at runtime to keep CLI startup fast
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
 
 # -------------------------------------------------------------------
 # Dynamic tool registry (keeps your existing design)
+# Built-in entries come from core.config.DEFAULT_TOOLS; the config's `tools:` section
+# is applied on top of them and re-applied whenever the settings snapshot is reloaded.
+# The registry is copy-on-write: every change publishes a new dict, so readers (run
+# cache keys, get_tool) always see one whole registry, never a half-applied one.
 # -------------------------------------------------------------------
-_TOOL_REGISTRY: Dict[str, str] = {
-    "echo.say": "tools.echo:run",        # expects run(text=...)
-    "math.add": "tools.math_tool:run",   # expects run(a=..., b=...)
-}
+_TOOL_REGISTRY: Dict[str, str] = dict(config.DEFAULT_TOOLS)
+_registry_lock = threading.Lock()
 
-def get_tool(name: str) -> Callable[..., Any]:
-    if name not in _TOOL_REGISTRY:
+# Resolved callables: name -> (registry spec it was resolved from, callable).
+# An entry is only used while _TOOL_REGISTRY still maps the name to the same spec,
+# so direct edits to the registry invalidate it too.
+_RESOLVED: Dict[str, Any] = {}
+
+# "eager": resolve every registered tool at import; "lazy": resolve on first use
+TOOL_RESOLUTION = os.getenv("TOOL_RESOLUTION", "eager")
+
+# Tools run in worker processes (core.toolpool) instead of in-process, e.g. CPU-heavy
+# or untrusted ones; the rest (echo, plain math) keep the in-process fast path
+_ISOLATED: Set[str] = {n.strip() for n in os.getenv("TOOL_ISOLATE", "").split(",") if n.strip()}
+_TOOL_POOL: Any = None
+_tool_pool_lock = threading.Lock()
+
+
+def _tool_pool() -> Any:
+    """The pool isolated tools run on; started (pre-warmed with their modules) on first use."""
+    global _TOOL_POOL
+    if _TOOL_POOL is None:
+        with _tool_pool_lock:
+            if _TOOL_POOL is None:
+                from core import toolpool
+                _TOOL_POOL = toolpool.from_env(_TOOL_REGISTRY[n] for n in sorted(_ISOLATED) if n in _TOOL_REGISTRY)
+    return _TOOL_POOL
+
+
+def set_tool_pool(pool: Any) -> None:
+    """Run isolated tools on `pool` (a core.toolpool.ToolPool); None starts a default one on demand."""
+    global _TOOL_POOL
+    _TOOL_POOL = pool
+
+
+def isolate_tool(name: str, isolated: bool = True) -> None:
+    """Run tool `name` on the process pool (or, with isolated=False, in-process again)."""
+    (_ISOLATED.add if isolated else _ISOLATED.discard)(name)
+    invalidate_tools(name)
+
+
+def _isolated(spec: str) -> Callable[..., Any]:
+    def call(**kw: Any) -> Any:
+        return _tool_pool().call(spec, kw)
+    return call
+
+
+def _resolve(name: str, spec: Optional[str] = None) -> Callable[..., Any]:
+    spec = spec or _TOOL_REGISTRY.get(name)
+    if spec is None:
         raise ValueError(f"Unknown tool: {name}")
-    module_name, func_name = _TOOL_REGISTRY[name].split(":")
+    if name in _ISOLATED:
+        return _isolated(spec)
+    module_name, func_name = spec.split(":")
     mod = importlib.import_module(module_name)
     return getattr(mod, func_name)
 
+
+def get_tool(name: str) -> Callable[..., Any]:
+    spec = _TOOL_REGISTRY.get(name)
+    hit = _RESOLVED.get(name)
+    if hit is not None and hit[0] == spec:
+        return hit[1]
+    fn = _resolve(name, spec)
+    _RESOLVED[name] = (spec, fn)
+    return fn
+
+
+def warm(names: Optional[Iterable[str]] = None, *, start_pool: bool = True) -> None:
+    """
+    Resolve (import) the given tools, or every registered tool, ahead of the first call;
+    starts the tool process pool too if any of them is isolated (unless start_pool=False).
+    """
+    names = list(_TOOL_REGISTRY) if names is None else list(names)
+    for name in names:
+        get_tool(name)
+    if start_pool and _ISOLATED.intersection(names):
+        _tool_pool()
+
+
+def invalidate_tools(name: Optional[str] = None) -> None:
+    """Drop one resolved tool (or all of them), e.g. after reloading a tool module."""
+    if name is None:
+        _RESOLVED.clear()
+    else:
+        _RESOLVED.pop(name, None)
+
+
+def _publish(registry: Dict[str, str]) -> None:
+    """Make `registry` the current registry in one assignment (call with _registry_lock held)."""
+    global _TOOL_REGISTRY
+    old = _TOOL_REGISTRY
+    changed = [n for n in old.keys() | registry.keys() if old.get(n) != registry.get(n)]
+    _TOOL_REGISTRY = registry
+    for name in changed:
+        invalidate_tools(name)
+    router.set_tools(registry)
+    if TOOL_RESOLUTION == "eager":
+        for name in changed:
+            if name in registry:
+                get_tool(name)
+
+
+def register_tool(name: str, target: str) -> None:
+    """Add or replace a registry entry ("module:function")."""
+    with _registry_lock:
+        _publish({**_TOOL_REGISTRY, name: target})
+
+
+def unregister_tool(name: str) -> None:
+    with _registry_lock:
+        _publish({n: s for n, s in _TOOL_REGISTRY.items() if n != name})
+
+
+_config_tools: Dict[str, str] = {}  # entries the current snapshot put in the registry
+
+
+def _apply_config_tools(settings: config.Settings) -> None:
+    """Sync the registry with a snapshot's tools; entries changed by register_tool() since are left alone."""
+    global _config_tools
+    new = dict(settings.tools)
+    with _registry_lock:
+        registry = dict(_TOOL_REGISTRY)
+        for name, spec in _config_tools.items():
+            if name not in new and registry.get(name) == spec:
+                if name in config.DEFAULT_TOOLS:
+                    registry[name] = config.DEFAULT_TOOLS[name]
+                else:
+                    del registry[name]
+        for name, spec in new.items():
+            current = registry.get(name)
+            if current != spec and current == _config_tools.get(name, config.DEFAULT_TOOLS.get(name)):
+                registry[name] = spec
+        _publish(registry)
+        _config_tools = new
+
 # -------------------------------------------------------------------
 # Adapter so agents/executor can call tools.math(**kw) / tools.echo(**kw)
 # -------------------------------------------------------------------
-# core/orchestrator.py (replace the whole ToolRegistry class)
 class ToolRegistry:
     @staticmethod
     def math(**kw):
         """
-        Delegate to tools.math_tool.math(op,a,b).
-        For pure addition, we still support the dynamic registry route.
+        Delegate to tools.math_tool via the registry: math.add for addition,
+        math.calc (math_tool.math) for sub/mul/div and ZeroDivisionError,
+        math.expr for a whole expression (op="expr", expr="...").
         """
         op = kw.get("op")
+        if op == "expr":
+            return get_tool("math.expr")(expr=kw["expr"])
         a = kw.get("a")
         b = kw.get("b")
 
         # Fast path for add via dynamic registry (keeps your original design)
         if op == "add":
-            fn = get_tool("math.add")  # -> tools.math_tool:run(a,b)
-            return fn(a=a, b=b)
-
-        # General path uses math_tool.math(...) which handles sub/mul/div and ZeroDivisionError
-        from tools import math_tool
-        if hasattr(math_tool, "math"):
-            return math_tool.math(op=op, a=a, b=b)
-
-        # As a last resort, implement inline
-        if op == "sub":
-            return (a - b)
-        if op == "mul":
-            return (a * b)
-        if op == "div":
-            if b == 0:
-                raise ZeroDivisionError("Division by zero")
-            return (a / b)
-
-        raise ValueError(f"Unsupported math op: {op}")
+            return get_tool("math.add")(a=a, b=b)  # -> tools.math_tool:run(a,b)
+        return get_tool("math.calc")(op=op, a=a, b=b)
+
+    @staticmethod
+    def math_batch(**kw):
+        """
+        Vectorized math over equal-length ops/a/b sequences (tools.math_tool.math_batch).
+        Returns one float per element, or the exception math() would have raised for it.
+        """
+        return get_tool("math.batch")(ops=kw["ops"], a=kw["a"], b=kw["b"])
 
     @staticmethod
     def echo(**kw):
         text = kw.get("text", "")
-        fn = get_tool("echo.say")  # -> tools.echo:run(text=...)
-        return fn(text=text)
-    
+        return get_tool("echo.say")(text=text)  # -> tools.echo:run(text=...)
+
+    @staticmethod
+    def isolated(tool: str) -> bool:
+        """Whether adapter `tool` may block on the tool process pool (arun offloads those calls)."""
+        return not _ISOLATED.isdisjoint(_ADAPTER_TOOLS.get(tool, ()))
+
+
+# Registry tools each adapter method may call
+_ADAPTER_TOOLS: Dict[str, Tuple[str, ...]] = {
+    "math": ("math.add", "math.calc", "math.expr"),
+    "math_batch": ("math.batch",),
+    "echo": ("echo.say",),
+}
+
+
+_apply_config_tools(config.settings())
+config.on_change(_apply_config_tools)
+router.set_tools(_TOOL_REGISTRY)
+if TOOL_RESOLUTION == "eager":
+    warm(start_pool=False)  # worker processes are not started at import
+
+# -------------------------------------------------------------------
+# Optional whole-run result cache (off unless RUN_CACHE is set or set_run_cache is called)
+# -------------------------------------------------------------------
+_RUN_CACHE: Any = run_cache.from_env()
+
+
+def set_run_cache(cache: Any) -> None:
+    """Install a core.cache.RunCache / SqliteRunCache in front of run(), or None to disable."""
+    global _RUN_CACHE
+    _RUN_CACHE = cache
+
+
+def get_run_cache() -> Any:
+    return _RUN_CACHE
+
+
+# -------------------------------------------------------------------
+# Optional run history (off unless RUN_HISTORY is set or set_history is called)
+# -------------------------------------------------------------------
+_HISTORY: Optional[run_history.RunHistory] = run_history.from_env()
+
+
+def set_history(history: Optional[run_history.RunHistory]) -> None:
+    """Record every finished run in a core.history.RunHistory, or None to stop recording."""
+    global _HISTORY
+    _HISTORY = history
+
+
+def get_history() -> Optional[run_history.RunHistory]:
+    return _HISTORY
+
+
+# -------------------------------------------------------------------
+# Optional run memory for the planner (off unless RUN_MEMORY is set or set_memory is called)
+# -------------------------------------------------------------------
+def set_memory(memory: Optional[run_memory.RunMemory]) -> None:
+    """Remember every finished run in `memory` (a core.memory.RunMemory), or stop with None."""
+    run_memory.set_default(memory)
+
+
+def get_memory() -> Optional[run_memory.RunMemory]:
+    return run_memory.get_default()
+
+
+def _record(user_prompt: str, result: Dict[str, Any]) -> None:
+    history = _HISTORY
+    if history is not None:
+        history.record(user_prompt, result)
+    memory = run_memory.get_default()
+    if memory is not None:
+        memory.remember_run(user_prompt, result)
+
+
+def _llm_enabled() -> bool:
+    return executor.llm_enabled() or planner.llm_enabled()
+
+
+def _run_cache_key(user_prompt: str) -> str:
+    # Everything besides the prompt that can change a run's result
+    settings = config.settings()
+    key_config = {
+        "tools": _TOOL_REGISTRY,
+        "llm": _llm_enabled(),
+        "models": [settings.models.planner, settings.models.executor],
+        "acceptance": dict(settings.acceptance),
+    }
+    return run_cache.cache_key(user_prompt, key_config)
+
+# -------------------------------------------------------------------
+# Step routing + scheduling
+# -------------------------------------------------------------------
+# router.route(step) -> handler; each handler runs one step in-place
+_ROUTES: Dict[str, Callable[..., None]] = {"executor": run_step}
+_AROUTES: Dict[str, Callable[..., Any]] = {"executor": arun_step}
+
+# Thread pool for independent steps; only used when steps can block on the LLM
+STEP_WORKERS = int(os.getenv("STEP_WORKERS", "8"))
+_step_pool: Optional["ThreadPoolExecutor"] = None
+
+
+def _get_step_pool() -> Optional["ThreadPoolExecutor"]:
+    global _step_pool
+    if not _llm_enabled() or STEP_WORKERS < 2:
+        return None  # offline steps take microseconds; thread hand-off would dominate
+    if _step_pool is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _step_pool = ThreadPoolExecutor(max_workers=STEP_WORKERS, thread_name_prefix="step")
+    return _step_pool
+
+
+def _unroutable(step: Step, dest: str) -> None:
+    step.state = StepState.FAILED
+    step.result = {"error": f"No handler for route: {dest}"}
+    step.done = False
+
+
+def _step_done(sp: Any, step: Step, dest: str) -> None:
+    sp.set(route=dest, state=step.state.value, attempts=step.attempts, done=step.done)
+
+
+def _dispatch(step: Step, graph: scheduler.PlanGraph, user_prompt: str) -> None:
+    with tracing.span("step", step_id=step.id) as sp:
+        dest = router.route(step)
+        handler = _ROUTES.get(dest)
+        if handler is None:
+            _unroutable(step, dest)
+        else:
+            handler(step, graph.by_id, user_prompt, tools=ToolRegistry)
+        if sp:
+            _step_done(sp, step, dest)
+
+
+async def _adispatch(step: Step, graph: scheduler.PlanGraph, user_prompt: str) -> None:
+    with tracing.span("step", step_id=step.id) as sp:
+        dest = router.route(step)
+        handler = _AROUTES.get(dest)
+        if handler is None:
+            _unroutable(step, dest)
+        else:
+            await handler(step, graph.by_id, user_prompt, tools=ToolRegistry)
+        if sp:
+            _step_done(sp, step, dest)
+
 # -------------------------------------------------------------------
 # Orchestration entrypoint
 # -------------------------------------------------------------------
-def run(user_prompt: str) -> Dict[str, Any]:
+def run(user_prompt: str, *, budget: Optional[budget_mod.Budget] = None) -> Dict[str, Any]:
     """
     Orchestrate planning -> execution -> evaluation -> trace summary.
-    Returns a dict: { plan: [...], outcome: {...}, trace: "..." }
+    Returns a dict: { plan: [...], outcome: {...}, trace: "...", usage: {...} }
+    "usage" is this run's LLM token/cost accounting (core.budget); LLM calls are
+    also charged to `budget` when given, and stop once either is exhausted.
+    When tracing is on (core.tracing), the dict also carries per-stage "spans".
+    Finished runs are appended to the run history, if one is set (core.history).
     """
+    result = _run_traced(user_prompt, budget)
+    _record(user_prompt, result)
+    return result
+
+
+def _run_traced(user_prompt: str, budget: Optional[budget_mod.Budget]) -> Dict[str, Any]:
+    handle = tracing.begin("run", prompt_chars=len(user_prompt))
+    b = budget_mod.Budget(parent=budget)
+    try:
+        with budget_mod.use(b):
+            result = _run(user_prompt)
+    except BaseException as e:
+        tracing.end(handle, error=e)
+        raise
+    result["usage"] = b.usage()
+    tracing.end(handle, result)
+    return result
+
+
+def _cache_get(cache: Any, key: str) -> Optional[Dict[str, Any]]:
+    with tracing.span("cache") as sp:
+        hit = cache.get(key)
+        if sp:
+            sp.set(hit=hit is not None)
+    return hit
+
+
+def _cache_put(cache: Any, key: str, result: Dict[str, Any], b: Optional[budget_mod.Budget]) -> None:
+    # A run whose LLM calls were refused by its budget finished on the offline fallbacks;
+    # a later run with budget left must not be handed that degraded result
+    if b is None or not b.denied:
+        cache.put(key, result)
 
-    plan: List[Dict[str, Any]] = planner.create_initial_plan(user_prompt)
 
-    # Execute plan sequentially (router kept for future branching)
-    for step in plan:
-        _dest = router.route(step)  # currently unused; placeholder
-        run_step(step, plan, user_prompt, tools=ToolRegistry)
+def _run(user_prompt: str) -> Dict[str, Any]:
+    cache = _RUN_CACHE
+    if cache is not None:
+        key = _run_cache_key(user_prompt)
+        hit = _cache_get(cache, key)
+        if hit is not None:
+            return hit
 
-    outcome = evaluate(plan)
-    trace = summarize_trace(plan)
+    with tracing.span("plan"):
+        plan: List[Step] = planner.create_initial_plan(user_prompt)
 
-    # JSON-friendly plan (enums -> strings)
-    printable_plan: List[Dict[str, Any]] = []
-    for s in plan:
-        s_out = dict(s)
-        st = s_out.get("state")
-        s_out["state"] = getattr(st, "value", st)
-        printable_plan.append(s_out)
+    # Run steps as their dependencies complete; independent ones in parallel when LLM-backed
+    graph = scheduler.PlanGraph(plan)
+    scheduler.run_graph(graph, lambda step: _dispatch(step, graph, user_prompt), _get_step_pool())
 
+    result = _finalize(plan)
+    if cache is not None:
+        _cache_put(cache, key, result, budget_mod.current())
+    return result
+
+
+def _finalize(plan: List[Step]) -> Dict[str, Any]:
+    with tracing.span("evaluate"):
+        outcome = evaluate(plan)
+        trace = summarize_trace(plan)
+
+    # JSON-friendly plan (enums -> strings), built only here at output time
     return {
-        "plan": printable_plan,
+        "plan": [s.to_dict() for s in plan],
         "outcome": outcome,
         "trace": trace,
-    }
\ No newline at end of file
+    }
+
+
+# -------------------------------------------------------------------
+# Async entrypoint
+# -------------------------------------------------------------------
+# Cap on concurrently executing arun() calls (per event loop)
+MAX_CONCURRENT_RUNS = int(os.getenv("MAX_CONCURRENT_RUNS", "256"))
+_run_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _run_limit() -> "asyncio.Semaphore":
+    import asyncio
+    loop = asyncio.get_running_loop()
+    sem = _run_limits.get(loop)
+    if sem is None:
+        sem = _run_limits[loop] = asyncio.Semaphore(MAX_CONCURRENT_RUNS)
+    return sem
+
+
+async def arun(user_prompt: str, *, limit: Optional["asyncio.Semaphore"] = None,
+               budget: Optional[budget_mod.Budget] = None) -> Dict[str, Any]:
+    """
+    Async run(): LLM calls are awaited on the shared async client (core.llm), so many
+    runs can be in flight on one event loop. At most MAX_CONCURRENT_RUNS execute at
+    once unless a caller-owned semaphore is passed as `limit`.
+    """
+    handle = tracing.begin("run", prompt_chars=len(user_prompt))
+    b = budget_mod.Budget(parent=budget)
+    try:
+        with budget_mod.use(b):
+            result = await _arun(user_prompt, limit)
+    except BaseException as e:
+        tracing.end(handle, error=e)
+        raise
+    result["usage"] = b.usage()
+    tracing.end(handle, result)
+    _record(user_prompt, result)
+    return result
+
+
+async def _arun(user_prompt: str, limit: Optional["asyncio.Semaphore"]) -> Dict[str, Any]:
+    cache = _RUN_CACHE
+    if cache is not None:
+        key = _run_cache_key(user_prompt)
+        hit = _cache_get(cache, key)
+        if hit is not None:
+            return hit
+
+    async with (limit or _run_limit()):
+        with tracing.span("plan"):
+            plan: List[Step] = planner.create_initial_plan(user_prompt)
+        graph = scheduler.PlanGraph(plan)
+        await scheduler.arun_graph(graph, lambda step: _adispatch(step, graph, user_prompt))
+        result = _finalize(plan)
+    if cache is not None:
+        _cache_put(cache, key, result, budget_mod.current())
+    return result
+
+
+async def arun_many(prompts: Iterable[str], concurrency: int = MAX_CONCURRENT_RUNS,
+                    budget: Optional[budget_mod.Budget] = None) -> List[Dict[str, Any]]:
+    """
+    Run prompts concurrently with at most `concurrency` in flight; results keep input order.
+    Every run's LLM usage is also charged to `budget`, if given.
+    """
+    import asyncio
+    limit = asyncio.Semaphore(concurrency)
+    return list(await asyncio.gather(*(arun(p, limit=limit, budget=budget) for p in prompts)))
+
+
+# -------------------------------------------------------------------
+# Streaming entrypoints
+# -------------------------------------------------------------------
+# Events (JSON-friendly dicts, each with "t_ms" since the stream started):
+#   {"event": "plan", "steps": [{"id", "description", "state": "planned"}, ...]}
+#   {"event": "step", "id", "state": "running"}                      when a step is dispatched
+#   {"event": "step", "id", "state": "done"|"failed", "attempts", "result"}   when it finishes
+#   {"event": "outcome", "plan", "outcome", "trace", "usage"}        last; same payload as run()
+# A cache hit yields only the outcome event (with "cached": true).
+# Streams are not traced (core.tracing spans are recorded by run()/arun() only).
+_STREAM_END = object()
+
+
+class _Clock:
+    __slots__ = ("t0",)
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+
+    def stamp(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        event["t_ms"] = round((time.perf_counter() - self.t0) * 1e3, 3)
+        return event
+
+
+def _plan_event(plan: List[Step]) -> Dict[str, Any]:
+    return {
+        "event": "plan",
+        "steps": [{"id": s.id, "description": s.description, "state": s.state.value} for s in plan],
+    }
+
+
+def _running_event(step: Step) -> Dict[str, Any]:
+    return {"event": "step", "id": step.id, "state": StepState.RUNNING.value}
+
+
+def _finished_event(step: Step) -> Dict[str, Any]:
+    return {"event": "step", "id": step.id, "state": step.state.value, "attempts": step.attempts, "result": step.result}
+
+
+def _outcome_event(result: Dict[str, Any], cached: bool = False) -> Dict[str, Any]:
+    event = {"event": "outcome", **result}
+    if cached:
+        event["cached"] = True
+    return event
+
+
+def run_stream(user_prompt: str, *, budget: Optional[budget_mod.Budget] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Like run(), but yields step state transitions and tool results as they happen;
+    the final event carries the same plan/outcome/trace/usage that run() returns.
+    """
+    clock = _Clock()
+    b = budget_mod.Budget(parent=budget)
+    cache = _RUN_CACHE
+    if cache is not None:
+        key = _run_cache_key(user_prompt)
+        hit = cache.get(key)
+        if hit is not None:
+            hit["usage"] = b.usage()
+            _record(user_prompt, hit)
+            yield clock.stamp(_outcome_event(hit, cached=True))
+            return
+
+    plan: List[Step] = planner.create_initial_plan(user_prompt)
+    yield clock.stamp(_plan_event(plan))
+    graph = scheduler.PlanGraph(plan)
+    pool = _get_step_pool()
+
+    if pool is None:
+        for step in graph.order:
+            yield clock.stamp(_running_event(step))
+            # Only around the step: a generator must not leave its budget current between yields
+            with budget_mod.use(b):
+                _dispatch(step, graph, user_prompt)
+            yield clock.stamp(_finished_event(step))
+    else:
+        # Steps finish on pool threads; hand their events to this generator through a queue
+        events: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+
+        def run_one(step: Step) -> None:
+            events.put(clock.stamp(_running_event(step)))
+            _dispatch(step, graph, user_prompt)
+            events.put(clock.stamp(_finished_event(step)))
+
+        def drive() -> None:
+            try:
+                with budget_mod.use(b):
+                    scheduler.run_graph(graph, run_one, pool)
+            except BaseException as e:
+                events.put(e)
+            events.put(_STREAM_END)
+
+        threading.Thread(target=drive, name="run-stream", daemon=True).start()
+        while (event := events.get()) is not _STREAM_END:
+            if isinstance(event, BaseException):
+                raise event
+            yield event
+
+    result = _finalize(plan)
+    if cache is not None:
+        _cache_put(cache, key, result, b)
+    result["usage"] = b.usage()
+    _record(user_prompt, result)
+    yield clock.stamp(_outcome_event(result))
+
+
+async def arun_stream(user_prompt: str, *, limit: Optional["asyncio.Semaphore"] = None,
+                      budget: Optional[budget_mod.Budget] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Async run_stream(); runs under the same concurrency cap as arun()."""
+    import asyncio
+    clock = _Clock()
+    b = budget_mod.Budget(parent=budget)
+    cache = _RUN_CACHE
+    if cache is not None:
+        key = _run_cache_key(user_prompt)
+        hit = cache.get(key)
+        if hit is not None:
+            hit["usage"] = b.usage()
+            _record(user_prompt, hit)
+            yield clock.stamp(_outcome_event(hit, cached=True))
+            return
+
+    async with (limit or _run_limit()):
+        plan: List[Step] = planner.create_initial_plan(user_prompt)
+        yield clock.stamp(_plan_event(plan))
+        graph = scheduler.PlanGraph(plan)
+        events: "asyncio.Queue[Any]" = asyncio.Queue()
+
+        async def run_one(step: Step) -> None:
+            events.put_nowait(clock.stamp(_running_event(step)))
+            await _adispatch(step, graph, user_prompt)
+            events.put_nowait(clock.stamp(_finished_event(step)))
+
+        with budget_mod.use(b):  # the task copies the context it is created in
+            task = asyncio.ensure_future(scheduler.arun_graph(graph, run_one))
+        task.add_done_callback(lambda _t: events.put_nowait(_STREAM_END))
+        try:
+            while (event := await events.get()) is not _STREAM_END:
+                yield event
+            task.result()
+        finally:
+            task.cancel()
+        result = _finalize(plan)
+    if cache is not None:
+        _cache_put(cache, key, result, b)
+    result["usage"] = b.usage()
+    _record(user_prompt, result)
+    yield clock.stamp(_outcome_event(result))
+
+
+# -------------------------------------------------------------------
+# Batch entrypoint
+# -------------------------------------------------------------------
+@dataclass
+class BatchStats:
+    """Filled in by run_batch as results are yielded."""
+    prompts: int = 0
+    chunks: int = 0
+    elapsed_s: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+
+    def add_usage(self, usage: Dict[str, Any]) -> None:
+        self.prompt_tokens += usage["prompt_tokens"]
+        self.completion_tokens += usage["completion_tokens"]
+        self.cost_usd += usage["cost_usd"]
+
+    @property
+    def throughput(self) -> float:
+        return self.prompts / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+def _run_chunk(prompts: List[str], budget: Optional[budget_mod.Budget] = None) -> List[Dict[str, Any]]:
+    """
+    Same as [run(p, budget=budget) for p in prompts] (minus history), except that plan-3 math steps are
+    deferred and evaluated together with one vectorized ToolRegistry.math_batch call.
+    One pool task per chunk, so thread hand-off / pickling is paid per chunk, not per prompt.
+    While tracing is on, prompts go through run() one by one so each result gets its spans.
+    """
+    if tracing.is_enabled():
+        return [_run_traced(p, budget) for p in prompts]
+    cache = _RUN_CACHE
+    results: List[Any] = [None] * len(prompts)
+    budgets = [budget_mod.Budget(parent=budget) for _ in prompts]
+    pending = []  # (index, cache key, plan) for prompts that miss the cache
+    math_jobs = []
+    for i, user_prompt in enumerate(prompts):
+        key = None
+        if cache is not None:
+            key = _run_cache_key(user_prompt)
+            results[i] = cache.get(key)
+            if results[i] is not None:
+                continue
+        plan: List[Step] = planner.create_initial_plan(user_prompt)
+        graph = scheduler.PlanGraph(plan)
+        with budget_mod.use(budgets[i]):
+            for step in graph.order:
+                inputs = batch_math_inputs(step, graph.by_id) if router.route(step) == "executor" else None
+                if inputs is not None:
+                    math_jobs.append((step, inputs))
+                else:
+                    _dispatch(step, graph, user_prompt)
+        pending.append((i, key, plan))
+    run_math_batch(math_jobs, tools=ToolRegistry)
+    for i, key, plan in pending:
+        results[i] = _finalize(plan)
+        if cache is not None:
+            _cache_put(cache, key, results[i], budgets[i])
+    for result, b in zip(results, budgets):
+        result["usage"] = b.usage()
+    return results
+
+
+def _chunks(prompts: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(prompts)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(
+    prompts: Iterable[str],
+    workers: int = 4,
+    *,
+    processes: bool = False,
+    chunk_size: int = 32,
+    max_in_flight: Optional[int] = None,
+    stats: Optional[BatchStats] = None,
+    budget: Optional[budget_mod.Budget] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run many prompts through run() on a worker pool, yielding results in input order.
+
+    Prompts are consumed lazily in chunks of `chunk_size`; at most `max_in_flight`
+    chunks (default 2 * workers) are submitted at once, so memory stays bounded for
+    arbitrarily long inputs. Use processes=True for CPU-bound (offline) batches and
+    the default thread pool when runs are dominated by LLM calls. Worker processes are
+    spawned, so they see the registry and settings as imported, not runtime changes
+    (register_tool, isolate_tool, ...) made in the calling process.
+    Pass a BatchStats to get prompt count, elapsed time, throughput and LLM usage.
+    Results are recorded in the run history (if set) here, in the calling process.
+
+    With a `budget`, every run's LLM usage is charged to it and LLM calls stop (runs
+    degrade to their offline answers) once it is exhausted. Worker processes cannot
+    share it, so with processes=True it is only charged as results come back and
+    cannot stop runs already submitted.
+    """
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    max_in_flight = max_in_flight or 2 * workers
+    stats = stats if stats is not None else BatchStats()
+    # Imported here so single-prompt CLI runs never load concurrent.futures/multiprocessing
+    pool_kw: Dict[str, Any] = {"max_workers": workers}
+    if processes:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor as pool_cls
+        # "spawn", as in core.toolpool: a forked child would inherit the caller's
+        # threads (step pool, config watcher, history writer) and any locks they hold
+        pool_kw["mp_context"] = multiprocessing.get_context("spawn")
+    else:
+        from concurrent.futures import ThreadPoolExecutor as pool_cls
+
+    start = time.perf_counter()
+    with pool_cls(**pool_kw) as pool:
+        pending = deque()
+        chunks = _chunks(prompts, chunk_size)
+        while True:
+            # Top up the window, then drain the oldest chunk to keep output ordered
+            for chunk in islice(chunks, max_in_flight - len(pending)):
+                pending.append((chunk, pool.submit(_run_chunk, chunk, None if processes else budget)))
+            if not pending:
+                break
+            chunk, fut = pending.popleft()
+            results = fut.result()
+            stats.chunks += 1
+            for p, r in zip(chunk, results):
+                _record(p, r)
+                stats.prompts += 1
+                stats.add_usage(r["usage"])
+                if processes and budget is not None:
+                    budget.add_usage(r["usage"])
+                stats.elapsed_s = time.perf_counter() - start
+                yield r
+    stats.elapsed_s = time.perf_counter() - start
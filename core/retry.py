@@ -0,0 +1,419 @@
+# core/retry.py
+"""
+Retry policy for tool and LLM calls: exponential backoff with full jitter, a time
+budget (deadline) per tool, a circuit breaker per tool, and hedged duplicate
+requests for slow LLM calls.
+
+Settings come from the `retry:` section of the config snapshot (core.config),
+read on the first failure or hedged call; a reloaded snapshot replaces the policy
+(breaker state is kept).
+
+Only transient errors are retried and counted by the breaker: timeouts,
+connection/OS errors, and the openai client's connection, timeout, 429 and 5xx
+errors (the shared clients in core.llm make no retries of their own). Anything
+else (e.g. ZeroDivisionError from math) is raised at once, as is an error whose
+class sets `retryable = False` (core.toolpool's ToolTimeout and WorkerCrashed:
+the tool already had its time or killed its worker). A half-open breaker lets one
+probe through; whatever the probe raises, the next call may probe again.
+
+A deadline bounds a whole call including retries and hedges. Plain calls run their
+first attempt inline on the caller's thread; a `timeout` keyword argument (LLM
+calls) is capped at the deadline. A hedged call runs its attempt on a thread of its
+own, starts a duplicate once it has run for hedge_after_s, and returns whichever
+answers first. Later attempts of plain calls with a deadline run on helper threads
+and are abandoned once the budget is spent. acall() backs off with asyncio.sleep.
+"""
+import contextvars
+import random
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from core import config, tracing
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the tool while its breaker is open."""
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@dataclass
+class RetryPolicy:
+    step_max_attempts: int = 2           # attempts per call, first one included
+    base_delay_s: float = 0.05
+    max_delay_s: float = 2.0
+    multiplier: float = 2.0
+    tool_deadlines_s: Dict[str, float] = field(default_factory=dict)
+    breaker_failures: int = 5            # consecutive transient failures that open a breaker
+    breaker_reset_s: float = 30.0        # open -> half-open after this long
+    hedge_after_s: Optional[float] = None  # duplicate a hedged call still running after this
+    retry_on: Tuple[Type[BaseException], ...] = (TimeoutError, ConnectionError, OSError)
+
+    def retryable(self, error: BaseException) -> bool:
+        if not getattr(error, "retryable", True):
+            return False
+        return isinstance(error, self.retry_on) or _transient_upstream(error)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        cap = min(self.max_delay_s, self.base_delay_s * self.multiplier ** (attempt - 1))
+        return random.uniform(0, cap)
+
+    def deadline(self, name: str) -> Optional[float]:
+        return self.tool_deadlines_s.get(name)
+
+
+# openai errors worth retrying, matched by name so openai need not be imported here;
+# APIStatusError subclasses are matched by status code instead
+_UPSTREAM_TRANSIENT = {"APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError"}
+_STATUS_TRANSIENT = {408, 409, 429}
+
+
+def _transient_upstream(error: BaseException) -> bool:
+    if not type(error).__module__.startswith("openai"):
+        return False
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in _STATUS_TRANSIENT or status >= 500
+    return any(c.__name__ in _UPSTREAM_TRANSIENT for c in type(error).__mro__)
+
+
+def load_policy(path: Optional[str] = None) -> RetryPolicy:
+    """
+    Build a RetryPolicy from the `retry:` section of a YAML config file, or of the
+    current settings snapshot without a path (defaults if absent).
+    """
+    section = config.load_section("retry", path) if path else config.settings().retry
+    known = {f.name for f in fields(RetryPolicy)} - {"retry_on"}
+    return RetryPolicy(**{k: dict(v) if k == "tool_deadlines_s" else v
+                          for k, v in section.items() if k in known})
+
+
+_policy: Optional[RetryPolicy] = None
+_lock = threading.Lock()
+_sleep = time.sleep  # patched by tests
+
+
+def policy() -> RetryPolicy:
+    global _policy
+    if _policy is None:
+        with _lock:
+            if _policy is None:
+                _policy = load_policy()
+    return _policy
+
+
+def set_policy(p: Optional[RetryPolicy]) -> None:
+    """Install a policy (or with None, re-read the config on next use); resets breakers."""
+    global _policy
+    _policy = p
+    reset_breakers()
+
+
+@config.on_change
+def _settings_changed(settings: "config.Settings") -> None:
+    # Re-derive the policy from the new snapshot on next use; breakers keep their state
+    global _policy
+    _policy = None
+
+
+# -------------------------------------------------------------------
+# Circuit breakers
+# -------------------------------------------------------------------
+class _Breaker:
+    __slots__ = ("failures", "opened_at", "trial")
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial = False  # a half-open probe is in flight
+
+    def state(self, reset_s: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= reset_s else "open"
+
+
+_breakers: Dict[str, _Breaker] = {}
+
+
+def breaker_state(name: str) -> str:
+    b = _breakers.get(name)
+    return b.state(policy().breaker_reset_s) if b is not None else "closed"
+
+
+def reset_breakers() -> None:
+    with _lock:
+        _breakers.clear()
+
+
+def _before_call(name: str) -> bool:
+    """Raise CircuitOpenError while `name`'s breaker is open; True if this call is its probe."""
+    b = _breakers.get(name)
+    if b is None or b.opened_at is None:
+        return False
+    with _lock:
+        state = b.state(policy().breaker_reset_s)
+        if state == "open" or (state == "half-open" and b.trial):
+            raise CircuitOpenError(f"Circuit open for {name}")
+        b.trial = True  # let one probe through
+        return True
+
+
+def _end_trial(name: str) -> None:
+    # A finished probe, whatever it raised (a non-transient error is not recorded)
+    b = _breakers.get(name)
+    if b is not None:
+        with _lock:
+            b.trial = False
+
+
+def _record(name: str, ok: bool) -> None:
+    b = _breakers.get(name)
+    if ok:
+        if b is not None:
+            with _lock:
+                b.failures, b.opened_at, b.trial = 0, None, False
+        return
+    with _lock:
+        b = _breakers.setdefault(name, _Breaker())
+        b.failures += 1
+        b.trial = False
+        if b.opened_at is not None or b.failures >= policy().breaker_failures:
+            b.opened_at = time.monotonic()
+
+
+# -------------------------------------------------------------------
+# Sync calls
+# -------------------------------------------------------------------
+_pool: Any = None
+
+
+def _helper_pool() -> Any:
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="retry")
+    return _pool
+
+
+def _submit(fn: Callable[..., Any], args: tuple, kw: Dict[str, Any]) -> Any:
+    return _helper_pool().submit(contextvars.copy_context().run, fn, *args, **kw)
+
+
+def _start(fn: Callable[..., Any], args: tuple, kw: Dict[str, Any]) -> Any:
+    """fn(*args, **kw) on a new thread, in the caller's context; returns its Future."""
+    # Not the helper pool: hedged calls must not be capped at its size
+    from concurrent.futures import Future
+    fut: Any = Future()
+    ctx = contextvars.copy_context()
+
+    def run() -> None:
+        try:
+            fut.set_result(ctx.run(fn, *args, **kw))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=run, name="hedge", daemon=True).start()
+    return fut
+
+
+def _bounded(name: str, fn: Callable[..., Any], args: tuple, kw: Dict[str, Any],
+             remaining: Optional[float]) -> Any:
+    """One attempt on a helper thread, abandoned after `remaining` seconds."""
+    from concurrent.futures import TimeoutError as FutureTimeout
+    try:
+        return _submit(fn, args, kw).result(timeout=remaining)
+    except FutureTimeout:
+        raise DeadlineExceeded(f"{name} exceeded its {remaining:.3f}s deadline") from None
+
+
+def _capped(name: str, kw: Dict[str, Any], start: float) -> Dict[str, Any]:
+    # An inline attempt cannot be abandoned: let a `timeout` argument enforce the deadline
+    deadline = policy().deadline(name)
+    if deadline is None or kw.get("timeout") is None:
+        return kw
+    return {**kw, "timeout": max(0.0, min(kw["timeout"], deadline - (time.monotonic() - start)))}
+
+
+def _hedged(name: str, fn: Callable[..., Any], args: tuple, kw: Dict[str, Any],
+            hedge_after: float, start: float) -> Any:
+    """
+    One attempt, plus a duplicate once it has run for `hedge_after`; the first answer
+    wins (the loser is abandoned, its thread finishes on its own).
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+    kw = _capped(name, kw, start)
+    deadline = policy().deadline(name)
+
+    def left() -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - (time.monotonic() - start))
+
+    running = {_start(fn, args, kw)}
+    remaining = left()
+    if remaining is None or hedge_after < remaining:
+        done, _ = wait(running, timeout=hedge_after)
+        if not done:
+            with tracing.span("hedge", tool=name):
+                running.add(_start(fn, args, kw))
+    error: Optional[BaseException] = None
+    while running:
+        done, running = wait(running, timeout=left(), return_when=FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded(f"{name} exceeded its {deadline:.3f}s deadline")
+        for fut in done:
+            if fut.exception() is None:
+                return fut.result()
+            error = fut.exception()
+    raise error
+
+
+def call(name: str, fn: Callable[..., Any], *args: Any, hedge: bool = False, **kw: Any) -> Any:
+    """
+    Call fn(*args, **kw) under the retry policy for tool `name`.
+    hedge=True (LLM calls) fires a duplicate request once the first has been running
+    for policy.hedge_after_s and returns whichever answers first.
+    """
+    trial = _before_call(name)
+    try:
+        start = time.monotonic()
+        hedge_after = policy().hedge_after_s if hedge else None
+        try:
+            if hedge_after is not None:
+                out = _hedged(name, fn, args, kw, hedge_after, start)
+            elif hedge:
+                out = fn(*args, **_capped(name, kw, start))
+            else:
+                out = fn(*args, **kw)
+        except Exception as e:
+            return _retry(name, fn, args, kw, e, start, hedge_after)
+        _record(name, True)
+        return out
+    finally:
+        if trial:
+            _end_trial(name)
+
+
+def _retry(name: str, fn: Callable[..., Any], args: tuple, kw: Dict[str, Any],
+           error: BaseException, start: float, hedge_after: Optional[float] = None) -> Any:
+    p = policy()
+    if not p.retryable(error):
+        raise error
+    deadline = p.deadline(name)
+    if hedge_after is not None:
+        attempt_fn = lambda remaining: _hedged(name, fn, args, kw, hedge_after, start)  # noqa: E731
+    elif deadline is not None and "timeout" not in kw:
+        attempt_fn = lambda remaining: _bounded(name, fn, args, kw, remaining)  # noqa: E731
+    else:
+        attempt_fn = lambda remaining: fn(*args, **_capped(name, kw, start))  # noqa: E731
+    return _attempts(name, attempt_fn, start, first_error=error)
+
+
+def _attempts(name: str, attempt_fn: Callable[[Optional[float]], Any], start: float,
+              first_error: Optional[BaseException]) -> Any:
+    p = policy()
+    deadline = p.deadline(name)
+    attempt = 0
+    error = first_error
+    trial = False
+    try:
+        while True:
+            if error is not None:
+                _record(name, False)
+                attempt += 1
+                if attempt >= p.step_max_attempts or isinstance(error, DeadlineExceeded):
+                    raise error
+                delay = p.backoff(attempt)
+                if deadline is not None and time.monotonic() - start + delay >= deadline:
+                    raise error  # no budget left for another try
+                _sleep(delay)
+                trial = _before_call(name) or trial
+            remaining = None if deadline is None else deadline - (time.monotonic() - start)
+            try:
+                with tracing.span("attempt", tool=name, attempt=attempt + 1):
+                    out = attempt_fn(remaining)
+            except Exception as e:
+                if not p.retryable(e):
+                    raise
+                error = e
+                continue
+            _record(name, True)
+            return out
+    finally:
+        if trial:
+            _end_trial(name)
+
+
+# -------------------------------------------------------------------
+# Async calls
+# -------------------------------------------------------------------
+async def _abounded(name: str, make: Callable[[], Awaitable[Any]],
+                    hedge_after: Optional[float], remaining: Optional[float]) -> Any:
+    import asyncio
+    t0 = time.monotonic()
+    tasks = {asyncio.ensure_future(make())}
+    try:
+        if hedge_after is not None and (remaining is None or hedge_after < remaining):
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                with tracing.span("hedge", tool=name):
+                    tasks.add(asyncio.ensure_future(make()))
+        error: Optional[BaseException] = None
+        while tasks:
+            left = None if remaining is None else remaining - (time.monotonic() - t0)
+            done, tasks = await asyncio.wait(tasks, timeout=left, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded(f"{name} exceeded its {remaining:.3f}s deadline")
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def acall(name: str, make: Callable[[], Awaitable[Any]], *, hedge: bool = False) -> Any:
+    """Async call(): `make` returns a fresh awaitable per attempt."""
+    import asyncio
+    trial = _before_call(name)
+    start = time.monotonic()
+    attempt = 0
+    p: Optional[RetryPolicy] = policy() if hedge else None
+    try:
+        while True:
+            try:
+                if p is None:
+                    out = await make()  # plain first attempt: no policy needed yet
+                else:
+                    deadline = p.deadline(name)
+                    remaining = None if deadline is None else deadline - (time.monotonic() - start)
+                    with tracing.span("attempt", tool=name, attempt=attempt + 1):
+                        out = await _abounded(name, make, p.hedge_after_s if hedge else None, remaining)
+            except Exception as e:
+                p = policy()
+                if not p.retryable(e):
+                    raise
+                _record(name, False)
+                attempt += 1
+                if attempt >= p.step_max_attempts or isinstance(e, DeadlineExceeded):
+                    raise
+                delay = p.backoff(attempt)
+                deadline = p.deadline(name)
+                if deadline is not None and time.monotonic() - start + delay >= deadline:
+                    raise
+                await asyncio.sleep(delay)
+                trial = _before_call(name) or trial
+                continue
+            _record(name, True)
+            return out
+    finally:
+        if trial:
+            _end_trial(name)
@@ -0,0 +1,125 @@
+# core/scheduler.py
+"""
+Dependency-ordered execution of a plan.
+
+Steps declare the ids they need in `depends_on`; a step with depends_on=None runs
+after the step listed before it, so undeclared plans keep their sequential order.
+The graph is built once per run; independent steps can then run concurrently on a
+thread pool (run_graph) or an event loop (arun_graph).
+"""
+import contextvars
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.state import Step
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+
+class PlanGraph:
+    __slots__ = ("steps", "by_id", "deps", "dependents", "order")
+
+    def __init__(self, plan: Sequence[Step]):
+        self.steps = list(plan)
+        self.by_id: Dict[str, Step] = {}
+        for s in self.steps:
+            if s.id in self.by_id:
+                raise ValueError(f"Duplicate step id: {s.id}")
+            self.by_id[s.id] = s
+
+        self.deps: Dict[str, Tuple[str, ...]] = {}
+        self.dependents: Dict[str, List[str]] = {s.id: [] for s in self.steps}
+        prev: Optional[Step] = None
+        for s in self.steps:
+            deps = tuple(s.depends_on) if s.depends_on is not None else ((prev.id,) if prev else ())
+            for d in deps:
+                if d not in self.by_id:
+                    raise ValueError(f"Step {s.id} depends on unknown step: {d}")
+                self.dependents[d].append(s.id)
+            self.deps[s.id] = deps
+            prev = s
+
+        # Kahn's algorithm; ties keep plan order
+        remaining = {sid: len(d) for sid, d in self.deps.items()}
+        ready = [s.id for s in self.steps if not remaining[s.id]]
+        order: List[Step] = []
+        while ready:
+            sid = ready.pop(0)
+            order.append(self.by_id[sid])
+            for child in self.dependents[sid]:
+                remaining[child] -= 1
+                if not remaining[child]:
+                    ready.append(child)
+        if len(order) != len(self.steps):
+            raise ValueError("Plan has a dependency cycle")
+        self.order = order
+
+
+def run_graph(graph: PlanGraph, run_one: Callable[[Step], Any], pool: Optional["Executor"] = None) -> None:
+    """
+    Run every step once its dependencies have finished (whatever their outcome).
+    Without a pool, steps run inline in topological order.
+
+    With a pool (shared by every run in the process), the calling thread always runs
+    one ready step itself and only the other ready steps are submitted. When it has
+    nothing left to run, it takes back submitted steps no pool thread has started
+    yet, so a busy pool slows a run down to sequential, never below it.
+    """
+    if pool is None:
+        for s in graph.order:
+            run_one(s)
+        return
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    def submit(step: Step):
+        # Carry the caller's context (e.g. the active trace) into the worker thread
+        return pool.submit(contextvars.copy_context().run, run_one, step)
+
+    remaining = {sid: len(d) for sid, d in graph.deps.items()}
+    ready = [s for s in graph.order if not remaining[s.id]]
+    running: Dict[Any, str] = {}
+
+    def finished(sid: str) -> None:
+        for child in graph.dependents[sid]:
+            remaining[child] -= 1
+            if not remaining[child]:
+                ready.append(graph.by_id[child])
+
+    while ready or running:
+        if ready:
+            mine, others = ready[0], ready[1:]
+            ready.clear()
+            for s in others:
+                running[submit(s)] = s.id
+            run_one(mine)
+            finished(mine.id)
+            continue
+        stolen = next((f for f in running if f.cancel()), None)
+        if stolen is not None:
+            ready.append(graph.by_id[running.pop(stolen)])
+            continue
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for fut in done:
+            sid = running.pop(fut)
+            fut.result()
+            finished(sid)
+
+
+async def arun_graph(graph: PlanGraph, run_one: Callable[[Step], Awaitable[Any]]) -> None:
+    """Async run_graph(): independent steps run as concurrent tasks."""
+    import asyncio
+    remaining = {sid: len(d) for sid, d in graph.deps.items()}
+    running = {asyncio.ensure_future(run_one(s)): s.id for s in graph.order if not remaining[s.id]}
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                sid = running.pop(task)
+                task.result()
+                for child in graph.dependents[sid]:
+                    remaining[child] -= 1
+                    if not remaining[child]:
+                        running[asyncio.ensure_future(run_one(graph.by_id[child]))] = child
+    finally:
+        for task in running:
+            task.cancel()
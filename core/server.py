@@ -0,0 +1,264 @@
+# core/server.py
+"""
+Long-lived agent server: keeps the interpreter, imports and resolved tools warm
+across requests instead of paying CLI startup per prompt.
+
+    python app.py --serve unix:/tmp/agent.sock --workers 4 [--processes]
+
+Protocol: newline-delimited JSON-RPC 2.0 over TCP ("host:port") or a Unix socket
+("unix:/path"); connections are persistent. Methods:
+    run(prompt)  -> core.orchestrator.run() result
+    ping()       -> "pong"
+    stats()      -> counters
+
+Runs execute on a worker pool (threads by default; --processes preforks warmed
+worker processes for CPU-bound offline runs). At most `max_pending` requests may be
+queued or running; past that a request waits up to `queue_timeout_s` for a slot and
+is then rejected with error code -32000 (busy) so clients can back off.
+SIGINT/SIGTERM stop accepting, let in-flight requests finish, then exit.
+The server (and each worker process) watches the config file and swaps in a new
+settings snapshot when it changes (CONFIG_WATCH_S seconds between checks; 0: off).
+"""
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set
+
+from core import config, orchestrator
+from core.client import BUSY, parse_address
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class _Busy(Exception):
+    pass
+
+
+def _reply(rid: Any, result: Any = None, error: Optional[tuple] = None) -> bytes:
+    msg: Dict[str, Any] = {"jsonrpc": "2.0", "id": rid}
+    if error is None:
+        msg["result"] = result
+    else:
+        msg["error"] = {"code": error[0], "message": error[1]}
+    return json.dumps(msg).encode("utf-8") + b"\n"
+
+
+CONFIG_WATCH_S = float(os.getenv("CONFIG_WATCH_S", "1.0"))
+
+
+def _watch_config() -> None:
+    if CONFIG_WATCH_S > 0:
+        config.watch(CONFIG_WATCH_S)
+
+
+def _init_worker() -> None:
+    # Resolve tools once per worker process, before its first request
+    _watch_config()
+    orchestrator.warm()
+
+
+def _noop() -> None:
+    pass
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self) -> None:
+        super().setup()
+        self.server.agent._track(self.connection, add=True)
+
+    def handle(self) -> None:
+        agent: "AgentServer" = self.server.agent
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            self.wfile.write(agent.handle_line(line))
+            self.wfile.flush()
+
+    def finish(self) -> None:
+        self.server.agent._track(self.connection, add=False)
+        try:
+            super().finish()
+        except OSError:
+            pass  # client went away
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = False
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = False
+
+
+class AgentServer:
+    def __init__(self, address: str, workers: int = 4, processes: bool = False,
+                 max_pending: Optional[int] = None, queue_timeout_s: float = 1.0):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.workers = workers
+        self.processes = processes
+        self.max_pending = max_pending or 4 * workers
+        self.queue_timeout_s = queue_timeout_s
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._conns: Set[socket.socket] = set()
+        self._thread: Optional[threading.Thread] = None
+        self.served = 0
+        self.rejected = 0
+        self.errors = 0
+        self.in_flight = 0
+
+        _watch_config()
+        if processes:
+            self._pool: Executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                mp_context=multiprocessing.get_context("spawn"),  # no inherited threads or locks
+            )
+            # Prefork: start every worker now rather than on the first requests
+            for f in [self._pool.submit(_noop) for _ in range(workers)]:
+                f.result()
+        else:
+            orchestrator.warm()
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="serve")
+
+        family, addr = parse_address(address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(addr):
+                os.unlink(addr)  # stale socket from a previous run
+            self._server: socketserver.BaseServer = _UnixServer(addr, _Handler)
+            self.address = f"unix:{addr}"
+        else:
+            self._server = _TCPServer(addr, _Handler)
+            host, port = self._server.server_address[:2]
+            self.address = f"{host}:{port}"
+        self._server.agent = self
+
+    # -- request handling -------------------------------------------------
+    def _track(self, conn: socket.socket, add: bool) -> None:
+        with self._lock:
+            (self._conns.add if add else self._conns.discard)(conn)
+
+    def _run(self, prompt: str) -> Dict[str, Any]:
+        if not self._slots.acquire(timeout=self.queue_timeout_s):
+            with self._lock:
+                self.rejected += 1
+            raise _Busy()
+        try:
+            with self._lock:
+                self.in_flight += 1
+            return self._pool.submit(orchestrator.run, prompt).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "served": self.served,
+                "rejected": self.rejected,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "connections": len(self._conns),
+                "workers": self.workers,
+                "mode": "process" if self.processes else "thread",
+                "max_pending": self.max_pending,
+            }
+
+    def handle_line(self, line: bytes) -> bytes:
+        """Answer one JSON-RPC request line; always returns one reply line."""
+        try:
+            req = json.loads(line)
+        except ValueError:
+            return _reply(None, error=(PARSE_ERROR, "Parse error"))
+        if not isinstance(req, dict) or not isinstance(req.get("method"), str):
+            return _reply(None, error=(INVALID_REQUEST, "Invalid request"))
+        rid = req.get("id")
+        method = req["method"]
+        params = req.get("params")
+        params = {} if params is None else params
+        if not isinstance(params, dict):
+            return _reply(rid, error=(INVALID_PARAMS, "Invalid params: expected an object"))
+        if method == "run" and not isinstance(params.get("prompt"), str):
+            return _reply(rid, error=(INVALID_PARAMS, "Invalid params: prompt must be a string"))
+        try:
+            if method == "run":
+                result: Any = self._run(params["prompt"])
+                with self._lock:
+                    self.served += 1
+            elif method == "ping":
+                result = "pong"
+            elif method == "stats":
+                result = self.stats()
+            else:
+                return _reply(rid, error=(METHOD_NOT_FOUND, f"Method not found: {method}"))
+        except _Busy:
+            return _reply(rid, error=(BUSY, "Server busy"))
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            return _reply(rid, error=(INTERNAL_ERROR, f"{type(e).__name__}: {e}"))
+        return _reply(rid, result=result)
+
+    # -- lifecycle --------------------------------------------------------
+    def serve_forever(self) -> None:
+        self._server.serve_forever(poll_interval=0.2)
+
+    def start(self) -> "AgentServer":
+        """Serve from a background thread (tests, benchmarks, embedding)."""
+        self._thread = threading.Thread(target=self.serve_forever, name="agent-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self) -> None:
+        """Stop accepting new connections; must not be called from the serve_forever thread."""
+        self._server.shutdown()
+
+    def close(self) -> None:
+        """Drain: wake idle connections, wait for in-flight requests, release the pool and socket."""
+        with self._lock:
+            conns = list(self._conns)
+        for conn in conns:
+            try:
+                # Readers see EOF after their current request; replies can still be written
+                conn.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        self._server.server_close()  # joins handler threads
+        self._pool.shutdown(wait=True)
+        if self.address.startswith("unix:") and os.path.exists(self.address[len("unix:"):]):
+            os.unlink(self.address[len("unix:"):])
+
+    def __enter__(self) -> "AgentServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.shutdown()
+        self.close()
+
+
+def serve(address: str, workers: int = 4, processes: bool = False, **kw: Any) -> None:
+    """Run an AgentServer in the foreground until SIGINT/SIGTERM, then shut down gracefully."""
+    server = AgentServer(address, workers=workers, processes=processes, **kw)
+
+    def stop(signum, frame):
+        # shutdown() blocks until serve_forever returns, so it cannot run on this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    print(f"serving on {server.address} ({workers} {'process' if processes else 'thread'} workers)", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.close()
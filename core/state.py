@@ -1,7 +1,7 @@
 # core/state.py
+from dataclasses import dataclass, field, fields
 from enum import Enum
 from typing import Any, Dict, List, Optional
-from pydantic import BaseModel, Field
 
 class StepState(str, Enum):
     PLANNED = "planned"
@@ -9,48 +9,84 @@ class StepState(str, Enum):
     DONE = "done"
     FAILED = "failed"
 
-# Optional: Pydantic models (you can keep these if you want them later)
-class PlanStep(BaseModel):
-    id: str
-    description: str
+@dataclass(slots=True)
+class Step:
+    """
+    Compact plan step shared by the planner, executor, critic and orchestrator.
+
+    Steps are only turned into dicts by to_dict() when a result is printed or returned.
+    Dict-style access (step["id"], step.get("result")) still works for older callers.
+    """
+    id: str = ""
+    description: str = ""
     tool: Optional[str] = None
-    inputs: Dict[str, Any] = Field(default_factory=dict)
-    acceptance: Optional[str] = None
+    inputs: Dict[str, Any] = field(default_factory=dict)
+    acceptance: str = ""
     attempts: int = 0
     max_attempts: int = 2
     done: bool = False
     result: Optional[Any] = None
     state: StepState = StepState.PLANNED
-    # optional fields the executor may set
+    # ids of steps this one needs; None = after the previous step (only serialized once set)
+    depends_on: Optional[List[str]] = None
+    # optional fields the executor may set (only serialized once set)
     reason: Optional[Dict[str, Any]] = None
     criteria: Optional[Dict[str, Any]] = None
+    # core.evidence.Evidence for the tool output quoted in result["summary"] (never serialized)
+    evidence: Optional[Any] = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _STEP_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _STEP_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in _STEP_FIELDS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _STEP_FIELDS else default
 
-class AgentState(BaseModel):
-    task_id: str
-    user_goal: str
-    constraints: Dict[str, Any] = Field(default_factory=dict)
-    plan: List[PlanStep] = Field(default_factory=list)
-    evidence: List[Dict[str, Any]] = Field(default_factory=list)
-    trace: List[Dict[str, Any]] = Field(default_factory=list)
-    status: str = "initial"
-    outcome: Optional[str] = None
-
-def new_step(**kwargs) -> Dict[str, Any]:
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly dict (enum state -> string), in the old dict-step key order."""
+        out = {
+            "id": self.id,
+            "description": self.description,
+            "tool": self.tool,
+            "inputs": self.inputs,
+            "acceptance": self.acceptance,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "done": self.done,
+            "result": self.result,
+            "state": getattr(self.state, "value", self.state),
+        }
+        if self.depends_on is not None:
+            out["depends_on"] = self.depends_on
+        if self.reason is not None:
+            out["reason"] = self.reason
+        if self.criteria is not None:
+            out["criteria"] = self.criteria
+        return out
+
+
+_STEP_FIELDS = frozenset(f.name for f in fields(Step))
+
+
+def new_step(**kwargs) -> Step:
     """
-    Create a *dict-based* plan step with sane defaults; pass fields as kwargs to override.
-    We use dicts for steps to match the current executor/orchestrator.
+    Create a plan step with sane defaults; pass fields as kwargs to override.
     """
-    base: Dict[str, Any] = {
-        "id": "",
-        "description": "",
-        "tool": None,
-        "inputs": {},
-        "acceptance": "",
-        "attempts": 0,
-        "max_attempts": 2,
-        "done": False,
-        "result": None,
-        "state": StepState.PLANNED,
-    }
-    base.update(kwargs)
-    return base
\ No newline at end of file
+    return Step(**kwargs)
+
+
+def __getattr__(name: str) -> Any:
+    # The pydantic models live in core.models so importing core.state stays cheap
+    if name in ("PlanStep", "AgentState"):
+        from core import models
+        return getattr(models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,340 @@
+# core/toolpool.py
+"""
+Process-isolated tool execution (see core.orchestrator: TOOL_ISOLATE / isolate_tool).
+
+A ToolPool keeps `workers` pre-started worker processes, each of which has
+already imported the tools it may be asked to run. A call takes an idle worker,
+sends it the tool spec ("module:function") and keyword arguments, and waits
+for the reply:
+
+- past `timeout_s` the worker is killed and replaced, and ToolTimeout is raised;
+- a worker that dies mid-call (crash, OOM kill) is replaced and WorkerCrashed raised;
+- with `memory_mb`, each worker's address space is capped, so a runaway allocation
+  fails as MemoryError inside the tool (the worker is then replaced as well);
+- a replacement that fails to start is retried by the next call, which raises
+  WorkerCrashed if it cannot start one either, rather than waiting for it forever.
+
+Requests are marshal-encoded (compact, C-speed, no class lookups); only values
+marshal cannot represent fall back to pickle. Workers run tools that may not be
+trusted, so their replies are JSON, which decodes to plain data only: a tool
+returns JSON values (tuples arrive as lists), and an exception, raised or
+returned inside the result, travels as its class names and message. The parent
+rebuilds it as the nearest built-in exception class (ZeroDivisionError,
+ValueError, MemoryError, ...), or RuntimeError("Name: message").
+Messages up to `shm_bytes` travel through a shared-memory block owned by the
+worker; the pipe then only carries an 8-byte length. Larger ones are sent inline.
+Workers use the "spawn" start method: they never inherit the caller's threads or locks.
+"""
+import atexit
+import builtins
+import importlib
+import json
+import marshal
+import pickle
+import queue
+import struct
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_LEN = struct.Struct("<Q")
+_INLINE = b"I"
+_SHARED = b"S"
+_MARSHAL = b"M"
+_PICKLE = b"P"
+
+
+class ToolTimeout(TimeoutError):
+    retryable = False  # the call already had its full timeout (core.retry)
+
+
+class WorkerCrashed(RuntimeError):
+    retryable = False  # a tool that killed its worker would likely do it again
+
+
+def encode(obj: Any) -> bytes:
+    try:
+        return _MARSHAL + marshal.dumps(obj)
+    except ValueError:  # unmarshallable object somewhere inside
+        return _PICKLE + pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode(data: Any) -> Any:
+    view = memoryview(data)
+    try:
+        tag, body = bytes(view[:1]), view[1:]
+        return marshal.loads(body) if tag == _MARSHAL else pickle.loads(body)
+    finally:
+        view.release()
+
+
+def _jsonable(obj: Any) -> Any:
+    if isinstance(obj, BaseException):
+        return {"__error__": [c.__name__ for c in type(obj).__mro__[:-1]], "message": str(obj)}
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def _exception(d: Dict[str, Any]) -> Any:
+    if set(d) != {"__error__", "message"} or not isinstance(d["__error__"], list):
+        return d
+    names, message = d["__error__"], str(d["message"])
+    for name in names:
+        cls = getattr(builtins, str(name), None)
+        # Only plain Exceptions: a worker must not be able to raise SystemExit in the parent
+        if isinstance(cls, type) and issubclass(cls, Exception):
+            return cls(message)
+    return RuntimeError(f"{names[0] if names else 'Error'}: {message}")
+
+
+def encode_reply(ok: bool, value: Any) -> bytes:
+    return json.dumps([ok, value], default=_jsonable, separators=(",", ":")).encode()
+
+
+def decode_reply(data: Any) -> Any:
+    """(ok, value) from a worker's reply; data only, nothing is imported or called."""
+    ok, value = json.loads(bytes(data), object_hook=_exception)
+    return ok is True, value
+
+
+def _send(conn: Any, shm: Any, payload: bytes) -> None:
+    if len(payload) <= shm.size:
+        shm.buf[:len(payload)] = payload
+        conn.send_bytes(_SHARED + _LEN.pack(len(payload)))
+    else:
+        conn.send_bytes(_INLINE + payload)
+
+
+def _recv(conn: Any, shm: Any, loads: Callable[[Any], Any] = decode) -> Any:
+    msg = conn.recv_bytes()
+    if msg[:1] == _SHARED:
+        (n,) = _LEN.unpack_from(msg, 1)
+        return loads(shm.buf[:n])
+    return loads(memoryview(msg)[1:])
+
+
+def _resolve(spec: str, cache: Dict[str, Callable[..., Any]]) -> Callable[..., Any]:
+    fn = cache.get(spec)
+    if fn is None:
+        module_name, func_name = spec.split(":")
+        fn = cache[spec] = getattr(importlib.import_module(module_name), func_name)
+    return fn
+
+
+def _worker_main(conn: Any, shm_name: str, specs: List[str], memory_mb: Optional[int]) -> None:
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=shm_name, track=False)
+    tools: Dict[str, Callable[..., Any]] = {}
+    for spec in specs:  # pre-warm: import before the first call
+        _resolve(spec, tools)
+    if memory_mb:
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+    conn.send_bytes(b"ready")
+    while True:
+        try:
+            spec, kwargs = _recv(conn, shm)
+        except EOFError:
+            break
+        if spec is None:
+            break
+        try:
+            reply = (True, _resolve(spec, tools)(**kwargs))
+        except BaseException as e:
+            reply = (False, e)
+        try:
+            payload = encode_reply(*reply)
+        except Exception as e:  # a result JSON cannot represent
+            payload = encode_reply(False, RuntimeError(f"{type(e).__name__}: {e}"))
+        _send(conn, shm, payload)
+    shm.close()
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "shm", "ready")
+
+    def __init__(self, ctx: Any, specs: List[str], shm_bytes: int, memory_mb: Optional[int]):
+        from multiprocessing import shared_memory
+        self.shm = shared_memory.SharedMemory(create=True, size=shm_bytes)
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child, self.shm.name, specs, memory_mb),
+            name="tool-worker", daemon=True,
+        )
+        try:
+            self.process.start()
+        except BaseException:
+            self.conn.close()
+            self.shm.close()
+            self.shm.unlink()
+            raise
+        finally:
+            child.close()
+        self.ready = False
+
+    def wait_ready(self, timeout: Optional[float]) -> None:
+        if not self.ready:
+            if not self.conn.poll(timeout) or self.conn.recv_bytes() != b"ready":
+                raise WorkerCrashed("tool worker failed to start")
+            self.ready = True
+
+    def stop(self, kill: bool = False) -> None:
+        if not kill and self.process.is_alive():
+            try:
+                self.conn.send_bytes(_INLINE + encode((None, None)))
+                self.process.join(1.0)
+            except OSError:
+                pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ToolPool:
+    """Pre-started worker processes that run registry tools ("module:function") in isolation."""
+
+    def __init__(self, specs: Iterable[str] = (), workers: int = 2, timeout_s: Optional[float] = 10.0,
+                 memory_mb: Optional[int] = None, shm_bytes: int = 1024 * 1024,
+                 start_timeout_s: float = 30.0):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        import multiprocessing
+        self.specs = list(specs)
+        self.workers = workers
+        self.timeout_s = timeout_s
+        self.memory_mb = memory_mb
+        self.shm_bytes = shm_bytes
+        self.start_timeout_s = start_timeout_s
+        self.calls = 0
+        self.timeouts = 0
+        self.crashes = 0
+        self.replaced = 0
+        self._missing = 0  # workers whose replacement failed to start
+        self._ctx = multiprocessing.get_context("spawn")
+        # Idle workers; None wakes a waiting call() to retry a failed replacement
+        self._idle: "queue.SimpleQueue[Optional[_Worker]]" = queue.SimpleQueue()
+        self._all: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(workers):
+            self._spawn()
+        for w in list(self._all):
+            w.wait_ready(start_timeout_s)
+        atexit.register(self.close)
+
+    def _spawn(self) -> None:
+        w = _Worker(self._ctx, self.specs, self.shm_bytes, self.memory_mb)
+        with self._lock:
+            self._all.append(w)
+        self._idle.put(w)
+
+    def _replace(self, w: _Worker) -> None:
+        with self._lock:
+            self._all.remove(w)
+            self.replaced += 1
+        w.stop(kill=True)
+        if not self._closed:
+            with self._lock:
+                self._missing += 1
+            try:
+                self._refill()
+            except WorkerCrashed:
+                pass  # the next call() retries
+
+    def _refill(self) -> None:
+        while not self._closed:
+            with self._lock:
+                if not self._missing:
+                    return
+                self._missing -= 1
+            try:
+                self._spawn()
+            except Exception as e:
+                with self._lock:
+                    self._missing += 1
+                self._idle.put(None)  # wake the next waiting call() to try again
+                raise WorkerCrashed("could not start a tool worker") from e
+
+    def _take(self) -> _Worker:
+        while True:
+            w = self._idle.get()
+            if w is not None:
+                return w
+            self._refill()
+
+    def call(self, spec: str, kwargs: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        """Run the tool `spec` with `kwargs` on a worker; re-raises the tool's own exceptions."""
+        if self._closed:
+            raise RuntimeError("ToolPool is closed")
+        timeout = self.timeout_s if timeout is None else timeout
+        w = self._take()
+        try:
+            w.wait_ready(self.start_timeout_s)
+            _send(w.conn, w.shm, encode((spec, kwargs)))
+            if not w.conn.poll(timeout):
+                with self._lock:
+                    self.timeouts += 1
+                self._replace(w)
+                raise ToolTimeout(f"tool {spec} timed out after {timeout}s")
+            ok, value = _recv(w.conn, w.shm, decode_reply)
+        except ToolTimeout:  # a TimeoutError, hence an OSError: handled before the clause below
+            raise
+        except (EOFError, OSError) as e:
+            with self._lock:
+                self.crashes += 1
+            self._replace(w)
+            raise WorkerCrashed(f"tool worker died running {spec}") from e
+        except BaseException:
+            self._replace(w)
+            raise
+        with self._lock:
+            self.calls += 1
+        if not ok and isinstance(value, MemoryError):
+            self._replace(w)  # a worker that hit its memory cap may be left in a bad state
+        else:
+            self._idle.put(w)
+        if not ok:
+            raise value
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "alive": sum(w.process.is_alive() for w in self._all),
+                "calls": self.calls,
+                "timeouts": self.timeouts,
+                "crashes": self.crashes,
+                "replaced": self.replaced,
+                "missing": self._missing,
+            }
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            workers, self._all = self._all, []
+        for w in workers:
+            w.stop()
+
+    def __enter__(self) -> "ToolPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def from_env(specs: Iterable[str]) -> ToolPool:
+    """A ToolPool for `specs`; TOOL_POOL_WORKERS, TOOL_TIMEOUT_S and TOOL_MEMORY_MB tune it."""
+    import os
+    kw: Dict[str, Any] = {}
+    if os.getenv("TOOL_POOL_WORKERS"):
+        kw["workers"] = int(os.environ["TOOL_POOL_WORKERS"])
+    if os.getenv("TOOL_TIMEOUT_S"):
+        kw["timeout_s"] = float(os.environ["TOOL_TIMEOUT_S"])
+    if os.getenv("TOOL_MEMORY_MB"):
+        kw["memory_mb"] = int(os.environ["TOOL_MEMORY_MB"])
+    return ToolPool(specs, **kw)
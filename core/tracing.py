@@ -0,0 +1,169 @@
+# core/tracing.py
+"""
+Per-run span recording for the orchestrator.
+
+Off by default. When enabled (enable(), RUN_TRACE=1, or any exporter registered),
+run() records one span per stage (planning, each step, tool dispatch, LLM calls,
+evaluation), returns them under result["spans"], and hands them to every exporter.
+
+Spans follow the OpenTelemetry JSON span shape (trace/span ids, parent id, unix-nano
+start/end, attributes, status) with durations taken from a monotonic clock.
+When disabled, span() returns a shared no-op object after one ContextVar lookup.
+"""
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+ENABLED = os.getenv("RUN_TRACE", "").lower() in ("1", "true", "yes")
+
+_exporters: List[Callable[[List[Dict[str, Any]]], None]] = []
+_tracer: "ContextVar[Optional[Tracer]]" = ContextVar("tracer", default=None)
+_parent: "ContextVar[Optional[str]]" = ContextVar("span_parent", default=None)
+
+
+def enable(on: bool = True) -> None:
+    global ENABLED
+    ENABLED = on
+
+
+def is_enabled() -> bool:
+    return ENABLED or bool(_exporters)
+
+
+def add_exporter(exporter: Callable[[List[Dict[str, Any]]], None]) -> None:
+    """Register a callable that receives each finished run's spans (also enables tracing)."""
+    _exporters.append(exporter)
+
+
+def remove_exporter(exporter: Callable[[List[Dict[str, Any]]], None]) -> None:
+    _exporters.remove(exporter)
+
+
+class JsonlExporter:
+    """Append spans to a local file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def __call__(self, spans: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(s) + "\n" for s in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(lines)
+
+
+class Tracer:
+    """Collects the spans of one run."""
+    __slots__ = ("trace_id", "spans", "_wall0", "_mono0", "_lock")
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Dict[str, Any]] = []
+        # Anchor monotonic readings to wall-clock time once per run
+        self._wall0 = time.time_ns()
+        self._mono0 = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def _add(self, span: "_Span", end: int, error: Optional[BaseException]) -> None:
+        record = {
+            "name": span.name,
+            "trace_id": self.trace_id,
+            "span_id": span.span_id,
+            "parent_span_id": span.parent_id,
+            "start_time_unix_nano": self._wall0 + span.start - self._mono0,
+            "end_time_unix_nano": self._wall0 + end - self._mono0,
+            "duration_ms": (end - span.start) / 1e6,
+            "attributes": span.attrs,
+            "status": {"code": "ERROR", "message": str(error)} if error else {"code": "OK"},
+        }
+        with self._lock:
+            self.spans.append(record)
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "attrs", "span_id", "parent_id", "start", "_token")
+
+    def __init__(self, tracer: Tracer, name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = _parent.get()
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "_Span":
+        self._token = _parent.set(self.span_id)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        end = time.perf_counter_ns()
+        _parent.reset(self._token)
+        self.tracer._add(self, end, exc)
+        return False
+
+
+class _NoopSpan:
+    """Returned by span() when no run is being traced; falsy, so callers can skip work."""
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attrs: Any) -> Any:
+    """Context manager timing one stage of the current run (no-op outside a traced run)."""
+    tracer = _tracer.get()
+    if tracer is None:
+        return _NOOP
+    return _Span(tracer, name, attrs)
+
+
+def begin(name: str = "run", **attrs: Any) -> Optional[Any]:
+    """
+    Start tracing a run in the current context; returns a handle for end(), or None
+    when tracing is off.
+    """
+    if not is_enabled():
+        return None
+    tracer = Tracer()
+    tracer_token = _tracer.set(tracer)
+    root = _Span(tracer, name, attrs)
+    root.__enter__()
+    return tracer, tracer_token, root
+
+
+def end(handle: Optional[Any], result: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None) -> None:
+    """Close the run started by begin(); attaches result["spans"] and runs exporters."""
+    if handle is None:
+        return
+    tracer, tracer_token, root = handle
+    root.__exit__(type(error) if error else None, error, None)
+    _tracer.reset(tracer_token)
+    if result is not None:
+        result["spans"] = tracer.spans
+    for exporter in list(_exporters):
+        exporter(tracer.spans)
+
+
+if os.getenv("RUN_TRACE_FILE"):
+    add_exporter(JsonlExporter(os.environ["RUN_TRACE_FILE"]))
@@ -0,0 +1,119 @@
+# tests/test_async.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeAsyncClient:
+    """Stands in for AsyncOpenAI: records concurrency and answers after `delay` seconds."""
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, temperature, timeout=None):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="fake answer"))])
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    import agents.executor as executor_mod
+    from core import llm
+    client = FakeAsyncClient()
+    monkeypatch.setattr(executor_mod, "USE_OPENAI", True)
+    llm.set_async_client(client)
+    yield client
+    llm.set_async_client(None)
+
+
+def test_arun_matches_run_offline():
+    from core.orchestrator import arun, run
+    assert asyncio.run(arun("Please add 5 and 7")) == run("Please add 5 and 7")
+
+
+def test_arun_uses_injected_client(fake_llm):
+    from core.orchestrator import arun
+    r = asyncio.run(arun("Please add 5 and 7"))
+    p1 = next(s for s in r["plan"] if s["id"] == "plan-1")
+    assert p1["reason"]["answer"] == "fake answer"
+    assert r["outcome"]["complete"] is True
+
+
+def test_arun_many_concurrency_cap(fake_llm, monkeypatch):
+    from core import llm
+    from core.orchestrator import arun_many
+    monkeypatch.setattr(llm, "MEMO_SIZE", 0)  # plan-1 messages are identical across runs
+    prompts = [f"Please add {i} and 1" for i in range(40)]
+    results = asyncio.run(arun_many(prompts, concurrency=8))
+    assert fake_llm.calls == 40
+    assert 1 < fake_llm.peak <= 8
+    outs = [next(s for s in r["plan"] if s["id"] == "plan-3")["result"]["tool_output"] for r in results]
+    assert outs == [float(i + 1) for i in range(40)]
+
+
+def test_arun_llm_timeout_does_not_fail_run(fake_llm, monkeypatch):
+    from core import llm
+    from core.orchestrator import arun
+    fake_llm.delay = 1.0
+    monkeypatch.setattr(llm, "DEFAULT_TIMEOUT_S", 0.01)
+    r = asyncio.run(arun("Please add 5 and 7"))
+    p1 = next(s for s in r["plan"] if s["id"] == "plan-1")
+    assert p1["reason"]["thought"] == "reasoning-skip"
+    assert r["outcome"]["complete"] is True
+
+
+def test_identical_concurrent_calls_are_coalesced_then_memoized(fake_llm):
+    from core import llm
+    from core.orchestrator import arun_many
+    results = asyncio.run(arun_many([f"Please add {i} and 1" for i in range(20)], concurrency=20))
+    assert fake_llm.calls == 1
+    assert llm.memo_stats["coalesced"] == 19
+    assert all(r["plan"][0]["reason"]["answer"] == "fake answer" for r in results)
+    asyncio.run(arun_many(["Please add 1 and 1"]))
+    assert fake_llm.calls == 1 and llm.memo_stats["hits"] == 1
+
+
+def test_sync_reason_memoized_and_bounded(monkeypatch):
+    import agents.executor as executor_mod
+    from core import llm
+    calls = []
+    def create(model, messages, temperature, timeout=None):
+        calls.append(messages[-1]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"answer {len(calls)}"))])
+    llm.set_client(SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(executor_mod, "USE_OPENAI", True)
+    monkeypatch.setattr(llm, "MEMO_SIZE", 2)
+    try:
+        steps = [{"description": d, "inputs": {}} for d in ("a", "b", "a", "c", "b")]
+        answers = [executor_mod.reason(s)["answer"] for s in steps]
+    finally:
+        llm.set_client(None)
+    # "a" is served from the memo; "b" is least recently used when "c" arrives
+    assert answers == ["answer 1", "answer 2", "answer 1", "answer 3", "answer 4"]
+    assert len(calls) == 4
+
+
+def test_arun_retries_tools_without_blocking_the_loop(monkeypatch):
+    from core import orchestrator, retry
+    calls = []
+
+    def flaky(text):
+        calls.append(text)
+        if len(calls) == 1:
+            raise ConnectionError("injected")
+        return text
+
+    monkeypatch.setattr(retry, "_sleep", lambda s: pytest.fail("time.sleep on the event loop"))
+    monkeypatch.setattr(orchestrator.ToolRegistry, "echo", staticmethod(lambda **kw: flaky(**kw)))
+    result = asyncio.run(orchestrator.arun("Please repeat this sentence back"))
+    assert result["outcome"]["complete"] is True and len(calls) == 2
@@ -0,0 +1,35 @@
+# tests/test_batch.py
+import json
+import pathlib
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+PROMPTS = ["Please add 5 and 7", "Divide 10 by 0", "Please just repeat this sentence back", "3*4"] * 25
+
+def test_run_batch_matches_run_in_order():
+    from core.orchestrator import run, run_batch, BatchStats
+    stats = BatchStats()
+    results = list(run_batch(PROMPTS, workers=3, chunk_size=7, max_in_flight=2, stats=stats))
+    assert results == [run(p) for p in PROMPTS]
+    assert stats.prompts == len(PROMPTS)
+    assert stats.chunks == 15  # ceil(100 / 7)
+    assert stats.throughput > 0
+
+def test_run_batch_process_pool():
+    from core.orchestrator import run_batch
+    results = list(run_batch(PROMPTS[:8], workers=2, processes=True, chunk_size=3))
+    outputs = [next(s for s in r["plan"] if s["id"] == "plan-3")["result"].get("tool_output") for r in results]
+    assert outputs[:4] == [12.0, None, "Please just repeat this sentence back", 12.0]
+
+def test_app_batch_jsonl(tmp_path):
+    src = tmp_path / "prompts.jsonl"
+    src.write_text('{"prompt": "Please add 5 and 7"}\n\n"Divide 10 by 0"\n', encoding="utf-8")
+    proc = subprocess.run(
+        [sys.executable, "app.py", "--batch", str(src), "--workers", "2"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    lines = [json.loads(l) for l in proc.stdout.splitlines()]
+    assert [r["outcome"]["complete"] for r in lines] == [True, False]
+    assert "throughput=" in proc.stderr
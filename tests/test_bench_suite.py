@@ -0,0 +1,30 @@
+# tests/test_bench_suite.py
+import json
+
+def test_suite_covers_every_stage_and_category():
+    from benchmarks import suite
+    cases = suite.build_cases()
+    stages = {name.split("/")[0] for name in cases}
+    assert stages == {"run", "plan", "parse", "tool", "evaluate", "summarize"}
+    assert {name.split("/")[1] for name in cases} == set(suite.CORPUS)
+    r = suite.measure(cases["run/failure"], iterations=20)
+    assert r["ops_per_s"] > 0 and r["p50_us"] <= r["p99_us"] and r["alloc_bytes"] > 0
+
+def test_compare_flags_regressions_beyond_tolerance():
+    from benchmarks.suite import compare
+    base = {"run/short": {"ops_per_s": 1000.0, "p50_us": 10.0, "p99_us": 20.0, "alloc_bytes": 1000.0}}
+    same = {"run/short": {"ops_per_s": 900.0, "p50_us": 11.0, "p99_us": 25.0, "alloc_bytes": 1100.0}}
+    slow = {"run/short": {"ops_per_s": 500.0, "p50_us": 20.0, "p99_us": 40.0, "alloc_bytes": 5000.0}}
+    assert compare(same, base, 0.25) == []
+    assert len(compare(slow, base, 0.25)) == 3
+    assert compare({"new/case": slow["run/short"]}, base, 0.25) == []
+
+def test_save_then_compare_roundtrip(tmp_path, capsys):
+    from benchmarks import suite
+    path = tmp_path / "baselines" / "local.json"
+    args = ["--iterations", "20", "--repeat", "1", "--filter", "evaluate/"]
+    assert suite.main(args + ["--save", str(path)]) == 0
+    doc = json.loads(path.read_text())
+    assert set(doc["results"]) == {n for n in suite.build_cases() if n.startswith("evaluate/")}
+    assert "python" in doc["meta"]
+    assert suite.main(args + ["--compare", str(path), "--tolerance", "100"]) == 0
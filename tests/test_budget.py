@@ -0,0 +1,143 @@
+# tests/test_budget.py
+import time
+from types import SimpleNamespace
+
+import pytest
+
+
+def _response(content, usage=True):
+    resp = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+    if usage:
+        resp.usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50)
+    return resp
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    import agents.executor as executor_mod
+    from core import llm
+    calls = []
+    with_usage = [True]
+
+    def create(**kw):
+        calls.append(kw)
+        return _response("fake answer", usage=with_usage[0])
+
+    monkeypatch.setattr(executor_mod, "USE_OPENAI", True)
+    monkeypatch.setattr(llm, "MEMO_SIZE", 0)
+    llm.set_client(SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    yield SimpleNamespace(calls=calls, usage=with_usage)
+    llm.set_client(None)
+
+
+def test_offline_run_reports_zero_usage():
+    from core.orchestrator import run
+    usage = run("Please add 5 and 7")["usage"]
+    assert usage["total_tokens"] == 0 and usage["cost_usd"] == 0 and usage["llm_calls"] == 0
+
+
+def test_run_reports_tokens_and_cost(fake_llm):
+    from core.orchestrator import run
+    result = run("Please add 5 and 7")
+    assert result["plan"][0]["reason"]["answer"] == "fake answer"
+    assert result["usage"]["prompt_tokens"] == 100
+    assert result["usage"]["completion_tokens"] == 50
+    assert result["usage"]["llm_calls"] == 1
+    assert result["usage"]["cost_usd"] == pytest.approx((100 * 0.15 + 50 * 0.60) / 1e6)
+
+
+def test_exhausted_budget_degrades_to_offline_answer(fake_llm):
+    from core.budget import Budget
+    from core.orchestrator import run
+    batch = Budget(max_tokens=100, max_cost_usd=None)
+    first = run("Please add 5 and 7", budget=batch)
+    second = run("Please add 5 and 7", budget=batch)
+    assert len(fake_llm.calls) == 1 and first["usage"]["llm_calls"] == 1
+    assert second["plan"][0]["reason"]["answer"] == "Drafted without LLM (budget exhausted)."
+    assert second["outcome"] == first["outcome"] == {"complete": True, "score": 1.0}
+    assert second["usage"]["denied_calls"] == 1 and second["usage"]["total_tokens"] == 0
+    # The call that crossed the limit is still charged in full
+    assert batch.usage()["total_tokens"] == 150
+
+
+def test_batch_usage_accumulates(fake_llm):
+    from core.budget import Budget
+    from core.orchestrator import BatchStats, run_batch
+    stats = BatchStats()
+    total = Budget(max_tokens=None, max_cost_usd=None)
+    results = list(run_batch(["Please add 5 and 7"] * 5, workers=2, chunk_size=2, stats=stats, budget=total))
+    assert all(r["usage"]["total_tokens"] == 150 for r in results)
+    assert stats.prompt_tokens + stats.completion_tokens == 750
+    assert total.usage()["total_tokens"] == 750 and total.usage()["llm_calls"] == 5
+
+
+def test_usage_estimated_when_response_has_none(fake_llm):
+    from core.orchestrator import run
+    fake_llm.usage[0] = False
+    usage = run("Please add 5 and 7")["usage"]
+    assert usage["llm_calls"] == 1
+    assert usage["prompt_tokens"] > 0 and usage["completion_tokens"] == len("fake answer") // 4
+
+
+def test_limits_and_prices_come_from_config(tmp_path):
+    from core import budget, config
+    cfg = tmp_path / "agent.yaml"
+    cfg.write_text("budgets:\n  max_tokens: 10\n  prices:\n    my-model: [1.0, 2.0]\n", encoding="utf-8")
+    default = config.CONFIG_PATH
+    config.reload(str(cfg))
+    try:
+        b = budget.Budget()
+        assert b.max_tokens == 10 and b.max_cost_usd is None
+        b.charge("my-model", 1_000_000, 1_000_000)
+    finally:
+        config.reload(default)
+    assert b.cost_usd == pytest.approx(3.0)
+    with pytest.raises(budget.BudgetExceeded):
+        b.check()
+
+
+def test_budget_degraded_runs_are_not_cached(fake_llm):
+    from core import orchestrator
+    from core.budget import Budget
+    from core.cache import RunCache
+    cache = RunCache()
+    orchestrator.set_run_cache(cache)
+    try:
+        spent = Budget(max_tokens=0, max_cost_usd=None)
+        degraded = orchestrator.run("Please add 5 and 7", budget=spent)
+        assert degraded["usage"]["denied_calls"] == 1 and len(cache) == 0
+        fresh = orchestrator.run("Please add 5 and 7")
+        assert fresh["plan"][0]["reason"]["answer"] == "fake answer" and len(fake_llm.calls) == 1
+        assert orchestrator.run("Please add 5 and 7")["usage"]["llm_calls"] == 0  # now cached
+    finally:
+        orchestrator.set_run_cache(None)
+
+
+def test_hedged_duplicates_are_charged(monkeypatch):
+    import threading
+    from core import llm, retry
+    from core.budget import Budget, use
+    lock, calls, finished = threading.Lock(), [], threading.Event()
+
+    def create(**kw):
+        with lock:
+            n = len(calls)
+            calls.append(kw)
+        if n == 0:
+            time.sleep(0.3)  # the first request is slow; the hedge answers first
+            finished.set()
+        return _response("answer")
+
+    monkeypatch.setattr(llm, "MEMO_SIZE", 0)
+    retry.set_policy(retry.RetryPolicy(hedge_after_s=0.02))
+    llm.set_client(SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    try:
+        b = Budget(max_tokens=None, max_cost_usd=None)
+        with use(b):
+            llm.complete("gpt-4o-mini", [{"role": "user", "content": "hi"}])
+        assert finished.wait(2)
+        time.sleep(0.05)
+        assert len(calls) == 2 and b.usage()["llm_calls"] == 2 and b.usage()["total_tokens"] == 300
+    finally:
+        llm.set_client(None)
+        retry.set_policy(None)
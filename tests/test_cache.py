@@ -0,0 +1,62 @@
+# tests/test_cache.py
+import pytest
+
+@pytest.fixture
+def cached_run():
+    from core import orchestrator
+    from core.cache import RunCache
+    cache = RunCache(max_entries=3)
+    orchestrator.set_run_cache(cache)
+    yield orchestrator.run, cache
+    orchestrator.set_run_cache(None)
+
+def test_run_cache_hits_and_returns_fresh_copies(cached_run, monkeypatch):
+    import agents.planner as planner_mod
+    run, cache = cached_run
+    first = run("Please add 5 and 7")
+    first["outcome"]["complete"] = "mutated by caller"
+    monkeypatch.setattr(planner_mod, "create_initial_plan", lambda p: pytest.fail("cache miss"))
+    second = run("Please add 5 and 7")
+    assert second["outcome"]["complete"] is True
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+def test_run_cache_key_tracks_registry(cached_run, monkeypatch):
+    from core import orchestrator
+    run, cache = cached_run
+    run("Please add 5 and 7")
+    before = orchestrator._run_cache_key("Please add 5 and 7")
+    monkeypatch.setitem(orchestrator._TOOL_REGISTRY, "echo.say", "tools.echo:echo")
+    assert orchestrator._run_cache_key("Please add 5 and 7") != before
+    run("Please add 5 and 7")
+    assert cache.stats["misses"] == 2
+
+def test_memory_cache_lru_ttl_and_byte_cap(monkeypatch):
+    from core import cache as cache_mod
+    c = cache_mod.RunCache(max_entries=2)
+    c.put("a", {"v": 1}); c.put("b", {"v": 2})
+    assert c.get("a") == {"v": 1}       # a becomes most recent
+    c.put("c", {"v": 3})                # evicts b
+    assert c.get("b") is None and c.stats["evictions"] == 1
+
+    small = cache_mod.RunCache(max_bytes=30)
+    small.put("x", {"v": "a" * 10}); small.put("y", {"v": "b" * 10})
+    assert len(small) == 1 and small.nbytes <= 30
+
+    now = [100.0]
+    monkeypatch.setattr(cache_mod.time, "monotonic", lambda: now[0])
+    ttl = cache_mod.RunCache(ttl_s=5)
+    ttl.put("k", {"v": 1})
+    now[0] += 6
+    assert ttl.get("k") is None and ttl.stats["expirations"] == 1
+
+def test_sqlite_cache_persists_and_prunes(tmp_path):
+    from core.cache import SqliteRunCache
+    path = str(tmp_path / "runs.sqlite")
+    c = SqliteRunCache(path, max_entries=3, prune_every=1)
+    for i in range(5):
+        c.put(f"k{i}", {"v": i})
+    assert len(c) == 3
+    reopened = SqliteRunCache(path)  # e.g. another worker process or a restart
+    assert reopened.get("k4") == {"v": 4}
+    assert reopened.get("k0") is None
+    assert reopened.stats["hits"] == 1 and reopened.stats["misses"] == 1
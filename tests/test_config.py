@@ -0,0 +1,142 @@
+# tests/test_config.py
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def upper(text):
+    return text.upper()
+
+
+@pytest.fixture
+def cfg(tmp_path):
+    from core import config
+    default = config.CONFIG_PATH
+    path = tmp_path / "agent.yaml"
+    path.write_text("memory:\n  topk: 3\n", encoding="utf-8")
+    config.reload(str(path))
+    yield path
+    config.stop_watching()
+    config.reload(default)
+
+
+def _rewrite(path, text):
+    # A new size as well as a new mtime, so the change is seen even on coarse-mtime filesystems
+    path.write_text(text, encoding="utf-8")
+
+
+def test_default_config_compiles_to_typed_snapshot():
+    from core import config
+    s = config.compile_settings({
+        "llm": {"enabled": "auto"},
+        "models": {"planner": "p", "executor_reasoning": "e"},
+        "budgets": {"max_tokens": 100, "prices": {"m": [1, 2]}},
+        "memory": {"topk": 7},
+    }, env={"OPENAI_API_KEY": "sk", "MODEL_EXECUTOR": "from-env"})
+    assert s.llm_enabled is True
+    assert (s.models.planner, s.models.executor, s.models.critic) == ("p", "from-env", config.DEFAULT_MODEL)
+    assert s.budgets.max_tokens == 100 and s.budgets.max_cost_usd is None
+    assert s.budgets.prices["m"] == (1.0, 2.0)
+    assert s.memory.topk == 7 and s.tools == config.DEFAULT_TOOLS
+    with pytest.raises(TypeError):
+        s.raw["memory"]["topk"] = 1
+    current = config.settings()
+    assert current.source == config.CONFIG_PATH and current.retry["step_max_attempts"] == 2
+
+
+@pytest.mark.parametrize("data", [
+    {"memory": {"topk": 0}},
+    {"budgets": {"max_tokens": "lots"}},
+    {"tools": {"x": "no_colon"}},
+    {"acceptance": {"Looks fine": "vibes"}},
+    {"llm": {"enabled": "sometimes"}},
+    {"models": ["gpt"]},
+])
+def test_invalid_config_is_rejected(data):
+    from core.config import ConfigError, compile_settings
+    with pytest.raises(ConfigError):
+        compile_settings(data, env={})
+
+
+def test_watch_swaps_in_new_snapshot(cfg):
+    from core import config, orchestrator
+    before = config.settings()
+    assert before.memory.topk == 3
+    config.watch(0.02)
+    _rewrite(cfg, "memory:\n  topk: 9\ntools:\n  echo.say: \"test_config:upper\"\n")
+    deadline = time.monotonic() + 5
+    while config.settings() is before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    s = config.settings()
+    assert s.version == before.version + 1 and s.memory.topk == 9
+    # The registry follows the snapshot, without a restart
+    assert orchestrator.ToolRegistry.echo(text="hi") == "HI"
+    assert before.memory.topk == 3  # snapshots never change in place
+
+
+def test_bad_edit_keeps_current_snapshot(cfg):
+    from core import config, orchestrator
+    before = config.settings()
+    _rewrite(cfg, "memory:\n  topk: [\n")
+    with pytest.raises(config.ConfigError):
+        config.reload()
+    _rewrite(cfg, "memory:\n  topk: -1\n")
+    with pytest.raises(config.ConfigError, match="keeping settings"):
+        config.reload()
+    assert config.settings() is before and config.last_error is not None
+    assert orchestrator.ToolRegistry.echo(text="hi") == "hi"
+
+
+def test_reload_swaps_the_tool_registry_whole(cfg):
+    import threading
+    from core import config, orchestrator
+    extra = {f"extra.t{i}": "test_config:upper" for i in range(200)}
+    with_extra = config.compile_settings({"tools": extra})
+    without = config.compile_settings({})
+    stop = threading.Event()
+
+    def reload_loop():
+        while not stop.is_set():
+            orchestrator._apply_config_tools(with_extra)
+            orchestrator._apply_config_tools(without)
+
+    t = threading.Thread(target=reload_loop)
+    t.start()
+    try:
+        seen = set()
+        for _ in range(2000):
+            registry = orchestrator._TOOL_REGISTRY
+            orchestrator._run_cache_key("hi")  # json.dumps of the registry
+            seen.add(len(registry.keys() & extra.keys()))
+    finally:
+        stop.set()
+        t.join()
+    orchestrator._apply_config_tools(config.settings())
+    assert seen <= {0, len(extra)}
+    assert "extra.t0" not in orchestrator._TOOL_REGISTRY
+    assert orchestrator._TOOL_REGISTRY == dict(config.DEFAULT_TOOLS)
+
+
+def test_acceptance_rules_come_from_config(cfg):
+    from core import config, orchestrator
+    assert orchestrator.run("Multiply 6 by 7")["outcome"]["complete"] is True
+    # Only plan-1's text is mapped, to a rule its (empty) inputs fail
+    _rewrite(cfg, "acceptance:\n  \"Has concrete criteria\": inputs\n")
+    config.reload()
+    assert orchestrator.run("Multiply 6 by 7")["outcome"]["complete"] is False
+
+
+def test_compiled_config_is_reused_without_yaml(cfg):
+    from core import config
+    config.load_section("memory")  # leaves the parsed copy next to the file
+    code = ("import sys; from core import config; "
+            "print(config.settings().memory.topk, 'yaml' in sys.modules)")
+    env = dict(os.environ, AGENT_CONFIG=str(cfg))
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.split() == ["3", "False"]
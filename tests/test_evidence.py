@@ -0,0 +1,51 @@
+# tests/test_evidence.py
+
+
+def _executed(prompt):
+    import agents.planner as planner
+    from agents.executor import run_step
+    from core.orchestrator import ToolRegistry
+    plan = planner.create_initial_plan(prompt)
+    for step in plan:
+        run_step(step, plan, prompt, tools=ToolRegistry)
+    return plan
+
+
+def test_tool_outputs_are_indexed_by_step_and_value():
+    from core.evidence import EvidenceStore
+    plan = _executed("Please add 5 and 7")
+    store = EvidenceStore.from_plan(plan)
+    assert len(store) == 1
+    (ev,) = store.for_step("plan-3")
+    assert (ev.tool, ev.value) == ("math", 12.0)
+    assert plan[2].result["summary"][ev.offset:].startswith("12.0")
+    assert store.find(12.0) == [ev] and store.find(13.0) == []
+    assert store.for_step("plan-1") == []
+
+
+def test_large_echo_output_is_referenced_not_copied():
+    text = "Please repeat: " + "lorem ipsum " * 200_000
+    plan = _executed(text)
+    ev = plan[2].evidence
+    assert ev.value is plan[2].result["tool_output"] and ev.text is ev.value
+    from agents.critic import evaluate
+    assert evaluate(plan) == {"complete": True, "score": 1.0}
+
+
+def test_critic_checks_the_quoted_position():
+    from agents.critic import evaluate
+    plan = _executed("Multiply 6 by 7")
+    assert evaluate(plan)["complete"] is True
+    # Still mentions 42.0, but not where the executor quoted the result
+    plan[2].result["summary"] = "42.0 is not what was computed here."
+    assert evaluate(plan)["complete"] is False
+
+
+def test_steps_without_evidence_fall_back_to_substring_check():
+    from agents.critic import evaluate
+    plan = _executed("Multiply 6 by 7")
+    for step in plan:
+        step.evidence = None
+    assert evaluate(plan)["complete"] is True
+    plan[2].result["summary"] = "no number"
+    assert evaluate(plan)["complete"] is False
@@ -0,0 +1,89 @@
+# tests/test_expression.py
+import pytest
+
+from tools import expression, math_tool
+
+
+@pytest.mark.parametrize("text, value", [
+    ("3 + 4 + 5 + 6", 18.0),
+    ("(2+3)*4/7", 20 / 7),
+    ("2 + 3 * 4 - 8 / 2", 10.0),
+    ("10 - 4 - 3", 3.0),               # left associative
+    ("-(1.5 x 2) ÷ 3", -1.0),
+    ("2 * -3 + - -1", -5.0),
+    ("((((.5))))", 0.5),
+])
+def test_expressions_fold_to_their_value(text, value):
+    node = expression.compile(text)
+    assert node == expression.Num(pytest.approx(value))
+    assert math_tool.expr(text) == pytest.approx(value)
+
+
+@pytest.mark.parametrize("text", ["", "3 4", "1 +", "* 2", "(1 + 2", "1 + 2)", "()", "2 ** 3",
+                                  "__import__('os')", "1.2.3 + 4"])
+def test_malformed_expressions_are_rejected(text):
+    with pytest.raises(ValueError):
+        math_tool.expr(text)
+
+
+def test_division_by_zero_is_raised_when_evaluated():
+    node = expression.compile("1 + 10 / (5 - 5) * 2")
+    assert isinstance(node, expression.BinOp)  # the failing part is not folded away
+    with pytest.raises(ZeroDivisionError, match="Division by zero"):
+        expression.evaluate(node)
+
+
+def test_long_and_deep_expressions_need_no_recursion():
+    n = 20_000
+    assert math_tool.expr(" + ".join(map(str, range(n)))) == n * (n - 1) / 2
+    assert math_tool.expr("(" * n + "1" + " + 1)" * n) == n + 1
+    with pytest.raises(ZeroDivisionError):
+        math_tool.expr("1 / 0" + " + 1" * n)
+
+
+def test_compiled_expressions_are_cached_by_normalized_text():
+    expression.clear_cache()
+    first = expression.compile("(2+3) x 4")
+    assert expression.compile("  (2+3)   X 4 ") is first
+    assert expression.cache_stats == {"hits": 1, "misses": 1}
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("add 3, 4, 5 and 6", "3 + 4 + 5 + 6"),
+    ("What is the sum of 1, 2.5, 3?", "1 + 2.5 + 3"),
+    ("multiply 2, 3 and 4", "2 * 3 * 4"),
+    ("What is (2+3)*4/7?", "(2+3)*4/7"),
+    ("Compute 1 + 2 x 3.", "1 + 2 * 3"),
+    ("Compute. 3+4+5", "3+4+5"),        # a full stop does not start the expression
+    ("Hi. (2+3)*4", "(2+3)*4"),
+    ("Quick one. 1 + 2 + 3", "1 + 2 + 3"),
+    ("Please add 5 and 7", None),       # two operands: the binary parser's job
+    ("what is -2.5 x 4?", None),
+    ("Divide 10 by 0", None),
+])
+def test_parse_expression_from_prompt(prompt, expected):
+    from agents.executor import _parse_expression_from_prompt
+    assert _parse_expression_from_prompt(prompt) == expected
+
+
+def test_expression_found_in_long_prompts():
+    from agents.executor import _parse_expression_from_prompt
+    pad = "Some pasted context, version 2.1 - see the notes. " * 300
+    assert _parse_expression_from_prompt(pad + "What is 3 + 4 * 5?") == "3 + 4 * 5"
+    assert _parse_expression_from_prompt("Sum up 1, 2 and 3. " + pad) == "1 + 2 + 3"
+    assert _parse_expression_from_prompt(pad + "Please add 5 and 7") is None
+
+
+def test_run_evaluates_whole_expression_in_one_tool_call(monkeypatch):
+    from core import orchestrator
+    calls = []
+    orig = orchestrator.ToolRegistry.math
+    monkeypatch.setattr(orchestrator.ToolRegistry, "math", staticmethod(lambda **kw: calls.append(kw) or orig(**kw)))
+    r = orchestrator.run("add 3, 4, 5 and 6")
+    assert calls == [{"op": "expr", "expr": "3 + 4 + 5 + 6"}]
+    assert r["outcome"]["complete"] is True and r["plan"][2]["result"]["tool_output"] == 18.0
+    r = orchestrator.run("Calculate 10 / (5 - 5) + 1")
+    assert r["outcome"]["complete"] is False and r["plan"][2]["result"] == {"error": "Division by zero"}
+    # run_batch keeps expressions out of the vectorized binary batch
+    prompts = ["(2+3)*4/7", "Please add 5 and 7", "1 + 1 / 0 + 1"]
+    assert list(orchestrator.run_batch(prompts, workers=1, chunk_size=3)) == [orchestrator.run(p) for p in prompts]
@@ -0,0 +1,133 @@
+# tests/test_history.py
+import os
+import shutil
+import time
+
+import pytest
+
+
+@pytest.fixture
+def history(tmp_path):
+    from core.history import RunHistory
+    h = RunHistory(str(tmp_path / "history"), segment_bytes=64 * 1024, flush_interval_s=0.01)
+    yield h
+    h.close()
+
+
+def _segments(h, ext=".seg"):
+    return sorted(n for n in os.listdir(h.path) if n.endswith(ext))
+
+
+def test_run_is_recorded_and_queryable_by_prompt_tool_and_outcome(history):
+    from core import orchestrator
+    orchestrator.set_history(history)
+    try:
+        for p in ["Divide 10 by 0", "Please add 5 and 7", "Divide 8 by 2", "Please repeat this"]:
+            orchestrator.run(p)
+    finally:
+        orchestrator.set_history(None)
+    assert history.flush(timeout=5)
+
+    failed_div = history.query(tool="math.div", complete=False)
+    assert [r["prompt"] for r in failed_div] == ["Divide 10 by 0"]
+    assert failed_div[0]["result"]["outcome"]["complete"] is False
+    assert [r["prompt"] for r in history.query(tool="math.div")] == ["Divide 10 by 0", "Divide 8 by 2"]
+    assert history.query(prompt="Please add 5 and 7")[0]["result"]["plan"][2]["result"]["tool_output"] == 12.0
+    assert len(history.query(complete=True)) == 3
+    assert len(history.query(limit=2)) == 2
+
+
+def test_recorded_run_is_a_snapshot(history):
+    from core import orchestrator
+    orchestrator.set_history(history)
+    try:
+        results = [orchestrator.run("Please add 5 and 7") for _ in range(50)]
+    finally:
+        orchestrator.set_history(None)
+    for r in results:  # the caller reuses its results before the writer gets to them
+        r["outcome"]["complete"] = False
+        r["plan"].clear()
+    assert history.flush(timeout=5)
+    recorded = history.query(complete=True)
+    assert len(recorded) == 50 and all(len(r["result"]["plan"]) == 3 for r in recorded)
+    assert history.query(complete=False) == []
+
+
+def test_write_error_drops_the_batch_and_keeps_the_writer_alive(history, monkeypatch):
+    result = {"plan": [], "outcome": {"complete": True}}
+    history.record("before", result)
+    assert history.flush(timeout=5)
+    rotate = history._rotate
+
+    def disk_full(need):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(history, "_rotate", disk_full)
+    history.record("lost", {**result, "blob": "x" * 100_000})  # needs a new segment
+    assert history.flush(timeout=5)
+    assert history.stats()["errors"] == 1 and history.dropped == 1
+    assert isinstance(history.last_error, OSError)
+    monkeypatch.setattr(history, "_rotate", rotate)
+    history.record("after", result)
+    assert history.flush(timeout=5)
+    assert [r["prompt"] for r in history.query()] == ["before", "after"]
+
+
+def test_time_range_queries(history):
+    result = {"plan": [], "outcome": {"complete": True}}
+    history.record("early", result)
+    history.flush()
+    mid = time.time()
+    time.sleep(0.01)
+    history.record("late", result)
+    history.flush()
+    assert [r["prompt"] for r in history.query(since=mid)] == ["late"]
+    assert [r["prompt"] for r in history.query(until=mid)] == ["early"]
+    assert history.query(since=time.time() + 60) == []
+
+
+def test_rotation_retention_and_compaction(history):
+    history.max_bytes = 200 * 1024
+    history.compact_min_segments = 1000  # compact explicitly below
+    blob = {"plan": [], "outcome": {"complete": True}, "trace": "x" * 4000}
+    for i in range(100):
+        history.record(f"prompt {i}", blob)
+    history.flush()
+    sealed = _segments(history)
+    assert len(sealed) >= 2
+    total = sum(os.path.getsize(os.path.join(history.path, n)) for n in sealed)
+    assert total <= history.max_bytes
+    kept = [r["prompt"] for r in history.query()]
+    assert kept[-1] == "prompt 99" and kept[0] != "prompt 0"  # oldest segments were dropped
+
+    history.close()  # seals the (partly filled) active segment
+    before = history.query()
+    history.segment_bytes = 1024 * 1024  # every sealed segment is now undersized
+    assert history.compact() == len(sealed) + 1
+    assert len(_segments(history)) == 1
+    assert history.query() == before
+    assert history.compact(max_age_s=0) == 1 and history.query() == []
+
+
+def test_segment_left_open_by_dead_process_is_recovered(tmp_path):
+    from core.history import RunHistory
+    first = RunHistory(str(tmp_path / "a"), flush_interval_s=0.01)
+    first.record("survives", {"plan": [], "outcome": {"complete": False}})
+    first.flush()
+    (open_seg,) = _segments(first, ".open")
+    # Pretend a crashed writer (pid 2**22 + 1 is above any possible pid_max) left it behind mid-record
+    stem = open_seg[:-len(".open")].split("-")
+    crashed = os.path.join(str(tmp_path / "b"), f"{stem[0]}-{2 ** 22 + 1}-1")
+    os.makedirs(str(tmp_path / "b"))
+    shutil.copy(os.path.join(first.path, open_seg), crashed + ".open")
+    end = first._segment.pos
+    with open(crashed + ".open", "r+b") as fh:
+        fh.seek(end)
+        fh.write(b"\x40\x00\x00\x00\xde\xad\xbe\xef{\"ts\": 1")  # torn record: bad crc, short payload
+    first.close()
+
+    second = RunHistory(str(tmp_path / "b"), flush_interval_s=0.01)
+    assert second.recover() == 1
+    assert [r["prompt"] for r in second.query(complete=False)] == ["survives"]
+    assert _segments(second, ".open") == []
+    assert os.path.getsize(crashed + ".seg") == end
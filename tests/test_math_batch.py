@@ -0,0 +1,40 @@
+# tests/test_math_batch.py
+import sys
+
+import pytest
+
+from tools import math_tool
+
+OPS = ["add", "sub", "mul", "div", "div", "div", "pow"]
+A = [5.0, 10.0, 3.0, 10.0, 1.0, -2.0, 2.0]
+B = [7.0, 3.0, 4.0, 4.0, 0.0, -0.0, 3.0]
+
+def _expected():
+    out = []
+    for op, a, b in zip(OPS, A, B):
+        try:
+            out.append(math_tool.math(op, a, b))
+        except (ZeroDivisionError, ValueError) as e:
+            out.append((type(e), str(e)))
+    return out
+
+def _normalize(results):
+    return [(type(r), str(r)) if isinstance(r, Exception) else r for r in results]
+
+def test_math_batch_matches_scalar_math():
+    pytest.importorskip("numpy")
+    assert _normalize(math_tool.math_batch(OPS, A, B)) == _expected()
+
+def test_math_batch_without_numpy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)  # makes `import numpy` raise ImportError
+    assert _normalize(math_tool.math_batch(OPS, A, B)) == _expected()
+
+def test_run_batch_uses_vectorized_math(monkeypatch):
+    from core.orchestrator import ToolRegistry, run, run_batch
+    calls = []
+    orig = ToolRegistry.math_batch
+    monkeypatch.setattr(ToolRegistry, "math_batch", staticmethod(lambda **kw: calls.append(kw) or orig(**kw)))
+    prompts = ["Please add 5 and 7", "Divide 10 by 0", "Please just repeat this sentence back", "3*4"]
+    results = list(run_batch(prompts, workers=1, chunk_size=4))
+    assert [len(c["ops"]) for c in calls] == [3]
+    assert results == [run(p) for p in prompts]
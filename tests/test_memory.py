@@ -0,0 +1,111 @@
+# tests/test_memory.py
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("numpy")
+
+PROMPTS = ["Please add 5 and 7", "Add 8 and 9 please", "Multiply 6 by 7",
+           "Please repeat this sentence back", "Divide 10 by 0"]
+
+
+def test_top_k_similar_runs_best_first():
+    from core.memory import RunMemory
+    memory = RunMemory(capacity=2)  # grows past its initial capacity
+    for p in PROMPTS:
+        memory.record(p, tool="math", inputs={"p": p}, complete=True)
+    assert len(memory) == 5
+    hits = memory.similar("please add 3 and 4", k=2)
+    assert [h.prompt for h in hits] == ["Please add 5 and 7", "Add 8 and 9 please"]
+    assert hits[0].score == pytest.approx(1.0) and hits[0].score > hits[1].score
+    assert hits[0].inputs == {"p": "Please add 5 and 7"} and hits[0].complete is True
+    assert len(memory.similar("add")) == 5  # k defaults to memory.topk
+    assert memory.similar("???") == [] and RunMemory().similar("add 1 and 2") == []
+
+
+def test_prefilter_finds_near_duplicates():
+    import random
+    from core.memory import RunMemory
+    rng = random.Random(0)
+    words = ["alpha", "bravo", "delta", "kilo", "lima", "oscar", "sierra", "tango", "victor", "zulu",
+             "north", "south", "east", "west", "red", "green", "blue", "amber"]
+    memory = RunMemory(exact_below=0)
+    prompts = [" ".join(rng.sample(words, 6)) for _ in range(5_000)]
+    memory.extend((p, {"tool": "echo"}) for p in prompts)
+    target = prompts[1234]
+    assert memory.similar(target, k=1)[0].score == pytest.approx(1.0)
+    assert memory.similar(target, k=1, exact=True)[0].prompt == target
+
+
+def test_memory_mapped_store_survives_reopen(tmp_path):
+    from core.memory import RunMemory
+    with RunMemory(str(tmp_path), capacity=2) as memory:
+        for p in PROMPTS:
+            memory.record(p, tool="math")
+    # A record torn by a crash mid-append is dropped on open
+    with open(tmp_path / "records.jsonl", "ab") as fh:
+        fh.write(b'{"prompt": "torn')
+    with RunMemory(str(tmp_path)) as memory:
+        assert len(memory) == 5
+        assert memory.similar("Multiply 2 by 3", k=1)[0].prompt == "Multiply 6 by 7"
+        memory.record("Subtract 3 from 10", tool="math")
+    with RunMemory(str(tmp_path)) as memory:
+        assert len(memory) == 6 and memory.similar("subtract 1 from 2", k=1)[0].tool == "math"
+
+
+def test_orchestrator_runs_are_remembered():
+    from core import orchestrator
+    from core.memory import RunMemory
+    memory = RunMemory()
+    orchestrator.set_memory(memory)
+    try:
+        orchestrator.run("Multiply 6 by 7")
+        orchestrator.run("Please just repeat this back")
+    finally:
+        orchestrator.set_memory(None)
+    (hit,) = memory.similar("Multiply 3 by 4", k=1)
+    assert (hit.tool, hit.inputs, hit.complete) == ("math", {"op": "mul", "a": 6.0, "b": 7.0}, True)
+
+
+@pytest.fixture
+def planner_llm(monkeypatch):
+    import agents.planner as planner_mod
+    from core import llm
+    calls = []
+    plan = [{"id": "s1", "description": "Add the numbers", "tool": "math.add", "acceptance": "Inputs present"}]
+
+    def create(**kw):
+        calls.append(kw)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(plan)))])
+
+    monkeypatch.setattr(planner_mod, "USE_OPENAI", True)
+    monkeypatch.setattr(llm, "MEMO_SIZE", 0)
+    llm.set_client(SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    yield calls
+    llm.set_client(None)
+
+
+def test_make_plan_gets_similar_runs_and_reuses_remembered_plans(planner_llm):
+    from agents.planner import make_plan
+    from core import orchestrator
+    from core.memory import RunMemory
+    memory = RunMemory()
+    memory.record("Please add 1 and 2", tool="math", inputs={"op": "add", "a": 1.0, "b": 2.0}, complete=True)
+    orchestrator.set_memory(memory)
+    try:
+        first = make_plan("Please add 5 and 7 then report", {})
+        assert len(planner_llm) == 1
+        assert "Similar past runs:\n- 'Please add 1 and 2'" in planner_llm[0]["messages"][1]["content"]
+        # The LLM plan was remembered; the same goal reuses it (case and spacing aside)
+        again = make_plan("please add 5 and 7,  then report", {})
+        assert len(planner_llm) == 1 and [s.id for s in again] == [s.id for s in first] == ["s1"]
+        # Other numbers: the remembered plan's inputs would be wrong, so it is only context
+        make_plan("Please add 50 and 70 then report", {})
+        assert len(planner_llm) == 2
+        assert "'Please add 5 and 7 then report' (similarity 1.00)" in planner_llm[1]["messages"][1]["content"]
+        # Explicit context is used as given
+        make_plan("Something else entirely", {}, mem_ctx=["note"])
+        assert planner_llm[-1]["messages"][1]["content"].endswith("Similar past runs:\n- note")
+    finally:
+        orchestrator.set_memory(None)
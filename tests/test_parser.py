@@ -0,0 +1,25 @@
+# tests/test_parser.py
+import pytest
+
+from agents.executor import _parse_math_from_prompt
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("Please add 5 and 7", ("add", 5.0, 7.0)),
+    ("Divide 10 by 0", ("div", 10.0, 0.0)),
+    ("3*4", ("mul", 3.0, 4.0)),
+    ("what is -2.5 x 4?", ("mul", -2.5, 4.0)),
+    ("Subtract 3 from 10", ("sub", 10.0, 3.0)),
+    ("9 minus 4", ("sub", 9.0, 4.0)),
+    ("multiply 6 by 7", ("mul", 6.0, 7.0)),
+    ("8 over 2", ("div", 8.0, 2.0)),
+    ("ratio 1.2.3-3", ("sub", 2.3, 3.0)),       # expression starts inside "1.2"
+    ("timesubtract 4 from 9", ("sub", 9.0, 4.0)),  # overlapping keywords are all seen
+    ("Please just repeat this sentence back", None),
+    ("add 5", None),
+])
+def test_parse_math_from_prompt(prompt, expected):
+    assert _parse_math_from_prompt(prompt) == expected
+
+def test_long_prompt_keyword_after_filler():
+    filler = "Some pasted context with build 2024 and related notes. " * 200
+    assert _parse_math_from_prompt(filler + "Please multiply 6 by 7") == ("mul", 6.0, 7.0)
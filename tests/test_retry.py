@@ -0,0 +1,171 @@
+# tests/test_retry.py
+import asyncio
+import threading
+import time
+import pytest
+
+class FakeTool:
+    """Local stand-in for a flaky upstream: fails the first `failures` calls, sleeps `latency` per call."""
+    def __init__(self, failures=0, error=ConnectionError, latency=0.0, slow_calls=None):
+        self.failures = failures
+        self.error = error
+        self.latency = latency
+        self.slow_calls = slow_calls  # call indexes that sleep; None = all
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            self.calls += 1
+            return self.calls - 1
+
+    def _should_sleep(self, n):
+        return self.latency and (self.slow_calls is None or n in self.slow_calls)
+
+    def __call__(self, **kw):
+        n = self._next()
+        if self._should_sleep(n):
+            time.sleep(self.latency)
+        if n < self.failures:
+            raise self.error(f"injected failure {n}")
+        return {"ok": n, **kw}
+
+    async def acall(self):
+        n = self._next()
+        if self._should_sleep(n):
+            await asyncio.sleep(self.latency)
+        if n < self.failures:
+            raise self.error(f"injected failure {n}")
+        return {"ok": n}
+
+@pytest.fixture
+def policy(monkeypatch):
+    from core import retry
+    delays = []
+    monkeypatch.setattr(retry, "_sleep", delays.append)
+    p = retry.RetryPolicy(step_max_attempts=3, base_delay_s=0.1, max_delay_s=0.15, breaker_failures=3, breaker_reset_s=0.05)
+    p.delays = delays
+    retry.set_policy(p)
+    yield p
+    retry.set_policy(None)
+
+def test_transient_failures_retry_with_jittered_backoff(policy):
+    from core import retry
+    tool = FakeTool(failures=2)
+    assert retry.call("fake", tool, x=1) == {"ok": 2, "x": 1}
+    assert tool.calls == 3
+    assert len(policy.delays) == 2
+    assert 0 <= policy.delays[0] <= 0.1 and 0 <= policy.delays[1] <= 0.15
+
+def test_non_transient_errors_and_exhaustion(policy):
+    from core import retry
+    tool = FakeTool(failures=1, error=ZeroDivisionError)
+    with pytest.raises(ZeroDivisionError):
+        retry.call("fake", tool)
+    assert tool.calls == 1 and retry.breaker_state("fake") == "closed"
+    tool = FakeTool(failures=5)
+    with pytest.raises(ConnectionError, match="injected failure 2"):
+        retry.call("fake", tool)
+    assert tool.calls == 3
+
+def test_circuit_breaker_opens_then_probes(policy):
+    from core import retry
+    with pytest.raises(ConnectionError):
+        retry.call("flaky", FakeTool(failures=10))
+    assert retry.breaker_state("flaky") == "open"
+    tool = FakeTool()
+    with pytest.raises(retry.CircuitOpenError):
+        retry.call("flaky", tool)
+    assert tool.calls == 0
+    time.sleep(0.06)
+    assert retry.breaker_state("flaky") == "half-open"
+    assert retry.call("flaky", tool) == {"ok": 0}
+    assert retry.breaker_state("flaky") == "closed"
+
+def test_probe_failing_with_a_non_transient_error_does_not_lock_the_breaker(policy):
+    from core import retry
+    with pytest.raises(ConnectionError):
+        retry.call("math", FakeTool(failures=10))
+    time.sleep(0.06)
+    with pytest.raises(ZeroDivisionError):
+        retry.call("math", FakeTool(failures=1, error=ZeroDivisionError))
+    assert retry.call("math", FakeTool()) == {"ok": 0}
+    assert retry.breaker_state("math") == "closed"
+
+def test_openai_errors_are_classified(policy):
+    def openai_error(name, status=None):
+        cls = type(name, (Exception,), {"__module__": "openai._exceptions"})
+        e = cls("upstream")
+        if status is not None:
+            e.status_code = status
+        return e
+    for transient in (openai_error("APITimeoutError"), openai_error("APIConnectionError"),
+                      openai_error("RateLimitError", 429), openai_error("InternalServerError", 503)):
+        assert policy.retryable(transient), transient
+    for permanent in (openai_error("BadRequestError", 400), openai_error("AuthenticationError", 401),
+                      type("RateLimitError", (Exception,), {})("not openai")):
+        assert not policy.retryable(permanent), permanent
+
+def test_deadline_bounds_retries(policy):
+    from core import retry
+    policy.tool_deadlines_s["slow"] = 0.1
+    tool = FakeTool(failures=1, latency=1.0, slow_calls={1})
+    t0 = time.monotonic()
+    with pytest.raises(retry.DeadlineExceeded):
+        retry.call("slow", tool)
+    assert time.monotonic() - t0 < 0.5
+
+def test_hedge_stands_in_for_a_failing_first_attempt(policy):
+    from core import retry
+    policy.hedge_after_s = 0.02
+    policy.base_delay_s = 5.0  # a backoff retry would blow the time limit below
+    tool = FakeTool(failures=1, latency=0.3, slow_calls={0})
+    t0 = time.monotonic()
+    assert retry.call("llm", tool, hedge=True) == {"ok": 1}
+    assert time.monotonic() - t0 < 1.0 and tool.calls == 2
+
+def test_hedged_call_returns_the_first_answer(policy):
+    from core import retry
+    policy.hedge_after_s = 0.02
+    tool = FakeTool(latency=1.0, slow_calls={0})
+    t0 = time.monotonic()
+    assert retry.call("llm", tool, hedge=True) == {"ok": 1} and tool.calls == 2
+    assert time.monotonic() - t0 < 0.5  # not held up by the slow first attempt
+
+def test_tool_pool_timeouts_are_not_retried(policy):
+    from core import retry
+    from core.toolpool import ToolTimeout, WorkerCrashed
+    for error in (ToolTimeout, WorkerCrashed):
+        tool = FakeTool(failures=5, error=error)
+        with pytest.raises(error):
+            retry.call("math", tool)
+        assert tool.calls == 1
+
+def test_async_hedge_and_retry(policy):
+    from core import retry
+    policy.hedge_after_s = 0.02
+    policy.tool_deadlines_s["llm"] = 0.5
+    slow_first = FakeTool(latency=1.0, slow_calls={0})
+    flaky = FakeTool(failures=1)
+    async def go():
+        return await retry.acall("llm", slow_first.acall, hedge=True), await retry.acall("other", flaky.acall)
+    t0 = time.monotonic()
+    assert asyncio.run(go()) == ({"ok": 1}, {"ok": 1})
+    assert time.monotonic() - t0 < 0.5 and flaky.calls == 2
+
+def test_executor_retries_a_transiently_failing_tool(policy):
+    from agents.executor import run_step
+    from core.state import new_step
+    class Tools:
+        echo = FakeTool(failures=1)
+    plan = [new_step(id="plan-2", tool="echo", inputs={"text": "hi"}), new_step(id="plan-3")]
+    run_step(plan[1], plan, "hi", tools=Tools)
+    assert plan[1].state.value == "done" and Tools.echo.calls == 2
+
+def test_policy_reads_retry_section_of_config(tmp_path):
+    from core.retry import RetryPolicy, load_policy
+    defaults = load_policy()
+    assert defaults.step_max_attempts == 2 and defaults.tool_deadlines_s["llm"] > 0
+    cfg = tmp_path / "c.yaml"
+    cfg.write_text("retry:\n  step_max_attempts: 4\n  hedge_after_s: 1.5\n  unknown: 1\n")
+    assert load_policy(str(cfg)) == RetryPolicy(step_max_attempts=4, hedge_after_s=1.5)
@@ -0,0 +1,66 @@
+# tests/test_router.py
+from types import SimpleNamespace
+
+
+def _step(description, tool=None):
+    return SimpleNamespace(description=description, tool=tool)
+
+
+def test_pick_tool_uses_registry_and_config_triggers():
+    from agents.router import pick_tool
+    assert pick_tool(_step("Please sum these numbers"), {})["tool"] == "math.add"
+    assert pick_tool(_step("Echo the input back"), {})["tool"] == "echo.say"
+    assert pick_tool(_step("Call math.batch on the rows"), {})["tool"] == "math.batch"
+    assert pick_tool(_step("anything", tool="math.calc"), {})["tool"] == "math.calc"
+    # Whole words only
+    assert pick_tool(_step("Summarize the addendum"), {})["tool"] == "NO_TOOL"
+
+
+def test_candidates_are_ranked_by_matched_words_then_position():
+    from agents.router import TriggerIndex
+    index = TriggerIndex({
+        "a": ["divide"],
+        "b": ["divided by", "ratio"],
+        "c": ["by"],
+    })
+    ranked = index.match("Take the ratio: 10 divided by 2, then divide")
+    assert [c.tool for c in ranked] == ["b", "c", "a"]
+    assert ranked[0].score == 3 and ranked[0].triggers == ("ratio", "divided by")
+
+
+def test_overlapping_and_nested_phrases_are_all_found():
+    from agents.router import TriggerIndex
+    index = TriggerIndex({"x": ["a b c", "c"], "y": ["b c d", "b"]})
+    hits = index.scan("A b, c d; c")
+    assert sorted(hits) == sorted([(0, "a b c"), (1, "b"), (1, "b c d"), (2, "c"), (4, "c")])
+    assert [c.tool for c in index.match("b c d")] == ["y", "x"]
+
+
+def test_index_scales_to_hundreds_of_tools():
+    from agents.router import build_index
+    from benchmarks.bench_router import synthetic_routing
+    routing = synthetic_routing(500)
+    index = build_index(routing, routing)
+    assert len(index) == 500 * 4  # three triggers plus the tool's name
+    phrase = routing["tool321.run"][2]
+    assert [c.tool for c in index.match(f"please run {phrase} now")] == ["tool321.run"]
+    assert index.match("nothing to see here") == []
+
+
+def test_index_follows_registry_and_config_changes(tmp_path):
+    from agents import router
+    from core import config, orchestrator
+    orchestrator.register_tool("files.read", "tools.echo:run")
+    try:
+        assert router.pick_tool(_step("use files.read"), {})["tool"] == "files.read"
+        cfg = tmp_path / "agent.yaml"
+        cfg.write_text("routing:\n  files.read: [open the file]\n", encoding="utf-8")
+        default = config.CONFIG_PATH
+        config.reload(str(cfg))
+        try:
+            assert router.pick_tool(_step("Open the file first"), {})["tool"] == "files.read"
+        finally:
+            config.reload(default)
+    finally:
+        orchestrator.unregister_tool("files.read")
+    assert router.pick_tool(_step("use files.read"), {})["tool"] == "NO_TOOL"
@@ -0,0 +1,78 @@
+# tests/test_scheduler.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.scheduler import PlanGraph, run_graph
+from core.state import new_step
+
+def _ids(steps):
+    return [s.id for s in steps]
+
+def test_graph_defaults_to_sequential_and_honours_declared_deps():
+    g = PlanGraph([new_step(id="a"), new_step(id="b"), new_step(id="c", depends_on=[])])
+    assert g.deps == {"a": (), "b": ("a",), "c": ()}
+    g = PlanGraph([new_step(id="late", depends_on=["early"]), new_step(id="early", depends_on=[])])
+    assert _ids(g.order) == ["early", "late"]
+
+@pytest.mark.parametrize("plan, msg", [
+    ([new_step(id="a", depends_on=["b"]), new_step(id="b", depends_on=["a"])], "cycle"),
+    ([new_step(id="a", depends_on=["zzz"])], "unknown"),
+    ([new_step(id="a"), new_step(id="a")], "Duplicate"),
+])
+def test_graph_rejects_bad_plans(plan, msg):
+    with pytest.raises(ValueError, match=msg):
+        PlanGraph(plan)
+
+def test_run_graph_runs_independent_steps_concurrently():
+    plan = [new_step(id="x", depends_on=[]), new_step(id="y", depends_on=[]), new_step(id="z", depends_on=["x", "y"])]
+    barrier = threading.Barrier(2, timeout=5)  # x and y must be in flight together
+    seen = []
+    def run_one(step):
+        if step.id in ("x", "y"):
+            barrier.wait()
+        seen.append(step.id)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        run_graph(PlanGraph(plan), run_one, pool)
+    assert seen[-1] == "z" and sorted(seen[:2]) == ["x", "y"]
+
+def test_run_graph_does_not_wait_on_a_busy_pool():
+    plan = [new_step(id="x", depends_on=[]), new_step(id="y", depends_on=[]), new_step(id="z", depends_on=["x", "y"])]
+    release = threading.Event()
+    seen = []
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(release.wait, 5)  # every pool thread is taken by other runs
+        run_graph(PlanGraph(plan), lambda step: seen.append((step.id, threading.get_ident())), pool)
+        release.set()
+    assert [sid for sid, _ in seen] == ["x", "y", "z"]
+    assert {tid for _, tid in seen} == {threading.get_ident()}  # y was taken back from the queue
+
+def test_run_uses_router(monkeypatch):
+    from agents import router
+    from core.orchestrator import run
+    monkeypatch.setattr(router, "route", lambda step: "nowhere")
+    r = run("Please add 5 and 7")
+    assert r["outcome"]["complete"] is False
+    assert all(s["result"] == {"error": "No handler for route: nowhere"} for s in r["plan"])
+
+def test_llm_reasoning_overlaps_tool_choice(monkeypatch):
+    import agents.executor as executor_mod
+    from core.orchestrator import run
+    order = []
+    plan2_done = threading.Event()
+    orig_parse = executor_mod._parse_math_from_prompt
+    def parse(prompt):
+        order.append("plan-2")
+        plan2_done.set()
+        return orig_parse(prompt)
+    def slow_reason(step):
+        assert plan2_done.wait(5)  # would deadlock if plan-2 waited for plan-1
+        order.append("plan-1")
+        return {"thought": "t", "answer": "a"}
+    monkeypatch.setattr(executor_mod, "USE_OPENAI", True)
+    monkeypatch.setattr(executor_mod, "_parse_math_from_prompt", parse)
+    monkeypatch.setattr(executor_mod, "reason", slow_reason)
+    r = run("Please add 5 and 7")
+    assert order == ["plan-2", "plan-1"]
+    assert r["outcome"]["complete"] is True
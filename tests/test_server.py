@@ -0,0 +1,116 @@
+# tests/test_server.py
+import threading
+import time
+import pytest
+
+@pytest.fixture
+def server(tmp_path):
+    from core.server import AgentServer
+    with AgentServer(f"unix:{tmp_path / 'agent.sock'}", workers=2) as srv:
+        yield srv
+
+def test_client_run_matches_local_run(server):
+    from core.client import Client
+    from core.orchestrator import run
+    with Client(server.address) as c:
+        assert c.ping()
+        for prompt in ("Please add 5 and 7", "Divide 10 by 0", "Say hello"):
+            assert c.run(prompt) == run(prompt)
+        assert c.stats()["served"] == 3
+
+def test_tcp_and_rpc_errors():
+    from core.client import Client, RpcError
+    from core.server import AgentServer
+    with AgentServer("127.0.0.1:0", workers=1) as srv, Client(srv.address) as c:
+        with pytest.raises(RpcError) as e:
+            c.call("nope")
+        assert e.value.code == -32601
+        with pytest.raises(RpcError):
+            c.call("run", prompt=123)
+        assert c.run("Please add 5 and 7")["outcome"]["complete"] is True
+
+def test_backpressure_rejects_when_queue_full(tmp_path, monkeypatch):
+    from core import orchestrator
+    from core.client import Client, ServerBusy
+    from core.server import AgentServer
+    release = threading.Event()
+    monkeypatch.setattr(orchestrator, "run", lambda p: release.wait(5) and {"prompt": p})
+    with AgentServer(f"unix:{tmp_path / 's.sock'}", workers=1, max_pending=1, queue_timeout_s=0.05) as srv:
+        slow = Client(srv.address)
+        t = threading.Thread(target=slow.run, args=("first",))
+        t.start()
+        while srv.stats()["in_flight"] == 0:
+            time.sleep(0.01)
+        with Client(srv.address, busy_retries=0) as c, pytest.raises(ServerBusy):
+            c.run("second")
+        release.set()
+        t.join()
+        slow.close()
+        assert srv.stats()["rejected"] == 1
+
+def test_close_drains_in_flight_requests(tmp_path, monkeypatch):
+    from core import orchestrator
+    from core.client import Client
+    from core.server import AgentServer
+    started = threading.Event()
+    def slow_run(p):
+        started.set()
+        time.sleep(0.2)
+        return {"prompt": p}
+    monkeypatch.setattr(orchestrator, "run", slow_run)
+    srv = AgentServer(f"unix:{tmp_path / 'd.sock'}", workers=1).start()
+    results = []
+    client = Client(srv.address)
+    t = threading.Thread(target=lambda: results.append(client.run("x")))
+    t.start()
+    started.wait(5)
+    srv.shutdown()
+    srv.close()
+    t.join()
+    assert results == [{"prompt": "x"}]
+    assert not (tmp_path / "d.sock").exists()
+
+def test_bad_params_are_invalid_params_not_internal_errors():
+    import json
+    from core.client import Client, RpcError
+    from core.server import AgentServer
+    with AgentServer("127.0.0.1:0", workers=1) as srv, Client(srv.address) as c:
+        with pytest.raises(RpcError) as e:
+            c.call("run", prompt=123)
+        assert e.value.code == -32602
+        for params in ('["Please add 5 and 7"]', '"x"', '{}'):
+            reply = json.loads(srv.handle_line(b'{"jsonrpc":"2.0","id":1,"method":"run","params":%s}' % params.encode()))
+            assert reply["error"]["code"] == -32602, params
+        assert srv.stats()["errors"] == 0
+
+def test_client_never_resends_a_request_the_server_may_have_run(tmp_path):
+    import socket
+    from core.client import Client
+    path = str(tmp_path / "raw.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+    received = []
+
+    def serve():
+        # 1st connection: answer one request, then close it while idle;
+        # 2nd connection: read one request and drop it unanswered
+        for answer in (True, False):
+            conn, _ = listener.accept()
+            with conn, conn.makefile("rb") as rfile:
+                received.append(rfile.readline())
+                if answer:
+                    conn.sendall(b'{"jsonrpc":"2.0","id":1,"result":"pong"}\n')
+    t = threading.Thread(target=serve)
+    t.start()
+    with Client(f"unix:{path}") as c:
+        assert c.ping()
+        t_wait = time.monotonic()
+        while len(received) < 1 and time.monotonic() - t_wait < 5:
+            time.sleep(0.01)
+        time.sleep(0.05)  # let the server close the idle connection
+        with pytest.raises(ConnectionError):
+            c.run("Please add 5 and 7")  # reconnects (the idle close is seen) but never resends
+    t.join(5)
+    listener.close()
+    assert len(received) == 2 and b'"run"' in received[1]
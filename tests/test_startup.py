@@ -0,0 +1,54 @@
+# tests/test_startup.py
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy packages the offline CLI path must not import
+DEFERRED = {"pydantic", "openai", "httpx", "numpy", "yaml", "typer", "rich",
+            "asyncio", "sqlite3", "multiprocessing", "concurrent"}
+
+# Cumulative -X importtime budget for core.orchestrator (pydantic alone used to cost ~100ms)
+BUDGET_US = int(float(os.getenv("IMPORT_BUDGET_MS", "100")) * 1000)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def compiled_config():
+    # Like a warm .pyc: the first process to read the config leaves the parsed copy
+    # that later processes (the CLI) load without importing yaml
+    from core import config
+    config.load_section("models")
+
+
+def _importtime(*args):
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "RUN_CACHE", "RUN_TRACE")}
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cum)
+    return proc.stdout, cumulative
+
+
+def test_offline_cli_defers_heavy_imports():
+    out, imported = _importtime("app.py", "Please add 5 and 7")
+    assert '"complete": true' in out
+    assert not {name.split(".")[0] for name in imported} & DEFERRED
+
+
+def test_orchestrator_import_time_budget():
+    _, imported = _importtime("-c", "import core.orchestrator")
+    assert imported["core.orchestrator"] < BUDGET_US, f"{imported['core.orchestrator']}us > {BUDGET_US}us"
+
+
+def test_pydantic_models_still_importable():
+    from core.state import PlanStep
+    import agents.planner as planner
+    assert planner.PlanStep is PlanStep
+    assert planner.make_plan("goal", {})[0].id == "plan-1"
@@ -0,0 +1,26 @@
+# tests/test_state.py
+import pytest
+
+from core.state import Step, StepState, new_step
+
+def test_step_is_slotted_and_dict_compatible():
+    s = new_step(id="plan-1", description="d")
+    assert not hasattr(s, "__dict__")
+    assert s["id"] == "plan-1" and s.get("max_attempts", 5) == 2 and s.get("nope", 5) == 5
+    s["attempts"] = 2
+    assert s.attempts == 2
+    with pytest.raises(KeyError):
+        s["nope"] = 1
+    with pytest.raises(TypeError):
+        new_step(nope=1)
+
+def test_step_to_dict_matches_old_dict_shape():
+    s = Step(id="plan-2", acceptance="Inputs present")
+    assert list(s.to_dict()) == [
+        "id", "description", "tool", "inputs", "acceptance",
+        "attempts", "max_attempts", "done", "result", "state",
+    ]
+    assert s.to_dict()["state"] == "planned"
+    s.reason, s.criteria, s.state = {"thought": "t"}, {"c": 1}, StepState.DONE
+    d = s.to_dict()
+    assert d["state"] == "done" and d["reason"] == {"thought": "t"} and d["criteria"] == {"c": 1}
@@ -0,0 +1,54 @@
+# tests/test_stream.py
+import asyncio
+
+def _strip(event):
+    return {k: v for k, v in event.items() if k not in ("event", "t_ms")}
+
+def _check_events(events, prompt):
+    from core.orchestrator import run
+    assert events[0]["event"] == "plan"
+    assert [s["state"] for s in events[0]["steps"]] == ["planned"] * 3
+    steps = [e for e in events if e["event"] == "step"]
+    for sid in ("plan-1", "plan-2", "plan-3"):
+        states = [e["state"] for e in steps if e["id"] == sid]
+        assert states[0] == "running" and states[1] in ("done", "failed") and len(states) == 2
+    # plan-3 depends on plan-2
+    pos = {(e["id"], e["state"]): i for i, e in enumerate(steps)}
+    assert pos[("plan-2", "done")] < pos[("plan-3", "running")]
+    assert events[-1]["event"] == "outcome"
+    assert all(a["t_ms"] <= b["t_ms"] for a, b in zip(events, events[1:]))
+    assert _strip(events[-1]) == run(prompt)
+
+def test_run_stream_yields_transitions_then_outcome():
+    from core.orchestrator import run_stream
+    events = list(run_stream("Please add 5 and 7"))
+    _check_events(events, "Please add 5 and 7")
+    p3 = next(e for e in events if e["event"] == "step" and e["id"] == "plan-3" and e["state"] == "done")
+    assert p3["result"]["tool_output"] == 12.0
+
+def test_run_stream_on_step_pool(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from core import orchestrator
+    with ThreadPoolExecutor(4) as pool:
+        monkeypatch.setattr(orchestrator, "_get_step_pool", lambda: pool)
+        events = list(orchestrator.run_stream("Divide 10 by 0"))
+        _check_events(events, "Divide 10 by 0")
+    assert events[-1]["outcome"]["complete"] is False
+
+def test_arun_stream():
+    from core.orchestrator import arun_stream
+    async def collect():
+        return [e async for e in arun_stream("Say hello")]
+    _check_events(asyncio.run(collect()), "Say hello")
+
+def test_run_stream_cache_hit_yields_only_outcome():
+    from core import orchestrator
+    from core.cache import RunCache
+    orchestrator.set_run_cache(RunCache())
+    try:
+        first = list(orchestrator.run_stream("Please add 5 and 7"))
+        second = list(orchestrator.run_stream("Please add 5 and 7"))
+    finally:
+        orchestrator.set_run_cache(None)
+    assert len(second) == 1 and second[0]["cached"] is True
+    assert _strip(first[-1]) == {k: v for k, v in _strip(second[0]).items() if k != "cached"}
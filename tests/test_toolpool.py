@@ -0,0 +1,146 @@
+# tests/test_toolpool.py
+import os
+import time
+
+import pytest
+
+# Tools for the pool tests; workers import this module as "test_toolpool"
+SPEC = "test_toolpool:{}"
+
+
+def hang(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def crash():
+    os._exit(3)
+
+
+def hog(mb):
+    return len(bytearray(mb * 1024 * 1024))
+
+
+def size(data):
+    return len(data)
+
+
+def blob(n):
+    return "x" * n
+
+
+def odd():
+    return {1, 2}
+
+
+@pytest.fixture(scope="module")
+def pool():
+    from core.toolpool import ToolPool
+    with ToolPool(["tools.math_tool:math", SPEC.format("hang")], workers=2, timeout_s=5.0,
+                  memory_mb=512, shm_bytes=64 * 1024) as p:
+        yield p
+
+
+def test_runs_tools_and_reraises_their_errors(pool):
+    assert pool.call("tools.math_tool:math", {"op": "mul", "a": 6.0, "b": 7.0}) == 42.0
+    with pytest.raises(ZeroDivisionError, match="Division by zero"):
+        pool.call("tools.math_tool:math", {"op": "div", "a": 1.0, "b": 0.0})
+
+
+def test_replies_are_plain_data(pool):
+    from core.toolpool import decode_reply, encode_reply
+    # math_batch returns its per-element errors; a tool's own exception class arrives
+    # as the nearest built-in one
+    out = pool.call("tools.math_tool:math_batch", {"ops": ["add", "div"], "a": [1.0, 1.0], "b": [2.0, 0.0]})
+    assert out[0] == 3.0 and isinstance(out[1], ZeroDivisionError) and str(out[1]) == "Division by zero"
+    with pytest.raises(ValueError, match="Missing operand"):
+        pool.call("tools.math_tool:expr", {"expr": "* 2"})
+    with pytest.raises(RuntimeError, match="TypeError: set is not JSON serializable"):
+        pool.call(SPEC.format("odd"), {})
+    # A reply cannot make the parent raise anything but a plain Exception
+    ok, err = decode_reply(b'[false,{"__error__":["SystemExit","BaseException"],"message":"bye"}]')
+    assert ok is False and type(err) is RuntimeError and str(err) == "SystemExit: bye"
+    assert decode_reply(encode_reply(True, (1, "a", None))) == (True, [1, "a", None])
+
+
+def test_large_payloads_both_ways(pool):
+    # Below and above shm_bytes: shared memory, then inline over the pipe
+    for n in (1000, 200_000):
+        assert pool.call(SPEC.format("size"), {"data": "y" * n}) == n
+        assert pool.call(SPEC.format("blob"), {"n": n}) == "x" * n
+
+
+def test_hung_worker_is_killed_and_replaced(pool):
+    from core.toolpool import ToolTimeout
+    before = pool.stats()["replaced"]
+    t0 = time.monotonic()
+    with pytest.raises(ToolTimeout):
+        pool.call(SPEC.format("hang"), {"seconds": 30}, timeout=0.2)
+    assert time.monotonic() - t0 < 5
+    assert pool.stats()["replaced"] == before + 1
+    assert pool.call(SPEC.format("hang"), {"seconds": 0}) == 0
+    assert pool.stats()["alive"] == 2
+
+
+def test_crash_and_memory_limit_replace_the_worker(pool):
+    from core.toolpool import WorkerCrashed
+    with pytest.raises(WorkerCrashed):
+        pool.call(SPEC.format("crash"), {})
+    with pytest.raises(MemoryError):
+        pool.call(SPEC.format("hog"), {"mb": 2048})
+    assert pool.call(SPEC.format("hog"), {"mb": 1}) == 1024 * 1024
+    assert pool.stats()["crashes"] >= 1 and pool.stats()["alive"] == 2
+
+
+def test_isolated_registry_tool_runs_on_the_pool(pool, monkeypatch):
+    from core import orchestrator
+    monkeypatch.setattr(orchestrator, "_TOOL_POOL", pool)
+    calls = pool.stats()["calls"]
+    orchestrator.isolate_tool("math.calc")
+    try:
+        result = orchestrator.run("Multiply 6 by 7")
+        failed = orchestrator.run("Divide 10 by 0")
+    finally:
+        orchestrator.isolate_tool("math.calc", False)
+    assert result["plan"][2]["result"]["tool_output"] == 42.0
+    assert failed["plan"][2]["result"] == {"error": "Division by zero"}
+    assert pool.stats()["calls"] == calls + 2
+    # echo stays in-process
+    assert orchestrator.get_tool("echo.say") is orchestrator._resolve("echo.say")
+
+
+def test_failed_replacement_is_retried_instead_of_blocking(monkeypatch):
+    from core.toolpool import ToolPool, ToolTimeout, WorkerCrashed
+    with ToolPool([SPEC.format("hang")], workers=1, timeout_s=5.0) as p:
+        spawn = p._spawn
+
+        def broken():
+            raise OSError("no more processes")
+
+        monkeypatch.setattr(p, "_spawn", broken)
+        with pytest.raises(ToolTimeout):
+            p.call(SPEC.format("hang"), {"seconds": 30}, timeout=0.2)
+        assert p.stats()["missing"] == 1
+        with pytest.raises(WorkerCrashed):
+            p.call(SPEC.format("hang"), {"seconds": 0})
+        monkeypatch.setattr(p, "_spawn", spawn)
+        assert p.call(SPEC.format("hang"), {"seconds": 0}) == 0
+        assert p.stats()["missing"] == 0 and p.stats()["alive"] == 1
+
+
+def test_isolated_tools_run_off_the_event_loop(pool, monkeypatch):
+    import asyncio
+    import threading
+    from core import orchestrator
+    monkeypatch.setattr(orchestrator, "_TOOL_POOL", pool)
+    threads = []
+    call = pool.call
+    monkeypatch.setattr(pool, "call", lambda *a, **kw: threads.append(threading.get_ident()) or call(*a, **kw))
+    orchestrator.isolate_tool("math.calc")
+    try:
+        assert orchestrator.ToolRegistry.isolated("math") and not orchestrator.ToolRegistry.isolated("echo")
+        result = asyncio.run(orchestrator.arun("Multiply 6 by 7"))
+    finally:
+        orchestrator.isolate_tool("math.calc", False)
+    assert result["plan"][2]["result"]["tool_output"] == 42.0
+    assert threads and threading.get_ident() not in threads
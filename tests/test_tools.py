@@ -0,0 +1,30 @@
+# tests/test_tools.py
+import importlib
+
+def test_get_tool_is_cached(monkeypatch):
+    from core import orchestrator
+    orchestrator.warm()
+    calls = []
+    monkeypatch.setattr(importlib, "import_module", lambda name: calls.append(name))
+    assert orchestrator.get_tool("echo.say")(text="hi") == "hi"
+    assert orchestrator.get_tool("math.calc")(op="mul", a=3, b=4) == 12
+    assert calls == []
+
+def test_registry_changes_invalidate_cache(monkeypatch):
+    from core import orchestrator
+    orchestrator.warm()
+    monkeypatch.setitem(orchestrator._TOOL_REGISTRY, "echo.say", "tools.math_tool:run")
+    assert orchestrator.get_tool("echo.say")(a=1, b=2) == 3  # direct edit picked up
+    monkeypatch.undo()
+    assert orchestrator.get_tool("echo.say")(text="back") == "back"
+
+def test_register_and_unregister_tool():
+    import pytest
+    from core import orchestrator
+    orchestrator.register_tool("echo.upper", "tools.echo:echo")
+    try:
+        assert orchestrator.get_tool("echo.upper")(text="x") == "x"
+    finally:
+        orchestrator.unregister_tool("echo.upper")
+    with pytest.raises(ValueError):
+        orchestrator.get_tool("echo.upper")
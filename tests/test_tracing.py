@@ -0,0 +1,60 @@
+# tests/test_tracing.py
+import json
+import pytest
+
+@pytest.fixture
+def traced():
+    from core import tracing
+    tracing.enable()
+    yield tracing
+    tracing.enable(False)
+
+def test_untraced_run_has_no_spans():
+    from core.orchestrator import run
+    assert "spans" not in run("Please add 5 and 7")
+
+def test_run_records_nested_stage_spans(traced):
+    from core.orchestrator import run
+    result = run("Please add 5 and 7")
+    spans = {s["name"]: s for s in result["spans"]}
+    assert {"run", "plan", "step", "tool", "evaluate"} <= set(spans)
+    root = spans["run"]
+    assert root["parent_span_id"] is None
+    assert all(s["trace_id"] == root["trace_id"] for s in result["spans"])
+    assert spans["plan"]["parent_span_id"] == root["span_id"]
+    steps = [s for s in result["spans"] if s["name"] == "step"]
+    assert sorted(s["attributes"]["step_id"] for s in steps) == ["plan-1", "plan-2", "plan-3"]
+    tool = spans["tool"]
+    assert tool["attributes"]["tool"] == "math"
+    assert tool["parent_span_id"] == next(s["span_id"] for s in steps if s["attributes"]["step_id"] == "plan-3")
+    assert all(s["end_time_unix_nano"] >= s["start_time_unix_nano"] for s in result["spans"])
+    assert root["duration_ms"] >= max(s["duration_ms"] for s in result["spans"])
+
+def test_failed_run_is_exported_with_error_status(traced, monkeypatch):
+    import agents.planner as planner_mod
+    from core.orchestrator import run
+    exported = []
+    traced.add_exporter(exported.append)
+    try:
+        monkeypatch.setattr(planner_mod, "create_initial_plan", lambda p: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            run("Please add 5 and 7")
+    finally:
+        traced.remove_exporter(exported.append)
+    (spans,) = exported
+    assert [s["name"] for s in spans] == ["plan", "run"]
+    assert all(s["status"]["code"] == "ERROR" for s in spans)
+
+def test_jsonl_exporter_and_batch(tmp_path):
+    from core import tracing
+    from core.orchestrator import run_batch
+    exporter = tracing.JsonlExporter(str(tmp_path / "spans.jsonl"))
+    tracing.add_exporter(exporter)
+    try:
+        results = list(run_batch(["Please add 5 and 7", "Say hello"], workers=2, chunk_size=1))
+    finally:
+        tracing.remove_exporter(exporter)
+    assert all(r["spans"] for r in results)
+    lines = [json.loads(l) for l in (tmp_path / "spans.jsonl").read_text().splitlines()]
+    assert len({s["trace_id"] for s in lines}) == 2
+    assert sum(s["name"] == "run" for s in lines) == 2
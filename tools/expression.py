@@ -0,0 +1,213 @@
+# tools/expression.py
+"""
+Arithmetic expressions for the math tool: "3 + 4 + 5 + 6", "(2+3)*4/7", "-(1.5 x 2) ÷ 3".
+
+Numbers, + - * / (x, × and ÷ accepted), unary signs and parentheses; nothing else, and
+no eval(). compile() turns the text into a small AST in one shunting-yard pass, folding
+every constant subtree as it is built, so an expression normally compiles to a single
+Num. A division by zero is not folded: that subtree stays an operation and raises
+ZeroDivisionError("Division by zero") when evaluated, exactly like math_tool.math.
+Compiled expressions are kept in an LRU keyed by the normalized text.
+
+Parsing and evaluation are iterative, so expressions with thousands of terms (or
+deeply nested parentheses) need no recursion.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, List, Union
+
+# Max compiled expressions kept (LRU); 0 disables the cache
+CACHE_SIZE = int(os.getenv("MATH_EXPR_CACHE_SIZE", "1024"))
+
+_CHARS_RE = re.compile(r"[\d.\s()*/+-]*")
+_SYMBOLS = str.maketrans({"x": "*", "×": "*", "÷": "/"})
+_BINARY = {"+": "add", "-": "sub", "*": "mul", "/": "div"}
+_PRECEDENCE = {"(": 0, "+": 1, "-": 1, "*": 2, "/": 2, "neg": 3}
+
+
+class ExpressionError(ValueError):
+    """The text is not a well-formed arithmetic expression."""
+
+
+@dataclass(slots=True, frozen=True)
+class Num:
+    value: float
+
+
+@dataclass(slots=True, frozen=True)
+class Neg:
+    operand: "Node"
+
+
+@dataclass(slots=True, frozen=True)
+class BinOp:
+    op: str  # add | sub | mul | div, as in math_tool.math
+    left: "Node"
+    right: "Node"
+
+
+Node = Union[Num, Neg, BinOp]
+
+
+def _apply(op: str, a: float, b: float) -> float:
+    if op == "add":
+        return a + b
+    if op == "sub":
+        return a - b
+    if op == "mul":
+        return a * b
+    if b == 0:
+        raise ZeroDivisionError("Division by zero")
+    return a / b
+
+
+def normalize(text: str) -> str:
+    """The cache key: lowercase, one space between words, x/×/÷ spelled * and /."""
+    return " ".join(text.lower().translate(_SYMBOLS).split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Numbers, operators and parentheses of `text` (already normalized or not)."""
+    text = text.lower().translate(_SYMBOLS)
+    if not _CHARS_RE.fullmatch(text):
+        raise ExpressionError(f"Not an arithmetic expression: {text[:80]!r}")
+    # Only digits, dots, operators and spaces remain: pad the operators and split
+    # (several times faster than a tokenizing regex on long expressions)
+    for sym in "()*/+-":
+        text = text.replace(sym, f" {sym} ")
+    return text.split()
+
+
+def _node(x: Any) -> Node:
+    return Num(x) if type(x) is float else x
+
+
+def _reduce(op: str, values: List[Any]) -> None:
+    # Replace the operands of `op` on the value stack with the result. Constants stay
+    # plain floats while the AST is built; a division by zero is left as an operation
+    if op == "neg":
+        x = values[-1]
+        values[-1] = -x if type(x) is float else Neg(x)
+        return
+    b = values.pop()
+    a = values[-1]
+    if type(a) is float and type(b) is float:
+        if op == "+":
+            values[-1] = a + b
+            return
+        if op == "-":
+            values[-1] = a - b
+            return
+        if op == "*":
+            values[-1] = a * b
+            return
+        if b != 0:
+            values[-1] = a / b
+            return
+    values[-1] = BinOp(_BINARY[op], _node(a), _node(b))
+
+
+def parse(text: str) -> Node:
+    """Compile `text` to a constant-folded AST (uncached; see compile())."""
+    values: List[Any] = []
+    ops: List[str] = []  # pending operators and "(" markers
+    precedence = _PRECEDENCE
+    expect_operand = True
+    for tok in tokenize(text):
+        prec = precedence.get(tok)
+        if prec:  # a binary operator, or a sign
+            if expect_operand:
+                if tok == "-":
+                    ops.append("neg")
+                elif tok != "+":
+                    raise ExpressionError(f"Missing operand before {tok!r}")
+                continue
+            while ops and precedence[ops[-1]] >= prec:
+                _reduce(ops.pop(), values)
+            ops.append(tok)
+            expect_operand = True
+        elif tok == "(":
+            if not expect_operand:
+                raise ExpressionError("Missing operator before '('")
+            ops.append(tok)
+        elif tok == ")":
+            if expect_operand:
+                raise ExpressionError("Missing operand before ')'")
+            while ops and ops[-1] != "(":
+                _reduce(ops.pop(), values)
+            if not ops:
+                raise ExpressionError("Unbalanced ')'")
+            ops.pop()
+        else:
+            if not expect_operand:
+                raise ExpressionError(f"Missing operator before {tok!r}")
+            try:
+                values.append(float(tok))
+            except ValueError:
+                raise ExpressionError(f"Not a number: {tok!r}") from None
+            expect_operand = False
+    if expect_operand:
+        raise ExpressionError("Expression is empty or ends with an operator")
+    while ops:
+        op = ops.pop()
+        if op == "(":
+            raise ExpressionError("Unbalanced '('")
+        _reduce(op, values)
+    return _node(values[0])
+
+
+def evaluate(node: Node) -> float:
+    """Value of a compiled expression; raises ZeroDivisionError for a division by zero."""
+    if type(node) is Num:
+        return node.value
+    out: List[float] = []
+    stack = [(node, False)]
+    while stack:
+        n, ready = stack.pop()
+        if type(n) is Num:
+            out.append(n.value)
+        elif ready:
+            if type(n) is Neg:
+                out.append(-out.pop())
+            else:
+                b = out.pop()
+                out.append(_apply(n.op, out.pop(), b))
+        elif type(n) is Neg:
+            stack += ((n, True), (n.operand, False))
+        else:
+            stack += ((n, True), (n.right, False), (n.left, False))
+    return out[0]
+
+
+_cache: "OrderedDict[str, Node]" = OrderedDict()
+_cache_lock = threading.Lock()
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def compile(text: str) -> Node:
+    """parse() through the LRU of compiled expressions, keyed by normalize(text)."""
+    key = normalize(text)
+    with _cache_lock:
+        node = _cache.get(key)
+        if node is not None:
+            _cache.move_to_end(key)
+            cache_stats["hits"] += 1
+            return node
+        cache_stats["misses"] += 1
+    node = parse(key)
+    if CACHE_SIZE > 0:
+        with _cache_lock:
+            _cache[key] = node
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return node
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+        for k in cache_stats:
+            cache_stats[k] = 0
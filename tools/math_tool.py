@@ -1,4 +1,7 @@
 # tools/math_tool.py
+from itertools import repeat
+
+from tools import expression
 
 def run(a: float, b: float):
     # registry route for addition
@@ -15,4 +18,64 @@ def math(op: str, a: float, b: float):
         if b == 0:
             raise ZeroDivisionError("Division by zero")
         return a / b
-    raise ValueError(f"Unknown math op: {op}")
\ No newline at end of file
+    raise ValueError(f"Unknown math op: {op}")
+
+def expr(expr: str):
+    """
+    Evaluate a whole arithmetic expression ("3 + 4 + 5 + 6", "(2+3)*4/7") in one call.
+    Compiled once per normalized text (tools/expression.py); raises ZeroDivisionError
+    like math() for a division by zero, ValueError for malformed text.
+    """
+    return expression.evaluate(expression.compile(expr))
+
+_OP_CODES = {"add": 0, "sub": 1, "mul": 2, "div": 3}
+
+
+def _scalar_or_error(op: str, a: float, b: float):
+    try:
+        return float(math(op, a, b))
+    except (ZeroDivisionError, ValueError) as e:
+        return e
+
+
+def _as_float_array(np, values):
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64, copy=False)
+    return np.fromiter(values, dtype=np.float64, count=len(values))
+
+
+def math_batch(ops, a, b):
+    """
+    Vectorized math(): evaluate ops[i](a[i], b[i]) for every i at once.
+
+    Returns a list of floats in input order. Elements math() would reject are
+    returned as the exception it would have raised instead of aborting the batch:
+    ZeroDivisionError("Division by zero") for x/0, ValueError for unknown ops.
+    Uses NumPy when installed, otherwise falls back to a scalar loop.
+    """
+    if not (len(ops) == len(a) == len(b)):
+        raise ValueError("ops, a and b must have the same length")
+    try:
+        import numpy as np
+    except ImportError:
+        return [_scalar_or_error(op, x, y) for op, x, y in zip(ops, a, b)]
+
+    codes = np.fromiter(map(_OP_CODES.get, ops, repeat(-1)), dtype=np.int8, count=len(ops))
+    a = _as_float_array(np, a)
+    b = _as_float_array(np, b)
+    out = np.empty(len(a), dtype=np.float64)
+
+    with np.errstate(all="ignore"):  # inf/nan propagate exactly as with Python floats
+        np.add(a, b, out=out, where=codes == 0)
+        np.subtract(a, b, out=out, where=codes == 1)
+        np.multiply(a, b, out=out, where=codes == 2)
+        div = codes == 3
+        by_zero = div & (b == 0)
+        np.divide(a, b, out=out, where=div & ~by_zero)
+
+    result = out.tolist()
+    for i in np.flatnonzero(by_zero):
+        result[i] = ZeroDivisionError("Division by zero")
+    for i in np.flatnonzero(codes < 0):
+        result[i] = ValueError(f"Unknown math op: {ops[i]}")
+    return result